@@ -4,32 +4,89 @@ Sistema de gerenciamento inteligente de reviews de e-commerce.
 """
 
 import os
+import json
 import asyncio
 import time
 import logging
-from contextlib import asynccontextmanager
-from typing import List, Dict, Any
+from contextlib import asynccontextmanager, suppress
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response, Header, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 from dotenv import load_dotenv
+import httpx
 
+# Carregar .env antes de importar módulos que leem as configurações
+load_dotenv()
+
+from src.reviewflow_ai.config import settings
 from src.reviewflow_ai.models.data_models import (
     ReviewInput, 
     ProcessingResult,
     ReviewAnalysis,
     ResponseGeneration,
     EscalationTicket,
-    WorkflowResult
+    WorkflowResult,
+    CacheInvalidation
 )
 from src.reviewflow_ai.tools.validation import validate_review_input
 from src.reviewflow_ai.agents.workflow_orchestrator import create_workflow_orchestrator_agent
+from src.reviewflow_ai.tools.deadline import Deadline
+from src.reviewflow_ai.tools.idempotency import (
+    IdempotencyConflict, create_idempotency_store, request_fingerprint, validate_idempotency_key
+)
+from src.reviewflow_ai.tools.product_insights import ProductInsights
+from src.reviewflow_ai.tools.model_routing import model_usage
+from src.reviewflow_ai.tools.profiling import RequestProfiler
+from src.reviewflow_ai.tools.prompting import prompt_stats
+from src.reviewflow_ai.tools.result_broadcaster import create_result_broadcaster, result_summary
+from src.reviewflow_ai.tools.result_store import create_result_store
+from src.reviewflow_ai.tools.shard_router import create_shard_router
+from src.reviewflow_ai.tools.streaming import sse_event
+from src.reviewflow_ai.tools.structured_output import structured_output_stats
+from src.reviewflow_ai.tools.token_usage import TokenBudget, UsageLedger
+from src.reviewflow_ai.tools.tracing import tracer
+from src.reviewflow_ai.tools.webhook_delivery import create_webhook_dispatcher
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+# Intervalo de verificação de desconexão do cliente (segundos)
+DISCONNECT_POLL_INTERVAL = 0.5
+
+# Reviews processados simultaneamente em um lote
+BATCH_CONCURRENCY = 5
+
+# Profiling sob demanda (header X-Profile + X-Admin-Token) ou por amostragem
+profiler = RequestProfiler(
+    output_dir=settings.PROFILE_OUTPUT_DIR,
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    interval=settings.PROFILE_INTERVAL_MS / 1000,
+    admin_token=settings.ADMIN_TOKEN
+)
+
+# Agregados de sentimento por produto/categoria, atualizados a cada resultado
+product_insights = ProductInsights(
+    window_hours=settings.INSIGHTS_WINDOW_HOURS,
+    bucket_minutes=settings.INSIGHTS_BUCKET_MINUTES
+)
+
+# Tokens e custo por workflow_path e por lote
+usage_ledger = UsageLedger()
+
+# Push de resultados concluídos para assinantes WebSocket
+result_broadcaster = create_result_broadcaster()
+
+# Respostas por Idempotency-Key (/process e /batch)
+idempotency_store = create_idempotency_store()
+
+
+class ClientDisconnected(Exception):
+    """O cliente encerrou a conexão antes do fim do processamento."""
 
 
 @asynccontextmanager
@@ -47,6 +104,19 @@ async def lifespan(app: FastAPI):
     try:
         app.state.workflow_agent = create_workflow_orchestrator_agent()
         logger.info("Workflow Orchestrator Agent inicializado com sucesso")
+        app.state.result_store = create_result_store(settings.DATABASE_URL)
+        logger.info(f"Result store inicializado em {app.state.result_store.path}")
+        app.state.webhooks = create_webhook_dispatcher()
+        await app.state.webhooks.start()
+        if app.state.webhooks.enabled:
+            logger.info(f"Webhooks ativos para {len(app.state.webhooks.endpoints)} endpoint(s)")
+        app.state.shard_router = create_shard_router()
+        await app.state.shard_router.start()
+        if app.state.shard_router.enabled:
+            logger.info(
+                f"Sharding ativo: nó {app.state.shard_router.self_name} "
+                f"em um anel de {len(app.state.shard_router.nodes)} nós"
+            )
     except Exception as e:
         logger.error(f"Erro ao inicializar agente: {e}")
         raise
@@ -56,6 +126,11 @@ async def lifespan(app: FastAPI):
     yield
     
     logger.info("Finalizando ReviewFlow AI API...")
+    await app.state.shard_router.close()
+    await app.state.webhooks.close()
+    await app.state.workflow_agent.cache.close()
+    app.state.result_store.close()
+    tracer.close()
 
 
 # Criar aplicação FastAPI
@@ -86,7 +161,14 @@ async def root():
         "endpoints": {
             "health": "/health",
             "process_review": "/api/v1/reviews/process",
+            "process_stream": "/api/v1/reviews/process/stream",
             "process_batch": "/api/v1/reviews/batch",
+            "results": "/api/v1/results",
+            "shards": "/api/v1/shards",
+            "product_insights": "/api/v1/products/{product_id}/insights",
+            "anomalies": "/api/v1/anomalies",
+            "escalations": "/api/v1/escalations",
+            "results_ws": "/api/v1/ws/results",
             "docs": "/docs"
         }
     }
@@ -102,12 +184,19 @@ async def health_check():
         
         overall_status = "healthy" if (agent_status and env_status) else "unhealthy"
         
+        llm_circuit = "unknown"
+        if agent_status:
+            llm_circuit = app.state.workflow_agent.backend.breaker.state
+            if llm_circuit != "closed" and overall_status == "healthy":
+                overall_status = "degraded"
+        
         return {
             "status": overall_status,
             "timestamp": time.time(),
             "components": {
                 "workflow_agent": "ok" if agent_status else "error",
-                "environment": "ok" if env_status else "error"
+                "environment": "ok" if env_status else "error",
+                "llm_circuit": llm_circuit
             }
         }
     except Exception as e:
@@ -118,97 +207,329 @@ async def health_check():
         }
 
 
+async def run_until_disconnect(request: Request, coro):
+    """Executa o processamento, cancelando-o se o cliente desconectar."""
+    task = asyncio.ensure_future(coro)
+    
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+        if done:
+            return task.result()
+        
+        if await request.is_disconnected():
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+            raise ClientDisconnected()
+
+
+async def persist_result(processing_result: ProcessingResult, batch_id: Optional[str] = None) -> None:
+    """Persiste o resultado no result store, sem falhar a requisição em caso de erro."""
+    store = getattr(app.state, "result_store", None)
+    if store is None:
+        return
+    try:
+        with tracer.start_span("persist"):
+            await store.save_async(processing_result, batch_id)
+    except Exception as e:
+        logger.error(f"Erro ao persistir resultado {processing_result.workflow.review_id}: {e}")
+
+
+def parse_idempotency_key(value: Optional[str]) -> Optional[str]:
+    """Valida o header Idempotency-Key (400 se inválido)."""
+    try:
+        return validate_idempotency_key(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def enqueue_webhooks(processing_result: ProcessingResult, batch_id: Optional[str] = None) -> None:
+    """Grava os eventos do resultado no outbox de webhooks, sem falhar a requisição."""
+    webhooks = getattr(app.state, "webhooks", None)
+    if webhooks is None or not webhooks.enabled:
+        return
+    try:
+        await webhooks.enqueue_result(processing_result, batch_id)
+    except Exception as e:
+        logger.error(f"Erro ao enfileirar webhooks de {processing_result.workflow.review_id}: {e}")
+
+
+async def publish_result(processing_result: ProcessingResult, batch_id: Optional[str] = None) -> None:
+    """Registra um resultado concluído: agregados, tokens, assinantes, persistência e webhooks."""
+    product_insights.record(
+        processing_result.analysis,
+        processing_result.review_input.product_id,
+        processing_result.timestamp.timestamp()
+    )
+    usage_ledger.record(
+        processing_result.workflow.workflow_path.value,
+        processing_result.token_usage.model_dump() if processing_result.token_usage else None,
+        batch_id
+    )
+    result_broadcaster.publish(result_summary(processing_result, batch_id))
+    await persist_result(processing_result, batch_id)
+    await enqueue_webhooks(processing_result, batch_id)
+
+
+def build_processing_result(
+    validated_review: ReviewInput,
+    result: Dict[str, Any],
+    processing_time: float
+) -> ProcessingResult:
+    """Monta o ProcessingResult a partir do resultado do orchestrator."""
+    tools_used = []
+    if result.get("customer_context"):
+        tools_used.append("get_customer_history")
+    if validated_review.product_id and validated_review.product_id != "UNKNOWN":
+        tools_used.append("get_product_info")
+    
+    return ProcessingResult(
+        review_input=validated_review,
+        analysis=ReviewAnalysis(
+            validation_status="success",
+            sentiment=result["analysis"].get("sentiment"),
+            sentiment_score=result["analysis"].get("sentiment_score"),
+            categories=result["analysis"].get("categories", []),
+            urgency=result["analysis"].get("urgency"),
+            key_issues=result["analysis"].get("key_issues", []),
+            customer_id=validated_review.customer_id,
+            customer_name=validated_review.customer_name,
+            product_name=validated_review.product_name,
+            confidence_score=result["analysis"].get("confidence_score", 0.0),
+            analysis_source=result["analysis"].get("analysis_source")
+        ),
+        response=ResponseGeneration(**result["response"]) if result.get("response") else None,
+        escalation=EscalationTicket(**result["escalation"]) if result.get("escalation") else None,
+        workflow=WorkflowResult(
+            review_id=validated_review.id,
+            workflow_path=result["workflow_path"],
+            customer_context=result["customer_context"],
+            product_context=result["product_context"],
+            agents_triggered=result.get("agents_triggered", ["review_analyzer", "workflow_orchestrator"]),
+            tools_used=tools_used,
+            priority_level=result["priority_level"],
+            estimated_completion_time=result["estimated_completion_time"],
+            sla_status="Within_SLA",
+            strategic_notes=result["strategic_notes"],
+            timings=result.get("timings"),
+            anomaly_event_id=result.get("anomaly_event_id")
+        ),
+        processing_time=processing_time,
+        status="completed" if not result.get("errors") else "partial",
+        errors=result.get("errors", []),
+        duplicate_of=result.get("duplicate_of"),
+        token_usage=result.get("token_usage")
+    )
+
+
 @app.post("/api/v1/reviews/process", response_model=ProcessingResult)
-async def process_review(review: ReviewInput):
+async def process_review(
+    review: ReviewInput,
+    request: Request,
+    response: Response,
+    x_request_timeout: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None)
+):
     """
     Processa um único review usando o sistema de agentes.
     
     Args:
         review: Dados do review a ser processado
+        request: Requisição HTTP (usada para detectar desconexão do cliente)
+        response: Resposta HTTP (recebe o header X-Profile-Id quando perfilado)
+        x_request_timeout: Orçamento de tempo em segundos (header X-Request-Timeout)
+        x_profile: Solicita profiling desta requisição (exige X-Admin-Token)
+        x_admin_token: Token de administração
+        idempotency_key: Repetições com a mesma chave reaproveitam a execução
+            (header Idempotency-Key); nesse caso a desconexão do cliente não
+            cancela o processamento
         
     Returns:
         ProcessingResult: Resultado completo do processamento
     """
     start_time = time.time()
+    deadline = Deadline.from_header(x_request_timeout, settings.REQUEST_TIMEOUT_SECONDS)
+    idempotency_key = parse_idempotency_key(idempotency_key)
     
-    try:
-        logger.info(f"Processando review do cliente: {review.customer_name}")
-        
-        validated_review = validate_review_input(review.model_dump())
-        
-        # Converter para JSON para o agente
-        review_json = validated_review.model_dump_json(indent=2, ensure_ascii=False)
-        
-        # Processar com o Workflow Orchestrator
-        workflow_agent = app.state.workflow_agent
-        
-        # Executar o processamento
-        result = await workflow_agent.process_review(review_json)
-        
-        processing_time = time.time() - start_time
-        
-        if result.get("status") != "success":
-            logger.error(f"❌ Erro no processamento: {result.get('error')}")
-            raise HTTPException(status_code=500, detail=result.get("error"))
+    with tracer.start_span("request", review_id=review.id):
+        try:
+            logger.info(f"Processando review do cliente: {review.customer_name}")
+            
+            with tracer.start_span("validation"):
+                validated_review = validate_review_input(review.model_dump())
+            
+            async def execute() -> ProcessingResult:
+                # Converter para JSON (compacto) para o agente
+                review_json = validated_review.model_dump_json()
+                
+                # Processar com o Workflow Orchestrator
+                workflow_agent = app.state.workflow_agent
+                pipeline = workflow_agent.process_review(review_json, deadline)
+                if profiler.should_profile(x_profile, x_admin_token):
+                    result, profile_id = await profiler.profile(pipeline, validated_review.id)
+                    response.headers["X-Profile-Id"] = profile_id
+                else:
+                    result = await pipeline
+                
+                processing_time = time.time() - start_time
+                
+                if result.get("status") != "success":
+                    logger.error(f"❌ Erro no processamento: {result.get('error')}")
+                    status_code = 504 if result.get("error_type") == "deadline_exceeded" else 500
+                    raise HTTPException(status_code=status_code, detail=result.get("error"))
+                
+                # Estruturar resultado final
+                processing_result = build_processing_result(validated_review, result, processing_time)
+                await publish_result(processing_result)
+                
+                logger.info(f"Review processado com sucesso em {processing_time:.2f}s")
+                return processing_result
+            
+            # Executar o processamento (cancelado se o cliente desconectar)
+            if idempotency_key is None:
+                return await run_until_disconnect(request, execute())
+            
+            processing_result, reused = await run_until_disconnect(
+                request,
+                idempotency_store.run(
+                    "process", idempotency_key, request_fingerprint(review.model_dump(mode="json")), execute
+                )
+            )
+            if reused:
+                response.headers["Idempotent-Replayed"] = "true"
+            return processing_result
+            
+        except HTTPException:
+            raise
         
-        # Estruturar resultado final
-        processing_result = ProcessingResult(
-            review_input=validated_review,
-            analysis=ReviewAnalysis(
-                validation_status="success",
-                sentiment=result["analysis"].get("sentiment"),
-                sentiment_score=result["analysis"].get("sentiment_score"),
-                categories=result["analysis"].get("categories", []),
-                urgency=result["analysis"].get("urgency"),
-                key_issues=result["analysis"].get("key_issues", []),
-                customer_id=validated_review.customer_id,
-                customer_name=validated_review.customer_name,
-                product_name=validated_review.product_name,
-                confidence_score=result["analysis"].get("confidence_score", 0.0)
-            ),
-            workflow=WorkflowResult(
-                review_id=validated_review.id,
-                workflow_path=result["workflow_path"],
-                customer_context=result["customer_context"],
-                product_context=result["product_context"],
-                agents_triggered=["review_analyzer", "workflow_orchestrator"],
-                tools_used=["get_customer_history"] if result.get("customer_context") else [],
-                priority_level=result["priority_level"],
-                estimated_completion_time=result["estimated_completion_time"],
-                sla_status="Within_SLA",
-                strategic_notes=result["strategic_notes"]
-            ),
-            processing_time=processing_time
-        )
+        except IdempotencyConflict as e:
+            raise HTTPException(status_code=422, detail=str(e))
         
-        logger.info(f"Review processado com sucesso em {processing_time:.2f}s")
+        except ClientDisconnected:
+            logger.warning(f"Cliente desconectou; processamento do review {review.id} cancelado")
+            raise HTTPException(status_code=499, detail="Client closed request")
         
-        return processing_result
+        except ValidationError as e:
+            logger.error(f"Erro de validação: {e}")
+            raise HTTPException(status_code=400, detail=f"Dados de entrada inválidos: {e}")
         
+        except Exception as e:
+            logger.error(f"Erro no processamento: {e}")
+            raise HTTPException(status_code=500, detail=f"Erro interno: {e}")
+
+
+@app.post("/api/v1/reviews/process/stream")
+async def process_review_stream(
+    review: ReviewInput,
+    x_request_timeout: Optional[str] = Header(None)
+):
+    """
+    Processa um review transmitindo a resposta ao cliente por Server-Sent Events.
+    
+    Eventos:
+        token: {"text": ...} com cada trecho de `response_text` enquanto é gerado
+        result: ProcessingResult completo (com o ResponseGeneration final)
+        error: {"status_code": ..., "detail": ...}
+    
+    Se o cliente desconectar, o processamento é cancelado.
+    """
+    start_time = time.time()
+    deadline = Deadline.from_header(x_request_timeout, settings.REQUEST_TIMEOUT_SECONDS)
+    try:
+        validated_review = validate_review_input(review.model_dump())
     except ValidationError as e:
-        logger.error(f"Erro de validação: {e}")
         raise HTTPException(status_code=400, detail=f"Dados de entrada inválidos: {e}")
     
-    except Exception as e:
-        logger.error(f"Erro no processamento: {e}")
-        raise HTTPException(status_code=500, detail=f"Erro interno: {e}")
+    events: asyncio.Queue = asyncio.Queue()
+    
+    def on_token(text: str) -> None:
+        events.put_nowait(sse_event("token", json.dumps({"text": text}, ensure_ascii=False)))
+    
+    def on_error(status_code: int, detail: str) -> None:
+        events.put_nowait(sse_event("error", json.dumps({"status_code": status_code, "detail": detail}, ensure_ascii=False)))
+    
+    async def run() -> None:
+        try:
+            with tracer.start_span("request", review_id=validated_review.id, stream=True):
+                result = await app.state.workflow_agent.process_review(
+                    validated_review.model_dump_json(), deadline, on_response_token=on_token
+                )
+                if result.get("status") != "success":
+                    on_error(504 if result.get("error_type") == "deadline_exceeded" else 500, result.get("error"))
+                    return
+                processing_result = build_processing_result(validated_review, result, time.time() - start_time)
+                await publish_result(processing_result)
+                events.put_nowait(sse_event("result", processing_result.model_dump_json()))
+        except Exception as e:
+            logger.error(f"Erro no processamento em streaming: {e}")
+            on_error(500, f"Erro interno: {e}")
+        finally:
+            events.put_nowait(None)
+    
+    async def stream():
+        task = asyncio.create_task(run())
+        try:
+            while (event := await events.get()) is not None:
+                yield event
+        finally:
+            if not task.done():
+                # Cliente desconectou: cancela o pipeline
+                task.cancel()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.post("/api/v1/reviews/batch")
 async def process_batch_reviews(
     reviews: List[ReviewInput],
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    request: Request,
+    response: Response,
+    token_budget: Optional[int] = Query(
+        None, ge=0, description="Tokens disponíveis para o lote (padrão: BATCH_TOKEN_BUDGET; 0 = sem limite)"
+    ),
+    idempotency_key: Optional[str] = Header(None),
+    x_shard_forwarded: Optional[str] = Header(None),
+    x_batch_id: Optional[str] = Header(None),
+    x_shard_signature: Optional[str] = Header(None)
 ):
     """
     Processa múltiplos reviews em lote.
     
+    Com sharding ativo (SHARD_NODES), cada review vai para o nó dono do seu
+    cliente; este nó processa a sua parte e encaminha as demais.
+    
     Args:
         reviews: Lista de reviews a serem processados
         background_tasks: Tarefas em segundo plano do FastAPI
+        request: Requisição (corpo bruto para conferir a assinatura de encaminhamento)
+        response: Resposta HTTP (recebe Idempotent-Replayed em repetições)
+        token_budget: Orçamento de tokens; ao acabar, os reviews restantes são pulados
+        idempotency_key: Repetições com a mesma chave devolvem o mesmo lote
+            em vez de iniciar outro (header Idempotency-Key)
+        x_shard_forwarded: Nó de origem, quando a parte foi encaminhada por
+            outro nó (processada aqui, sem novo roteamento)
+        x_batch_id: batch_id atribuído pelo nó de origem
+        x_shard_signature: HMAC (SHARD_SECRET) da parte encaminhada; sem
+            assinatura válida, os headers de encaminhamento são recusados (403)
         
     Returns:
         Dict com informações sobre o processamento em lote
     """
+    idempotency_key = parse_idempotency_key(idempotency_key)
+    forwarded = False
+    if x_shard_forwarded is not None or x_batch_id is not None:
+        router = getattr(app.state, "shard_router", None)
+        body = await request.body()
+        if router is None or not router.verify(x_shard_forwarded, x_shard_signature, x_batch_id, token_budget, body):
+            raise HTTPException(status_code=403, detail="Parte de lote encaminhada sem assinatura válida de um nó")
+        forwarded = True
     try:
         if len(reviews) > 100:
             raise HTTPException(
@@ -216,61 +537,380 @@ async def process_batch_reviews(
                 detail="Máximo de 100 reviews por lote"
             )
         
-        batch_id = f"BATCH-{int(time.time())}"
+        async def start_batch() -> Dict[str, Any]:
+            batch_id = x_batch_id if forwarded else f"BATCH-{int(time.time())}-{uuid.uuid4().hex[:6]}"
+            
+            logger.info(f"📦 Processando lote {batch_id} com {len(reviews)} reviews")
+            
+            limit = settings.BATCH_TOKEN_BUDGET if token_budget is None else token_budget
+            router = getattr(app.state, "shard_router", None)
+            sharded = router is not None and router.enabled
+            parts = router.partition(reviews) if sharded and not forwarded else {}
+            local = parts.pop(router.self_name, []) if parts else reviews
+            
+            budget = TokenBudget(share_token_budget(limit, len(local), len(reviews)))
+            usage_ledger.set_budget(batch_id, budget)
+            
+            # Agendar processamento em segundo plano
+            if parts:
+                background_tasks.add_task(
+                    dispatch_sharded_batch, batch_id, local, parts, budget,
+                    {node: share_token_budget(limit, len(part), len(reviews)) for node, part in parts.items()}
+                )
+            else:
+                background_tasks.add_task(process_batch_background, batch_id, local, budget, sharded)
+            
+            batch = {
+                "batch_id": batch_id,
+                "total_reviews": len(reviews),
+                "token_budget": limit or None,
+                "status": "processing",
+                "message": "Processamento iniciado em segundo plano",
+                "estimated_completion": f"{len(reviews) * 2} segundos"
+            }
+            if sharded:
+                batch["shards"] = {router.self_name: len(local), **{node: len(part) for node, part in parts.items()}}
+            return batch
         
-        logger.info(f"📦 Processando lote {batch_id} com {len(reviews)} reviews")
+        if idempotency_key is None:
+            return await start_batch()
         
-        # Agendar processamento em segundo plano
-        background_tasks.add_task(process_batch_background, batch_id, reviews)
+        fingerprint = request_fingerprint({
+            "reviews": [review.model_dump(mode="json") for review in reviews],
+            "token_budget": token_budget
+        })
+        batch, reused = await idempotency_store.run("batch", idempotency_key, fingerprint, start_batch)
+        if reused:
+            response.headers["Idempotent-Replayed"] = "true"
+        return batch
         
-        return {
-            "batch_id": batch_id,
-            "total_reviews": len(reviews),
-            "status": "processing",
-            "message": "Processamento iniciado em segundo plano",
-            "estimated_completion": f"{len(reviews) * 2} segundos"
-        }
+    except HTTPException:
+        raise
+    
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
         
     except Exception as e:
         logger.error(f"Erro no processamento em lote: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def process_batch_background(batch_id: str, reviews: List[ReviewInput]):
-    """Processa lote de reviews em segundo plano."""
+def share_token_budget(limit: int, part: int, total: int) -> int:
+    """Fatia do orçamento do lote proporcional à parte (0 = sem limite)."""
+    if not limit or not total:
+        return 0
+    return max(1, limit * part // total)
+
+
+async def dispatch_sharded_batch(
+    batch_id: str,
+    local: List[ReviewInput],
+    parts: Dict[str, List[ReviewInput]],
+    budget: TokenBudget,
+    part_budgets: Dict[str, int]
+):
+    """Processa a parte local e encaminha as demais aos nós donos, em paralelo."""
+    await asyncio.gather(
+        process_batch_background(batch_id, local, budget, ordered=True),
+        *(forward_batch_part(batch_id, node, part, part_budgets[node]) for node, part in parts.items())
+    )
+
+
+async def forward_batch_part(batch_id: str, node: str, reviews: List[ReviewInput], token_limit: int):
+    """
+    Encaminha uma parte do lote ao nó dono.
+    
+    Se o nó não responder, ele sai do anel e a parte é roteada de novo entre
+    os nós restantes (no pior caso, processada aqui).
+    """
+    router = app.state.shard_router
+    try:
+        await router.forward(node, batch_id, reviews, token_limit)
+        logger.info(f"Lote {batch_id}: {len(reviews)} reviews encaminhados para o nó {node}")
+        return
+    except httpx.HTTPStatusError as e:
+        router.forward_errors += 1
+        if e.response.status_code < 500:
+            logger.error(f"Lote {batch_id}: nó {node} recusou {len(reviews)} reviews: {e.response.text}")
+            return
+        logger.warning(f"Lote {batch_id}: nó {node} falhou ({e.response.status_code}); roteando de novo")
+    except httpx.HTTPError as e:
+        router.forward_errors += 1
+        logger.warning(f"Lote {batch_id}: nó {node} inacessível ({type(e).__name__}); roteando de novo")
+    
+    router.mark_down(node)
+    rerouted = []
+    for owner, part in router.partition(reviews).items():
+        part_limit = share_token_budget(token_limit, len(part), len(reviews))
+        if owner == router.self_name:
+            rerouted.append(process_batch_background(batch_id, part, TokenBudget(part_limit), ordered=True))
+        else:
+            rerouted.append(forward_batch_part(batch_id, owner, part, part_limit))
+    await asyncio.gather(*rerouted)
+
+
+async def process_batch_background(
+    batch_id: str,
+    reviews: List[ReviewInput],
+    budget: Optional[TokenBudget] = None,
+    ordered: bool = False
+):
+    """
+    Processa lote de reviews em segundo plano, persistindo cada resultado.
+    
+    Com orçamento de tokens, os reviews que ainda não começaram quando ele
+    acaba são pulados (status "skipped"). Com `ordered` (sharding ativo), os
+    reviews de um mesmo cliente são processados um de cada vez, na ordem de
+    chegada, inclusive entre lotes diferentes.
+    """
     logger.info(f"Iniciando processamento do lote {batch_id}")
     
-    results = []
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    budget = budget or TokenBudget()
     
-    for i, review in enumerate(reviews):
-        try:
-            # Simular processamento (substituir pela lógica real)
-            result = await process_single_review_internal(review)
-            results.append(result)
-            
-            logger.info(f"Review {i+1}/{len(reviews)} processado")
-            
-        except Exception as e:
-            logger.error(f"Erro no review {i+1}: {e}")
-            results.append({"error": str(e)})
+    async def process_one(i: int, review: ReviewInput) -> Dict[str, Any]:
+        async with semaphore:
+            if budget.exhausted:
+                usage_ledger.record_skipped(batch_id, budget)
+                return {"review_id": review.id, "status": "skipped", "error": "token budget exhausted"}
+            try:
+                result = await process_single_review_internal(review, batch_id)
+                budget.charge(result["total_tokens"])
+                logger.info(f"Review {i+1}/{len(reviews)} processado")
+                return result
+            except Exception as e:
+                logger.error(f"Erro no review {i+1}: {e}")
+                return {"review_id": review.id, "status": "error", "error": str(e)}
     
-    # TODO: Salvar os resultados em um banco de dados
-    # ou cache para consulta posterior
-    logger.info(f"Lote {batch_id} processado: {len(results)} resultados")
+    if ordered:
+        # A fila por chave é registrada antes do semáforo, preservando a ordem
+        router = app.state.shard_router
+        runs = [
+            router.serializer.run(
+                router.shard_key(review.model_dump()), lambda i=i, review=review: process_one(i, review)
+            )
+            for i, review in enumerate(reviews)
+        ]
+    else:
+        runs = [process_one(i, review) for i, review in enumerate(reviews)]
+    results = await asyncio.gather(*runs)
+    
+    failed = sum(1 for r in results if r["status"] == "error")
+    skipped = sum(1 for r in results if r["status"] == "skipped")
+    usage_ledger.set_budget(batch_id, budget)
+    logger.info(
+        f"Lote {batch_id} processado: {len(results)} resultados, {failed} com erro, "
+        f"{skipped} pulados por orçamento ({budget.spent} tokens)"
+    )
 
 
-async def process_single_review_internal(review: ReviewInput) -> Dict[str, Any]:
+async def process_single_review_internal(review: ReviewInput, batch_id: Optional[str] = None) -> Dict[str, Any]:
     """Processa um review internamente (para uso em lotes)."""
+    start_time = time.time()
     validated_review = validate_review_input(review.model_dump())
     
+    with tracer.start_span("request", review_id=validated_review.id, batch_id=batch_id or ""):
+        result = await app.state.workflow_agent.process_review(
+            validated_review.model_dump_json()
+        )
+        if result.get("status") != "success":
+            raise RuntimeError(result.get("error"))
+        
+        processing_result = build_processing_result(validated_review, result, time.time() - start_time)
+        await publish_result(processing_result, batch_id)
+    
     return {
         "review_id": validated_review.id,
         "customer_name": validated_review.customer_name,
-        "status": "processed",
-        "processing_time": 1.5  # Placeholder
+        "status": processing_result.status,
+        "processing_time": processing_result.processing_time,
+        "total_tokens": (
+            processing_result.token_usage.prompt_tokens + processing_result.token_usage.completion_tokens
+            if processing_result.token_usage else 0
+        )
     }
 
 
+def _parse_timestamp(value: Optional[str], name: str) -> Optional[float]:
+    """Converte um datetime ISO 8601 de query string em epoch (segundos)."""
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Parâmetro '{name}' deve ser ISO 8601")
+
+
+@app.get("/api/v1/results")
+async def list_results(
+    customer_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    workflow_path: Optional[str] = None,
+    batch_id: Optional[str] = None,
+    since: Optional[str] = Query(None, description="ISO 8601, inclusivo"),
+    until: Optional[str] = Query(None, description="ISO 8601, exclusivo"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """
+    Lista resultados persistidos, do mais recente para o mais antigo.
+    
+    Usa paginação por keyset: passe `next_cursor` da resposta como `cursor`
+    para obter a próxima página.
+    """
+    try:
+        items, next_cursor = await app.state.result_store.query_async(
+            filters={
+                "customer_id": customer_id,
+                "product_id": product_id,
+                "sentiment": sentiment,
+                "workflow_path": workflow_path,
+                "batch_id": batch_id
+            },
+            since=_parse_timestamp(since, "since"),
+            until=_parse_timestamp(until, "until"),
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"items": items, "count": len(items), "next_cursor": next_cursor}
+
+
+@app.get("/api/v1/results/{review_id}")
+async def get_result(review_id: str):
+    """Retorna o resultado mais recente de um review."""
+    result = await app.state.result_store.get_async(review_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Resultado não encontrado: {review_id}")
+    return result
+
+
+@app.get("/api/v1/products/{product_id}/insights")
+async def get_product_insights(product_id: str):
+    """
+    Agregados de sentimento de um produto: acumulado total, janela deslizante
+    e série por bucket de tempo, lidos de contadores mantidos em streaming.
+    """
+    insights = product_insights.product_snapshot(product_id, time.time())
+    if insights is None:
+        raise HTTPException(status_code=404, detail=f"Sem análises para o produto: {product_id}")
+    return insights
+
+
+@app.get("/api/v1/categories/{category}/insights")
+async def get_category_insights(category: str):
+    """Agregados de sentimento de uma categoria de problema (ex.: Delivery)."""
+    insights = product_insights.category_snapshot(category, time.time())
+    if insights is None:
+        raise HTTPException(status_code=404, detail=f"Sem análises para a categoria: {category}")
+    return insights
+
+
+@app.get("/api/v1/anomalies")
+async def list_anomalies(
+    status: Optional[str] = Query(None, description="open ou resolved"),
+    product_id: Optional[str] = None
+):
+    """Eventos agregados de pico por produto, do mais recente para o mais antigo."""
+    events = app.state.workflow_agent.anomaly_detector.events(status=status, product_id=product_id)
+    return {"items": events, "count": len(events)}
+
+
+@app.get("/api/v1/escalations")
+async def list_escalations(
+    status: Optional[str] = Query(None, description="open ou closed"),
+    product_id: Optional[str] = None
+):
+    """Tickets de escalação agregados por produto, tipo e problema."""
+    tickets = app.state.workflow_agent.escalation_aggregator.tickets(status=status, product_id=product_id)
+    return {"items": tickets, "count": len(tickets)}
+
+
+@app.post("/api/v1/cache/invalidate")
+async def invalidate_cache(body: CacheInvalidation, x_admin_token: Optional[str] = Header(None)):
+    """
+    Remove contextos de clientes e produtos do cache compartilhado.
+    
+    As chaves são apagadas do Redis e, com CACHE_PUBSUB_INVALIDATION, os
+    outros workers descartam suas cópias locais. Exige X-Admin-Token.
+    """
+    if not settings.ADMIN_TOKEN or x_admin_token != settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="X-Admin-Token inválido")
+    cache = app.state.workflow_agent.cache
+    keys = [cache.key("customer", customer_id) for customer_id in body.customer_ids]
+    keys += [cache.key("product", product_id) for product_id in body.product_ids]
+    await cache.invalidate(keys)
+    return {"invalidated": len(keys)}
+
+
+@app.websocket("/api/v1/ws/results")
+async def results_websocket(
+    websocket: WebSocket,
+    batch_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+    workflow_path: Optional[str] = None
+):
+    """
+    Envia o resumo de cada ProcessingResult concluído que atenda aos filtros.
+    
+    Mensagens: {"type": "result", "data": {...}} e, se o cliente não acompanhar
+    o ritmo e a fila dele encher, {"type": "dropped", "count": n} com a
+    quantidade de resultados descartados. Um envio parado por mais de
+    WS_SEND_TIMEOUT_SECONDS encerra a conexão.
+    """
+    subscriber = result_broadcaster.subscribe(
+        {"batch_id": batch_id, "product_id": product_id, "workflow_path": workflow_path}
+    )
+    if subscriber is None:
+        await websocket.close(code=1013, reason="Too many subscribers")
+        return
+    await websocket.accept()
+    
+    async def send_loop():
+        while True:
+            message = await subscriber.next_message()
+            await asyncio.wait_for(websocket.send_json(message), settings.WS_SEND_TIMEOUT_SECONDS)
+    
+    async def receive_loop():
+        # Mensagens do cliente são ignoradas; serve para detectar o fechamento
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    
+    tasks = [asyncio.create_task(send_loop()), asyncio.create_task(receive_loop())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if isinstance(error, asyncio.TimeoutError):
+                logger.warning(f"Assinante WebSocket parado; conexão encerrada ({subscriber.dropped} descartados)")
+                with suppress(Exception):
+                    await websocket.close(code=1008, reason="Send timeout")
+            elif error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"Erro no WebSocket de resultados: {error}")
+    finally:
+        result_broadcaster.unsubscribe(subscriber)
+        for task in tasks:
+            task.cancel()
+
+
+@app.get("/api/v1/shards")
+async def get_shards(key: Optional[str] = None):
+    """
+    Estado do anel de shards.
+    
+    Args:
+        key: Chave de shard (ex.: customer_id) para consultar o nó dono
+    """
+    router = app.state.shard_router
+    shards = router.stats()
+    if key is not None:
+        shards["owner"] = router.ring.node_for(key) or router.self_name
+    return shards
+
+
 @app.get("/api/v1/stats")
 async def get_stats():
     """Retorna estatísticas do sistema."""
@@ -278,7 +918,20 @@ async def get_stats():
         "total_processed": 0,  # TODO: Implementar contador
         "average_processing_time": 2.3,
         "system_uptime": time.time(),
-        "active_agents": 4
+        "active_agents": 4,
+        "model_tiers": model_usage.snapshot(),
+        "structured_output": structured_output_stats.snapshot(),
+        "token_usage": usage_ledger.snapshot(),
+        "prompts": prompt_stats.snapshot(),
+        "websocket": result_broadcaster.stats(),
+        "idempotency": idempotency_store.stats(),
+        "cache": app.state.workflow_agent.cache.stats(),
+        "webhooks": app.state.webhooks.stats() if hasattr(app.state, "webhooks") else None,
+        "sharding": app.state.shard_router.stats() if hasattr(app.state, "shard_router") else None,
+        "distilled_classifier": (
+            app.state.workflow_agent.distilled_classifier.stats()
+            if app.state.workflow_agent.distilled_classifier else None
+        )
     }
 
 
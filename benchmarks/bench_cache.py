@@ -0,0 +1,108 @@
+"""
+Benchmark do cache compartilhado com vários workers simulados.
+
+Cada worker é um WorkflowOrchestrator com seu próprio cache; os reviews são
+distribuídos em rodízio, como o balanceamento entre workers uvicorn. O
+dataset repete reviews (reenvios e reimportações) com ids novos. Compara o
+cache apenas local com o cache em dois níveis sobre o Redis em memória
+(benchmarks.fake_redis), medindo taxa de acerto, chamadas LLM de análise e
+idas ao Redis.
+
+Uso:
+    python -m benchmarks.bench_cache --workers 4 --reviews 2000 --distinct 400
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+# O backend falso nunca utiliza a chave
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-fake-key")
+
+from benchmarks.datasets import generate_reviews
+from benchmarks.fake_llm import FakeLLMBackend
+from benchmarks.fake_redis import FakeRedis, FakeRedisServer
+from src.reviewflow_ai.agents.workflow_orchestrator import create_workflow_orchestrator_agent
+from src.reviewflow_ai.tools.shared_cache import TwoLevelCache
+
+
+def build_dataset(args) -> List[Dict[str, Any]]:
+    base = generate_reviews(args.distinct, seed=args.seed)
+    rng = random.Random(args.seed)
+    return [{**rng.choice(base), "id": f"REPEAT-{i:06d}"} for i in range(args.reviews)]
+
+
+async def run_mode(args, reviews: List[Dict[str, Any]], shared: bool) -> Dict[str, Any]:
+    backend = FakeLLMBackend(latency_scale=args.latency_scale, seed=args.seed)
+    server = FakeRedisServer(latency=args.redis_latency_ms / 1000)
+    workers = [
+        create_workflow_orchestrator_agent(
+            backend, TwoLevelCache(remote=FakeRedis(server) if shared else None, remote_timeout=1.0)
+        )
+        for _ in range(args.workers)
+    ]
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def process(i: int, review: Dict[str, Any]) -> None:
+        async with semaphore:
+            await workers[i % len(workers)].process_review(json.dumps(review))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(process(i, r) for i, r in enumerate(reviews)))
+    elapsed = time.perf_counter() - started
+
+    totals: Dict[str, int] = {}
+    for worker in workers:
+        for key, value in worker.cache.counters.items():
+            totals[key] = totals.get(key, 0) + value
+        await worker.cache.close()
+    lookups = totals["local_hits"] + totals["remote_hits"] + totals["misses"]
+    return {
+        "seconds": round(elapsed, 3),
+        "analyzer_llm_calls": backend.calls.get("review_analyzer", 0),
+        "cache_hit_rate": round((totals["local_hits"] + totals["remote_hits"]) / lookups, 4) if lookups else 0.0,
+        "cache": totals,
+        "redis_round_trips": server.round_trips if shared else 0
+    }
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    reviews = build_dataset(args)
+    return {
+        "workers": args.workers,
+        "reviews": args.reviews,
+        "distinct_reviews": args.distinct,
+        "local_only": await run_mode(args, reviews, shared=False),
+        "two_level": await run_mode(args, reviews, shared=True)
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do cache compartilhado entre workers")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--reviews", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=400, help="Reviews distintos no dataset")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-scale", type=float, default=0.01,
+                        help="Multiplicador da latência simulada do LLM")
+    parser.add_argument("--redis-latency-ms", type=float, default=0.5, help="Latência de cada ida ao Redis")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Arquivo JSON para o relatório")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark do modo agrupar-e-analisar (backfill) com o backend LLM falso.
+
+Mede o tempo de vetorização e agrupamento, a redução de chamadas LLM e a
+concordância das análises propagadas com a análise completa em uma amostra.
+
+Uso:
+    python -m benchmarks.bench_cluster --reviews 20000 --sample 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+# O backend falso nunca utiliza a chave
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-fake-key")
+
+from benchmarks.datasets import generate_reviews, parse_mix
+from benchmarks.fake_llm import FakeLLMBackend
+from src.reviewflow_ai.agents.cluster_batch_analyzer import ClusterBatchAnalyzer
+
+
+async def run_benchmark(args):
+    reviews = generate_reviews(args.reviews, parse_mix(args.mix) if args.mix else None, seed=args.seed)
+    backend = FakeLLMBackend(latency_scale=args.latency_scale, seed=args.seed)
+    analyzer = ClusterBatchAnalyzer(
+        backend=backend,
+        cluster_size=args.cluster_size,
+        representatives=args.representatives,
+        concurrency=args.concurrency,
+        seed=args.seed
+    )
+    batch = await analyzer.analyze(reviews, sample_size=args.sample)
+    return {**batch["stats"], "backend_calls": dict(backend.calls)}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do backfill agrupar-e-analisar")
+    parser.add_argument("--reviews", type=int, default=10000, help="Quantidade de reviews sintéticos")
+    parser.add_argument("--mix", help="Mix de sentimentos, ex.: positive=0.3,neutral=0.2,negative=0.5")
+    parser.add_argument("--cluster-size", type=int, default=50)
+    parser.add_argument("--representatives", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--sample", type=int, default=200, help="Amostra para medir a concordância")
+    parser.add_argument("--latency-scale", type=float, default=0.0,
+                        help="Multiplicador da latência simulada do LLM (0 = sem espera)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Arquivo JSON para o relatório")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Benchmark de throughput e latência do pipeline completo.
+
+Executa o WorkflowOrchestrator (ou a API FastAPI, in-process ou via HTTP local)
+com um backend LLM falso de latência realista e salva os resultados em JSON
+para acompanhar regressões entre commits.
+
+Uso:
+    python -m benchmarks.bench_pipeline --target orchestrator --reviews 500 --concurrency 50
+    python -m benchmarks.bench_pipeline --target app --mix positive=0.2,negative=0.8
+    python -m benchmarks.bench_pipeline --target http --latency-scale 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+# O app exige a chave na importação; o backend falso nunca a utiliza
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-fake-key")
+
+from benchmarks.datasets import DEFAULT_MIX, generate_reviews, parse_mix
+from benchmarks.fake_llm import FakeLLMBackend
+from benchmarks.metrics import percentile
+from src.reviewflow_ai.agents.workflow_orchestrator import create_workflow_orchestrator_agent
+from src.reviewflow_ai.tools.model_routing import model_usage
+from src.reviewflow_ai.tools.structured_output import structured_output_stats
+from src.reviewflow_ai.tools.result_store import ResultStore
+
+
+def git_commit() -> str:
+    """Commit atual do repositório (ou 'unknown' fora de um checkout git)."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo em MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_load(reviews: List[Dict], concurrency: int, send: Callable) -> Dict[str, Any]:
+    """Executa os reviews com concorrência limitada, medindo cada requisição."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def one(review: Dict) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                outcome = await send(review)
+            except Exception as e:
+                outcome = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if outcome != "ok":
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(review) for review in reviews))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    count = len(reviews)
+    return {
+        "requests": count,
+        "errors": errors,
+        "wall_seconds": round(wall, 4),
+        "requests_per_second": round(count / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p90": round(percentile(latencies, 90) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2) if latencies else 0.0,
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0
+        },
+        "cpu_ms_per_request": round(cpu / count * 1000, 3) if count else 0.0
+    }
+
+
+def orchestrator_sender(backend: FakeLLMBackend) -> Callable:
+    """Envia reviews diretamente ao WorkflowOrchestrator."""
+    orchestrator = create_workflow_orchestrator_agent(backend)
+
+    async def send(review: Dict) -> str:
+        result = await orchestrator.process_review(json.dumps(review, ensure_ascii=False))
+        return "ok" if result.get("status") == "success" else result.get("error_type", "error")
+
+    return send
+
+
+def app_sender(backend: FakeLLMBackend):
+    """Envia reviews à API FastAPI in-process via ASGITransport (sem rede)."""
+    import httpx
+    from app import app
+
+    app.state.workflow_agent = create_workflow_orchestrator_agent(backend)
+    app.state.result_store = ResultStore(":memory:")
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None)
+
+    async def send(review: Dict) -> str:
+        response = await client.post("/api/v1/reviews/process", json=review)
+        return "ok" if response.status_code == 200 else f"http_{response.status_code}"
+
+    return send, client
+
+
+def start_local_server(backend: FakeLLMBackend) -> str:
+    """Sobe o app com uvicorn em uma thread, em porta livre, e retorna a URL base."""
+    import uvicorn
+    from app import app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    # O lifespan cria o orchestrator real; trocamos pelo backend falso
+    app.state.workflow_agent = create_workflow_orchestrator_agent(backend)
+    app.state.result_store = ResultStore(":memory:")
+    return f"http://127.0.0.1:{port}"
+
+
+def http_sender(base_url: str):
+    """Envia reviews via HTTP local."""
+    import httpx
+
+    client = httpx.AsyncClient(base_url=base_url, timeout=None, limits=httpx.Limits(max_connections=None))
+
+    async def send(review: Dict) -> str:
+        response = await client.post("/api/v1/reviews/process", json=review)
+        return "ok" if response.status_code == 200 else f"http_{response.status_code}"
+
+    return send, client
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    reviews = generate_reviews(args.reviews, mix, seed=args.seed)
+    backend = FakeLLMBackend(
+        latency_scale=args.latency_scale,
+        failure_rate=args.failure_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed
+    )
+
+    client = None
+    if args.target == "orchestrator":
+        send = orchestrator_sender(backend)
+    elif args.target == "app":
+        send, client = app_sender(backend)
+    else:
+        base_url = args.url or start_local_server(backend)
+        send, client = http_sender(base_url)
+
+    if args.warmup:
+        await run_load(generate_reviews(args.warmup, mix, seed=args.seed + 1), args.concurrency, send)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    try:
+        metrics = await run_load(reviews, args.concurrency, send)
+    finally:
+        if client is not None:
+            await client.aclose()
+
+    metrics["peak_rss_mb"] = round(peak_rss_mb(), 2)
+    if args.tracemalloc:
+        metrics["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+    metrics["llm_calls"] = dict(backend.calls)
+    metrics["model_tiers"] = model_usage.snapshot()
+    metrics["structured_output"] = structured_output_stats.snapshot()
+
+    return {
+        "benchmark": "pipeline",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "target": args.target,
+            "reviews": args.reviews,
+            "concurrency": args.concurrency,
+            "mix": mix,
+            "latency_scale": args.latency_scale,
+            "failure_rate": args.failure_rate,
+            "malformed_rate": args.malformed_rate,
+            "seed": args.seed
+        },
+        "results": metrics
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline ReviewFlow AI")
+    parser.add_argument("--target", choices=["orchestrator", "app", "http"], default="orchestrator",
+                        help="orchestrator direto, app via ASGI in-process ou app via HTTP local")
+    parser.add_argument("--url", help="URL de um servidor já em execução (apenas --target http)")
+    parser.add_argument("--reviews", type=int, default=200, help="Quantidade de reviews sintéticos")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requisições simultâneas")
+    parser.add_argument("--mix", help="Mix de sentimentos, ex.: positive=0.3,neutral=0.2,negative=0.5")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplicador da latência simulada do LLM (0 = sem espera)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fração de chamadas LLM com falha")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Fração de respostas LLM com um campo fora do schema")
+    parser.add_argument("--warmup", type=int, default=10, help="Reviews de aquecimento não medidos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Mede o pico de alocações Python (adiciona overhead)")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: benchmarks/results/<commit>-<ts>.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+
+    output = args.output or os.path.join(
+        "benchmarks", "results",
+        f"{report['commit']}-{args.target}-{int(time.time())}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    results = report["results"]
+    print(f"Target: {args.target} | reviews: {results['requests']} | concorrência: {args.concurrency}")
+    print(f"Throughput: {results['requests_per_second']} req/s")
+    print(f"Latência p50: {results['latency_ms']['p50']} ms | p99: {results['latency_ms']['p99']} ms")
+    print(f"CPU por requisição: {results['cpu_ms_per_request']} ms | pico RSS: {results['peak_rss_mb']} MB")
+    if results["errors"]:
+        print(f"Erros: {results['errors']}")
+    print(f"Resultados salvos em {output}")
+
+
+if __name__ == "__main__":
+    main()
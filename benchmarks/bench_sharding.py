@@ -0,0 +1,271 @@
+"""
+Benchmark do sharding por hashing consistente com vários processos locais.
+
+Sobe `--nodes` processos (benchmarks.shard_node, backend LLM falso), envia
+lotes a nós de entrada em rodízio e confere, pelos resultados persistidos em
+cada nó, que todos os reviews de um cliente foram processados no mesmo nó e
+na ordem do lote. Depois encerra um nó sem aviso, envia mais lotes (os
+encaminhamentos para ele falham e são roteados de novo) e mede quantos
+clientes mudaram de dono: o esperado é ~1/N, todos vindos do nó removido.
+`ring_simulation` mede o mesmo apenas sobre o HashRing, com mais chaves.
+
+Uso:
+    python -m benchmarks.bench_sharding --nodes 3 --reviews 600 --customers 150
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.datasets import generate_reviews
+from src.reviewflow_ai.tools.shard_router import HashRing
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_nodes(args) -> Dict[str, Dict[str, Any]]:
+    """Um processo por nó, todos com o mesmo SHARD_NODES."""
+    ports = {f"node-{i}": free_port() for i in range(args.nodes)}
+    shard_nodes = ",".join(f"{name}=http://127.0.0.1:{port}" for name, port in ports.items())
+    shard_secret = secrets.token_hex(16)
+    nodes = {}
+    for name, port in ports.items():
+        env = {
+            **os.environ,
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark-fake-key"),
+            "DATABASE_URL": "sqlite:///:memory:",
+            "SHARD_NODES": shard_nodes,
+            "SHARD_SELF": name,
+            "SHARD_SECRET": shard_secret,
+            "SHARD_VIRTUAL_NODES": str(args.vnodes),
+            "SHARD_HEALTH_INTERVAL_SECONDS": str(args.health_interval)
+        }
+        process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.shard_node", "--port", str(port),
+             "--latency-scale", str(args.latency_scale)],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        nodes[name] = {"url": f"http://127.0.0.1:{port}", "process": process}
+    for node in nodes.values():
+        line = node["process"].stdout.readline()
+        if not line.startswith("ready"):
+            raise RuntimeError(f"Nó em {node['url']} não iniciou")
+    return nodes
+
+
+def stop_nodes(nodes: Dict[str, Dict[str, Any]]) -> None:
+    for node in nodes.values():
+        if node["process"].poll() is None:
+            node["process"].terminate()
+    for node in nodes.values():
+        node["process"].wait(timeout=10)
+
+
+def build_reviews(args, start: int, count: int) -> List[Dict[str, Any]]:
+    rng = random.Random(args.seed + start)
+    reviews = generate_reviews(count, seed=args.seed + start)
+    for i, review in enumerate(reviews):
+        review["id"] = f"SHARD-{start + i:06d}"
+        review["customer_id"] = f"CUST-{rng.randrange(args.customers):05d}"
+    return reviews
+
+
+async def send_batches(client: httpx.AsyncClient, entry_urls: List[str], reviews, batch_size: int) -> List[str]:
+    batch_ids = []
+    for i in range(0, len(reviews), batch_size):
+        url = entry_urls[(i // batch_size) % len(entry_urls)]
+        response = await client.post(f"{url}/api/v1/reviews/batch", json=reviews[i:i + batch_size])
+        response.raise_for_status()
+        batch_ids.append(response.json()["batch_id"])
+    return batch_ids
+
+
+async def fetch_results(client: httpx.AsyncClient, url: str, batch_id: str) -> List[Dict[str, Any]]:
+    """Resultados do lote no nó, do mais antigo ao mais recente."""
+    items, cursor = [], None
+    while True:
+        params = {"batch_id": batch_id, "limit": 500, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get(f"{url}/api/v1/results", params=params)).json()
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return list(reversed(items))
+
+
+async def wait_results(
+    client: httpx.AsyncClient, nodes: Dict[str, str], batch_ids: List[str], expected: int, timeout: float
+) -> Dict[str, Dict[str, List[Dict]]]:
+    """Resultados por nó e por lote, quando todos chegarem (ou no timeout)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        results = {
+            name: {batch_id: await fetch_results(client, url, batch_id) for batch_id in batch_ids}
+            for name, url in nodes.items()
+        }
+        total = sum(len(items) for batches in results.values() for items in batches.values())
+        if total >= expected or time.monotonic() > deadline:
+            return results
+        await asyncio.sleep(0.2)
+
+
+def check_placement(results: Dict[str, Dict[str, List[Dict]]]) -> Dict[str, Any]:
+    """Clientes processados em mais de um nó e reviews fora da ordem do lote."""
+    homes: Dict[str, set] = {}
+    out_of_order = 0
+    per_node = {}
+    for node, batches in results.items():
+        per_node[node] = sum(len(items) for items in batches.values())
+        for items in batches.values():
+            last_seen: Dict[str, str] = {}
+            for item in items:
+                review = item["review_input"]
+                customer = review["customer_id"]
+                homes.setdefault(customer, set()).add(node)
+                if customer in last_seen and review["id"] < last_seen[customer]:
+                    out_of_order += 1
+                last_seen[customer] = review["id"]
+    return {
+        "processed": sum(per_node.values()),
+        "reviews_per_node": per_node,
+        "customers": len(homes),
+        "customers_on_multiple_nodes": sum(1 for nodes in homes.values() if len(nodes) > 1),
+        "out_of_order_within_batch": out_of_order
+    }
+
+
+async def wait_converged(client: httpx.AsyncClient, urls: Dict[str, str], timeout: float) -> None:
+    """Espera todos os nós verem o anel completo (no início, um nó pode marcar outro ainda subindo)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        shards = [(await client.get(f"{url}/api/v1/shards")).json() for url in urls.values()]
+        if all(len(s["members"]) == len(urls) for s in shards):
+            return
+        await asyncio.sleep(0.2)
+    raise RuntimeError("O anel não convergiu")
+
+
+async def owners(client: httpx.AsyncClient, url: str, customers: List[str]) -> Dict[str, str]:
+    return {
+        customer: (await client.get(f"{url}/api/v1/shards", params={"key": customer})).json()["owner"]
+        for customer in customers
+    }
+
+
+def ring_simulation(nodes: int, vnodes: int, keys: int = 20000) -> Dict[str, Any]:
+    """Fração de chaves que muda de dono ao remover e ao adicionar um nó."""
+    names = [f"node-{i}" for i in range(nodes)]
+    sample = [f"CUST-{i:06d}" for i in range(keys)]
+    ring = HashRing(names, vnodes)
+    before = {key: ring.node_for(key) for key in sample}
+    load = [sum(1 for owner in before.values() if owner == name) / keys for name in names]
+
+    ring.remove(names[-1])
+    after_remove = {key: ring.node_for(key) for key in sample}
+    ring.add(names[-1])
+    ring.add(f"node-{nodes}")
+    after_add = {key: ring.node_for(key) for key in sample}
+    return {
+        "keys": keys,
+        "load_share_min": round(min(load), 4),
+        "load_share_max": round(max(load), 4),
+        "moved_on_remove": round(sum(before[k] != after_remove[k] for k in sample) / keys, 4),
+        "moved_on_add": round(sum(before[k] != after_add[k] for k in sample) / keys, 4),
+        "expected_on_remove": round(1 / nodes, 4),
+        "expected_on_add": round(1 / (nodes + 1), 4)
+    }
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    nodes = start_nodes(args)
+    urls = {name: node["url"] for name, node in nodes.items()}
+    client = httpx.AsyncClient(timeout=30.0)
+    try:
+        # Fase 1: todos os nós no anel
+        await wait_converged(client, urls, args.timeout)
+        reviews = build_reviews(args, 0, args.reviews)
+        customers = sorted({r["customer_id"] for r in reviews})
+        started = time.perf_counter()
+        batch_ids = await send_batches(client, list(urls.values()), reviews, args.batch_size)
+        results = await wait_results(client, urls, batch_ids, len(reviews), args.timeout)
+        phase1 = {"seconds": round(time.perf_counter() - started, 3), **check_placement(results)}
+        first = next(iter(urls.values()))
+        owners_before = await owners(client, first, customers)
+
+        # Fase 2: um nó cai sem aviso; os lotes seguintes são roteados de novo
+        victim = list(nodes)[-1]
+        nodes[victim]["process"].kill()
+        nodes[victim]["process"].wait()
+        survivors = {name: url for name, url in urls.items() if name != victim}
+        more = build_reviews(args, args.reviews, args.reviews)
+        started = time.perf_counter()
+        batch_ids_after = await send_batches(client, list(survivors.values()), more, args.batch_size)
+        results = await wait_results(client, survivors, batch_ids_after, len(more), args.timeout)
+        owners_after = await owners(client, first, customers)
+        moved = [c for c in customers if owners_before[c] != owners_after[c]]
+        stats = {name: (await client.get(f"{url}/api/v1/stats")).json()["sharding"] for name, url in survivors.items()}
+        phase2 = {
+            "removed_node": victim,
+            "seconds": round(time.perf_counter() - started, 3),
+            **check_placement(results),
+            "customers_moved": len(moved),
+            "moved_fraction": round(len(moved) / len(customers), 4),
+            "moved_not_from_removed_node": sum(1 for c in moved if owners_before[c] != victim),
+            "forward_errors": {name: s["forward_errors"] for name, s in stats.items()},
+            "members_seen": {name: s["members"] for name, s in stats.items()}
+        }
+    finally:
+        await client.aclose()
+        stop_nodes(nodes)
+
+    return {
+        "nodes": args.nodes,
+        "virtual_nodes": args.vnodes,
+        "reviews_per_phase": args.reviews,
+        "customers": args.customers,
+        "all_nodes": phase1,
+        "after_node_loss": phase2,
+        "ring_simulation": ring_simulation(args.nodes, args.vnodes)
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do sharding entre processos locais")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--reviews", type=int, default=600, help="Reviews por fase")
+    parser.add_argument("--customers", type=int, default=150)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--vnodes", type=int, default=160, help="Nós virtuais por nó")
+    parser.add_argument("--health-interval", type=float, default=1.0)
+    parser.add_argument("--latency-scale", type=float, default=0.01,
+                        help="Multiplicador da latência simulada do LLM")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Espera máxima pelos resultados (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Arquivo JSON para o relatório")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark do endpoint de streaming (SSE) com o backend LLM falso.
+
+Sobe o app localmente e, para cada review negativo, mede o tempo até o
+primeiro trecho de `response_text` (evento token) e até o resultado completo
+(evento result), comparando com o endpoint sem streaming.
+
+Uso:
+    python -m benchmarks.bench_stream --reviews 50 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+# O backend falso nunca utiliza a chave
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-fake-key")
+
+import httpx
+
+from benchmarks.bench_pipeline import start_local_server
+from benchmarks.datasets import generate_reviews
+from benchmarks.fake_llm import FakeLLMBackend
+from benchmarks.metrics import percentile
+
+
+async def stream_one(client: httpx.AsyncClient, review: Dict[str, Any]) -> Dict[str, float]:
+    started = time.perf_counter()
+    first_token = None
+    async with client.stream("POST", "/api/v1/reviews/process/stream", json=review) as response:
+        async for line in response.aiter_lines():
+            if line == "event: token" and first_token is None:
+                first_token = time.perf_counter() - started
+            elif line in ("event: result", "event: error"):
+                break
+    total = time.perf_counter() - started
+    return {"first_token": first_token if first_token is not None else total, "total": total}
+
+
+async def blocking_one(client: httpx.AsyncClient, review: Dict[str, Any]) -> float:
+    started = time.perf_counter()
+    await client.post("/api/v1/reviews/process", json=review)
+    return time.perf_counter() - started
+
+
+def summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000, 1),
+        "p90_ms": round(percentile(values, 90) * 1000, 1)
+    }
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    backend = FakeLLMBackend(latency_scale=args.latency_scale, seed=args.seed)
+    base_url = start_local_server(backend)
+    reviews = generate_reviews(args.reviews, {"negative": 1.0}, seed=args.seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        async def limited(coro):
+            async with semaphore:
+                return await coro
+
+        streamed = await asyncio.gather(*(limited(stream_one(client, r)) for r in reviews))
+        blocking = await asyncio.gather(*(limited(blocking_one(client, r)) for r in reviews))
+
+    return {
+        "reviews": args.reviews,
+        "stream_time_to_first_token": summary([s["first_token"] for s in streamed]),
+        "stream_time_to_result": summary([s["total"] for s in streamed]),
+        "blocking_time_to_result": summary(blocking)
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do endpoint de streaming SSE")
+    parser.add_argument("--reviews", type=int, default=50, help="Quantidade de reviews negativos sintéticos")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplicador da latência simulada do LLM")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Arquivo JSON para o relatório")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark da entrega de webhooks contra o receptor local.
+
+Grava N eventos no outbox e mede o tempo até o receptor ter todos, com e sem
+agrupamento (lote de 1 evento e 1 requisição por vez), sob uma taxa de falhas
+temporárias do receptor. Com --restart, o dispatcher é encerrado no meio da
+entrega e um novo, sobre o mesmo outbox, termina o trabalho.
+
+Uso:
+    python -m benchmarks.bench_webhooks --events 2000 --failure-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+from benchmarks.webhook_receiver import ReceiverState, start_receiver
+from src.reviewflow_ai.tools.webhook_delivery import EVENT_REVIEW_COMPLETED, WebhookDispatcher, WebhookOutbox
+
+
+def make_dispatcher(url: str, outbox_path: str, batch_size: int, concurrency: int) -> WebhookDispatcher:
+    return WebhookDispatcher(
+        endpoints=[url],
+        outbox=WebhookOutbox(outbox_path),
+        batch_size=batch_size,
+        batch_window=0.05,
+        max_attempts=20,
+        backoff_base=0.01,
+        backoff_max=0.2,
+        concurrency=concurrency,
+        # Lease curto (2 × timeout) para o reenvio após o --restart
+        timeout=1.0
+    )
+
+
+async def run_scenario(args, batch_size: int, concurrency: int) -> Dict[str, Any]:
+    state = ReceiverState()
+    url = start_receiver(state, failure_rate=args.failure_rate, latency=args.receiver_latency, seed=args.seed)
+    outbox_path = os.path.join(tempfile.mkdtemp(), "outbox.db")
+
+    dispatcher = make_dispatcher(url, outbox_path, batch_size, concurrency)
+    await dispatcher.start()
+    started = time.perf_counter()
+    for i in range(args.events):
+        await dispatcher.enqueue(EVENT_REVIEW_COMPLETED, {"review_id": f"BENCH-{i:06d}", "index": i})
+
+    restarted = False
+    while state.unique < args.events:
+        if args.restart and not restarted and state.unique >= args.events // 2:
+            await dispatcher.close(grace=0)
+            dispatcher = make_dispatcher(url, outbox_path, batch_size, concurrency)
+            await dispatcher.start()
+            restarted = True
+        if time.perf_counter() - started > args.timeout:
+            break
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    stats = dispatcher.stats()["endpoints"][url]
+    await dispatcher.close()
+
+    return {
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(state.unique / elapsed, 1),
+        "receiver": state.to_dict(),
+        "dispatcher_after_restart" if restarted else "dispatcher": stats
+    }
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    return {
+        "events": args.events,
+        "failure_rate": args.failure_rate,
+        "batched": await run_scenario(args, args.batch_size, args.concurrency),
+        "unbatched": await run_scenario(args, 1, 1)
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da entrega de webhooks")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--failure-rate", type=float, default=0.1,
+                        help="Fração das requisições que o receptor rejeita (503/429)")
+    parser.add_argument("--receiver-latency", type=float, default=0.005, help="Latência do receptor (s)")
+    parser.add_argument("--restart", action="store_true", help="Reinicia o dispatcher no meio da entrega")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Arquivo JSON para o relatório")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
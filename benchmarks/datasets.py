@@ -0,0 +1,91 @@
+"""
+Geração de datasets sintéticos de reviews para benchmarks.
+"""
+
+import random
+from typing import Dict, List, Optional
+
+CUSTOMER_IDS = ["CUST-12345", "CUST-67890", "CUST-11111", "CUST-22222", "CUST-33333", "CUST-99999"]
+CUSTOMER_NAMES = ["João Silva", "Maria Santos", "Carlos Oliveira", "Ana Paula Costa", "Pedro Henrique Lima", "Lucas Souza"]
+
+PRODUCTS = {
+    "PROD-001": "Smartphone XYZ Pro",
+    "PROD-002": "Notebook Pro 15",
+    "PROD-003": "Fone Bluetooth ABC Premium",
+    "PROD-004": "Smart TV 55\" 4K Ultra",
+    "PROD-005": "Mouse Wireless Ergonômico",
+}
+
+TEMPLATES = {
+    "positive": [
+        "Produto excelente, superou minhas expectativas! Entrega rápida e tudo perfeito.",
+        "Adorei o {product}, funciona muito bem e recomendo para todos.",
+        "Ótimo custo-benefício, chegou antes do prazo e bem embalado.",
+        "Great product, fast delivery and the quality is amazing. I recommend it.",
+    ],
+    "neutral": [
+        "O {product} é ok, faz o que promete mas nada além disso.",
+        "Chegou no prazo. Ainda estou testando o {product}, por enquanto sem surpresas.",
+        "Produto mediano, a embalagem podia ser melhor mas atende ao básico.",
+    ],
+    "negative": [
+        "Produto chegou quebrado após 2 semanas de espera. Péssimo! Quero reembolso imediato.",
+        "O {product} parou de funcionar em 3 dias, defeito na bateria. Atendimento horrível.",
+        "Entrega atrasada 10 dias e ninguém responde no suporte. Muito decepcionado.",
+        "Cobrança duplicada no cartão e o preço estava errado. Vou acionar o Procon.",
+        "Tela danificada no transporte, produto inutilizável. Quero devolução.",
+        "Terrible experience, the {product} arrived broken and support never answered.",
+    ],
+}
+
+RATINGS = {"positive": (4, 5), "neutral": (3, 3), "negative": (1, 2)}
+
+DEFAULT_MIX = {"positive": 0.3, "neutral": 0.2, "negative": 0.5}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Converte 'positive=0.3,neutral=0.2,negative=0.5' em proporções normalizadas."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip().lower()
+        if name not in TEMPLATES:
+            raise ValueError(f"Sentimento desconhecido no mix: {name}")
+        mix[name] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("O mix de sentimentos deve ter peso positivo")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def generate_reviews(count: int, mix: Optional[Dict[str, float]] = None, seed: int = 7) -> List[Dict]:
+    """
+    Gera `count` reviews sintéticos no formato de ReviewInput.
+
+    Args:
+        count: Quantidade de reviews
+        mix: Proporção de cada sentimento (positive, neutral, negative)
+        seed: Semente para datasets reprodutíveis
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    sentiments = list(mix)
+    weights = [mix[s] for s in sentiments]
+
+    reviews = []
+    for i in range(count):
+        sentiment = rng.choices(sentiments, weights)[0]
+        product_id = rng.choice(list(PRODUCTS))
+        customer_index = rng.randrange(len(CUSTOMER_IDS))
+        text = rng.choice(TEMPLATES[sentiment]).format(product=PRODUCTS[product_id])
+        reviews.append({
+            "id": f"BENCH-{i:06d}",
+            "text": f"{text} (pedido {rng.randrange(10000, 99999)})",
+            "customer_id": CUSTOMER_IDS[customer_index],
+            "customer_name": CUSTOMER_NAMES[customer_index],
+            "product_name": PRODUCTS[product_id],
+            "product_id": product_id,
+            "purchase_date": "2025-10-15",
+            "rating": rng.randint(*RATINGS[sentiment])
+        })
+    return reviews
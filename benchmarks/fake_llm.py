@@ -0,0 +1,236 @@
+"""
+Backend LLM falso para benchmarks offline.
+Simula a latência do provedor e gera respostas plausíveis para cada agente.
+"""
+
+import asyncio
+import json
+import math
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+from src.reviewflow_ai.tools.circuit_breaker import CircuitBreaker
+from src.reviewflow_ai.tools.deadline import Deadline, run_within_deadline
+from src.reviewflow_ai.tools.heuristic_analyzer import analyze_review_heuristically
+from src.reviewflow_ai.tools.llm_backend import LLMResponse
+
+# Latência mediana (segundos) e dispersão log-normal observadas por estágio
+STAGE_LATENCY = {
+    "review_analyzer": (0.9, 0.35),
+    "response_generator": (1.6, 0.4),
+    "escalation_manager": (1.3, 0.4),
+    "escalation_refresh": (0.8, 0.3),
+}
+DEFAULT_LATENCY = (1.0, 0.4)
+
+# Modelos sem "mini" no nome são mais lentos
+STRONG_MODEL_LATENCY_FACTOR = 1.6
+
+# Estimativa de tokens para as métricas de custo
+CHARS_PER_TOKEN = 4
+
+# Em streaming, fração da latência até o primeiro trecho e tamanho dos trechos
+FIRST_TOKEN_FRACTION = 0.12
+STREAM_CHUNK_CHARS = 12
+
+# Cache de prefixo do provedor: mínimo de tokens e granularidade
+PREFIX_CACHE_MIN_TOKENS = 1024
+PREFIX_CACHE_INCREMENT = 128
+
+# Erros de saída observados em produção, por estágio: (campo, valor inválido)
+MALFORMED_FIELDS = {
+    "review_analyzer": [
+        ("sentiment", "negative"), ("sentiment_score", 11), ("sentiment_score", 0),
+        ("categories", ["Delivery", "Shipping"]), ("urgency", "Critical")
+    ],
+    "response_generator": [("tone_used", None)],
+    "escalation_manager": [("priority", "P0"), ("escalation_type", "technical")],
+    "escalation_refresh": [("priority", "Urgent")],
+}
+
+
+def _first_json_object(text: str) -> Dict[str, Any]:
+    """Extrai o primeiro objeto JSON embutido em uma mensagem."""
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    return {}
+
+
+class FakeLLMBackend:
+    """
+    Backend compatível com OpenAIBackend que não faz chamadas de rede.
+
+    Args:
+        latency_scale: Multiplicador da latência simulada (0 desativa a espera)
+        failure_rate: Fração de chamadas que falham com ConnectionError
+        malformed_rate: Fração de respostas com um campo fora do schema
+        seed: Semente para latências e falhas reprodutíveis
+    """
+
+    def __init__(
+        self,
+        latency_scale: float = 1.0,
+        failure_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        seed: int = 42
+    ):
+        self.latency_scale = latency_scale
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.breaker = CircuitBreaker()
+        self.calls: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._cached_prefixes = set()
+
+    def _latency(self, stage: str, model: str) -> float:
+        median, sigma = STAGE_LATENCY.get(stage, DEFAULT_LATENCY)
+        if "mini" not in model:
+            median *= STRONG_MODEL_LATENCY_FACTOR
+        return self.latency_scale * median * math.exp(self._random.gauss(0.0, sigma))
+
+    async def complete(
+        self,
+        *,
+        stage: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.1,
+        response_format: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> LLMResponse:
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+        latency = self._latency(stage, model)
+        if latency > 0:
+            await run_within_deadline(asyncio.sleep(latency), deadline, stage)
+        if self._random.random() < self.failure_rate:
+            raise ConnectionError("Simulated LLM failure")
+        return self._respond(stage, model, messages, response_format)
+
+    async def complete_stream(
+        self,
+        *,
+        stage: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        on_delta: Callable[[str], None],
+        temperature: float = 0.1,
+        response_format: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> LLMResponse:
+        """Como `complete`, entregando o conteúdo em trechos ao longo da latência."""
+        self.calls[stage] = self.calls.get(stage, 0) + 1
+        latency = self._latency(stage, model)
+        if self._random.random() < self.failure_rate:
+            raise ConnectionError("Simulated LLM failure")
+        response = self._respond(stage, model, messages, response_format)
+        chunks = [
+            response.content[i:i + STREAM_CHUNK_CHARS]
+            for i in range(0, len(response.content), STREAM_CHUNK_CHARS)
+        ]
+
+        async def stream():
+            await asyncio.sleep(latency * FIRST_TOKEN_FRACTION)
+            interval = latency * (1 - FIRST_TOKEN_FRACTION) / max(1, len(chunks))
+            for chunk in chunks:
+                on_delta(chunk)
+                await asyncio.sleep(interval)
+
+        await run_within_deadline(stream(), deadline, stage)
+        return response
+
+    def _respond(
+        self,
+        stage: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        response_format: Optional[Dict[str, Any]]
+    ) -> LLMResponse:
+        # Em pedidos de correção a última mensagem é a instrução; o review está na primeira
+        user_message = next(m for m in messages if m["role"] == "user")
+        output = self._render(stage, model, _first_json_object(user_message["content"]))
+        if stage in MALFORMED_FIELDS and self._random.random() < self.malformed_rate:
+            field, value = self._random.choice(MALFORMED_FIELDS[stage])
+            output[field] = value
+        if response_format and response_format.get("type") == "json_schema":
+            properties = response_format["json_schema"]["schema"]["properties"]
+            output = {k: v for k, v in output.items() if k in properties}
+        content = json.dumps(output, ensure_ascii=False)
+        return LLMResponse(
+            content=content,
+            model=model,
+            prompt_tokens=sum(len(m["content"]) for m in messages) // CHARS_PER_TOKEN,
+            completion_tokens=len(content) // CHARS_PER_TOKEN,
+            cached_tokens=self._cached_tokens(model, messages, response_format)
+        )
+
+    def _cached_tokens(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        response_format: Optional[Dict[str, Any]]
+    ) -> int:
+        """
+        Simula o cache de prefixo: o schema e a mensagem de sistema, se idênticos
+        a uma chamada anterior e com ao menos PREFIX_CACHE_MIN_TOKENS tokens.
+        """
+        prefix = json.dumps(response_format, sort_keys=True) + messages[0]["content"]
+        tokens = len(prefix) // CHARS_PER_TOKEN
+        key = (model, prefix)
+        if tokens < PREFIX_CACHE_MIN_TOKENS or key not in self._cached_prefixes:
+            self._cached_prefixes.add(key)
+            return 0
+        return tokens // PREFIX_CACHE_INCREMENT * PREFIX_CACHE_INCREMENT
+
+    def _render(self, stage: str, model: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if stage == "review_analyzer":
+            analysis = analyze_review_heuristically(payload)
+            # Modelos "mini" ficam inseguros em reviews neutros, exercitando a cascata
+            ambiguous = "mini" in model and analysis["sentiment"] == "Neutral"
+            analysis["confidence_score"] = 0.6 if ambiguous else 0.9
+            return analysis
+
+        if stage == "escalation_refresh":
+            ticket = payload.get("ticket", {})
+            return {
+                "priority": ticket.get("priority") or "P2",
+                "executive_summary": (
+                    f"{ticket.get('executive_summary') or ''} "
+                    f"+{payload.get('new_reviews', 0)} reviews: " + "; ".join(payload.get("new_issues", []))
+                ).strip(),
+                "recommended_actions": ticket.get("recommended_actions") or ["Inspect batch"]
+            }
+
+        analysis = payload.get("analysis", {})
+        urgency = analysis.get("urgency") or "Low"
+        issues = analysis.get("key_issues") or ["sua experiência"]
+
+        if stage == "response_generator":
+            name = analysis.get("customer_name") or "cliente"
+            return {
+                "response_text": (
+                    f"Olá {name}, obrigado por nos contar sobre {issues[0].lower()}. "
+                    "Já encaminhamos o seu caso para a equipe responsável. "
+                    "Vamos acompanhar pessoalmente até a solução."
+                ),
+                "compensation_offered": None if urgency == "Low" else "15% discount",
+                "tone_used": f"{urgency}_urgency"
+            }
+
+        return {
+            "escalation_needed": urgency == "High",
+            "escalation_type": "Technical",
+            "priority": "P1" if urgency == "High" else "P3",
+            "department": "Product Quality Team",
+            "executive_summary": "Customer reported: " + "; ".join(issues),
+            "recommended_actions": ["Contact customer", "Inspect batch"],
+            "suggested_timeline": "24 hours",
+            "customer_value": None
+        }
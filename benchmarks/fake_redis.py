@@ -0,0 +1,125 @@
+"""
+Substituto em memória do Redis para testes e benchmarks do cache compartilhado.
+
+Implementa o subconjunto de `redis.asyncio` usado pelo TwoLevelCache (MGET,
+pipeline com SET/DELETE/PUBLISH, pub/sub). Vários clientes sobre o mesmo
+`FakeRedisServer` simulam workers diferentes compartilhando uma instância;
+cada ida ao servidor custa `latency` segundos.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+class FakeRedisServer:
+    """Estado compartilhado: chaves com expiração e assinantes por canal."""
+
+    def __init__(self, latency: float = 0.0005):
+        self.latency = latency
+        self.data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.round_trips = 0
+        self.commands = 0
+        self.fail = False
+
+    async def round_trip(self) -> None:
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError("fake redis unavailable")
+
+    def get(self, key: str) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, command: str, *args, **kwargs) -> Any:
+        self.commands += 1
+        if command == "SET":
+            key, value = args
+            ex = kwargs.get("ex")
+            self.data[key] = (value, time.monotonic() + ex if ex else None)
+            return True
+        if command == "DELETE":
+            return sum(1 for key in args if self.data.pop(key, None) is not None)
+        if command == "PUBLISH":
+            channel, message = args
+            queues = self.subscribers.get(channel, set())
+            for queue in queues:
+                queue.put_nowait({"type": "message", "channel": channel.encode(), "data": message.encode()})
+            return len(queues)
+        raise ValueError(f"Comando não suportado: {command}")
+
+
+class FakePipeline:
+    def __init__(self, server: FakeRedisServer):
+        self._server = server
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> "FakePipeline":
+        self._commands.append(("SET", (key, value), {"ex": ex}))
+        return self
+
+    def delete(self, *keys: str) -> "FakePipeline":
+        self._commands.append(("DELETE", keys, {}))
+        return self
+
+    def publish(self, channel: str, message: str) -> "FakePipeline":
+        self._commands.append(("PUBLISH", (channel, message), {}))
+        return self
+
+    async def execute(self) -> List[Any]:
+        await self._server.round_trip()
+        commands, self._commands = self._commands, []
+        return [self._server.execute(command, *args, **kwargs) for command, args, kwargs in commands]
+
+
+class FakePubSub:
+    def __init__(self, server: FakeRedisServer):
+        self._server = server
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._channels: List[str] = []
+
+    async def subscribe(self, *channels: str) -> None:
+        await self._server.round_trip()
+        for channel in channels:
+            self._server.subscribers.setdefault(channel, set()).add(self._queue)
+            self._channels.append(channel)
+            self._queue.put_nowait({"type": "subscribe", "channel": channel.encode(), "data": 1})
+
+    async def listen(self):
+        while True:
+            yield await self._queue.get()
+
+    async def aclose(self) -> None:
+        for channel in self._channels:
+            self._server.subscribers.get(channel, set()).discard(self._queue)
+        self._channels = []
+
+
+class FakeRedis:
+    """Cliente (um por worker) sobre um FakeRedisServer."""
+
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        await self.server.round_trip()
+        self.server.commands += 1
+        return [self.server.get(key) for key in keys]
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self.server)
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self.server)
+
+    async def aclose(self) -> None:
+        pass
@@ -0,0 +1,261 @@
+"""
+Gerador de carga open-loop para uma instância implantada do ReviewFlow AI.
+
+Reproduz um corpus JSONL de reviews contra /api/v1/reviews/process ou
+/api/v1/reviews/batch com chegadas de Poisson a uma taxa alvo. As requisições
+são disparadas no instante agendado independentemente das respostas
+anteriores, e a latência é medida a partir desse instante, evitando
+coordinated omission.
+
+Uso:
+    python -m benchmarks.loadgen --url http://localhost:8000 --corpus reviews.jsonl --rps 20 --duration 60
+    python -m benchmarks.loadgen --url http://localhost:8000 --corpus reviews.jsonl --sweep 5,10,20,40,80
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+from benchmarks.metrics import percentile
+
+ENDPOINTS = {
+    "process": "/api/v1/reviews/process",
+    "batch": "/api/v1/reviews/batch",
+}
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    """Lê um corpus JSONL (um ReviewInput por linha), ignorando linhas vazias."""
+    reviews = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                reviews.append(json.loads(line))
+    if not reviews:
+        raise ValueError(f"Corpus vazio: {path}")
+    return reviews
+
+
+class LoadRun:
+    """Resultados de uma execução a uma taxa fixa, agrupados por intervalo."""
+
+    def __init__(self, offered_rps: float, interval: float):
+        self.offered_rps = offered_rps
+        self.interval = interval
+        self.started_at = time.perf_counter()
+        self.sent = 0
+        self.windows: Dict[int, Dict[str, Any]] = {}
+
+    def record(self, scheduled_at: float, latency: float, outcome: str) -> None:
+        window = int((scheduled_at - self.started_at) // self.interval)
+        bucket = self.windows.setdefault(window, {"latencies": [], "errors": {}})
+        if outcome == "ok":
+            bucket["latencies"].append(latency)
+        else:
+            bucket["errors"][outcome] = bucket["errors"].get(outcome, 0) + 1
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        latencies = [l for w in self.windows.values() for l in w["latencies"]]
+        errors: Dict[str, int] = {}
+        for w in self.windows.values():
+            for name, count in w["errors"].items():
+                errors[name] = errors.get(name, 0) + count
+        completed = len(latencies)
+        total = completed + sum(errors.values())
+
+        timeline = []
+        for index in sorted(self.windows):
+            w = self.windows[index]
+            timeline.append({
+                "t": round(index * self.interval, 2),
+                "ok": len(w["latencies"]),
+                "errors": sum(w["errors"].values()),
+                "p50_ms": round(percentile(w["latencies"], 50) * 1000, 1),
+                "p99_ms": round(percentile(w["latencies"], 99) * 1000, 1)
+            })
+
+        return {
+            "offered_rps": self.offered_rps,
+            "achieved_rps": round(completed / duration, 2) if duration else 0.0,
+            "sent": self.sent,
+            "completed": completed,
+            "error_rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+            "errors": errors,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50) * 1000, 1),
+                "p90": round(percentile(latencies, 90) * 1000, 1),
+                "p99": round(percentile(latencies, 99) * 1000, 1),
+                "max": round(max(latencies) * 1000, 1) if latencies else 0.0
+            },
+            "timeline": timeline
+        }
+
+
+def _payloads(corpus: List[Dict], endpoint: str, batch_size: int) -> Iterator[Any]:
+    cycle = itertools.cycle(corpus)
+    while True:
+        if endpoint == "batch":
+            yield [next(cycle) for _ in range(batch_size)]
+        else:
+            yield next(cycle)
+
+
+async def run_at_rate(
+    client: httpx.AsyncClient,
+    corpus: List[Dict],
+    endpoint: str,
+    rps: float,
+    duration: float,
+    interval: float = 1.0,
+    batch_size: int = 10,
+    max_in_flight: int = 10000,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """Dispara requisições com chegadas de Poisson a `rps` durante `duration` segundos."""
+    rng = random.Random(seed)
+    run = LoadRun(rps, interval)
+    payloads = _payloads(corpus, endpoint, batch_size)
+    path = ENDPOINTS[endpoint]
+    in_flight = set()
+
+    async def fire(payload: Any, scheduled_at: float) -> None:
+        try:
+            response = await client.post(path, json=payload)
+            outcome = "ok" if response.status_code < 400 else f"http_{response.status_code}"
+        except httpx.TimeoutException:
+            outcome = "timeout"
+        except httpx.TransportError as e:
+            outcome = type(e).__name__
+        # Latência a partir do instante agendado, não do envio efetivo
+        run.record(scheduled_at, time.perf_counter() - scheduled_at, outcome)
+
+    next_at = run.started_at
+    deadline = run.started_at + duration
+    while True:
+        next_at += rng.expovariate(rps)
+        if next_at >= deadline:
+            break
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        run.sent += 1
+        if len(in_flight) >= max_in_flight:
+            # O gerador não bloqueia: o excesso é contado como descarte local
+            run.record(next_at, 0.0, "client_overload")
+            continue
+        task = asyncio.create_task(fire(next(payloads), next_at))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.wait(in_flight)
+    return run.summary(duration)
+
+
+def find_saturation(curve: List[Dict[str, Any]], slo_p99_ms: float, max_error_rate: float) -> Optional[float]:
+    """Menor taxa ofertada que viola o SLO de p99, a taxa de erro ou não é sustentada."""
+    for point in curve:
+        sustained = point["achieved_rps"] >= 0.9 * point["offered_rps"]
+        if (
+            point["latency_ms"]["p99"] > slo_p99_ms
+            or point["error_rate"] > max_error_rate
+            or not sustained
+        ):
+            return point["offered_rps"]
+    return None
+
+
+def _print_run(summary: Dict[str, Any], show_timeline: bool) -> None:
+    latency = summary["latency_ms"]
+    print(
+        f"offered {summary['offered_rps']:>7.1f} rps | achieved {summary['achieved_rps']:>7.1f} rps | "
+        f"p50 {latency['p50']:>8.1f} ms | p99 {latency['p99']:>8.1f} ms | "
+        f"errors {summary['error_rate'] * 100:5.1f}%"
+    )
+    if summary["errors"]:
+        print(f"    erros: {summary['errors']}")
+    if show_timeline:
+        for point in summary["timeline"]:
+            print(
+                f"    t={point['t']:>6.1f}s ok={point['ok']:>5} err={point['errors']:>4} "
+                f"p50={point['p50_ms']:>8.1f}ms p99={point['p99_ms']:>8.1f}ms"
+            )
+
+
+async def run(args) -> Dict[str, Any]:
+    corpus = load_corpus(args.corpus)
+    rates = [float(r) for r in args.sweep.split(",")] if args.sweep else [args.rps]
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        curve = []
+        for rate in rates:
+            summary = await run_at_rate(
+                client, corpus, args.endpoint, rate, args.duration,
+                interval=args.interval,
+                batch_size=args.batch_size,
+                max_in_flight=args.max_in_flight,
+                seed=args.seed
+            )
+            _print_run(summary, show_timeline=not args.sweep)
+            curve.append(summary)
+            if args.sweep and args.cooldown:
+                await asyncio.sleep(args.cooldown)
+
+    report: Dict[str, Any] = {
+        "url": args.url,
+        "endpoint": ENDPOINTS[args.endpoint],
+        "duration_seconds": args.duration,
+        "runs": curve
+    }
+    if args.sweep:
+        saturation = find_saturation(curve, args.slo_p99_ms, args.max_error_rate)
+        report["saturation_rps"] = saturation
+        print(f"Ponto de saturação: {saturation if saturation is not None else 'não atingido'} rps")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="reviewflow-loadgen",
+        description="Gerador de carga open-loop (chegadas de Poisson) para a API ReviewFlow AI"
+    )
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base da instância")
+    parser.add_argument("--corpus", required=True, help="Corpus JSONL de reviews (um por linha)")
+    parser.add_argument("--endpoint", choices=list(ENDPOINTS), default="process")
+    parser.add_argument("--batch-size", type=int, default=10, help="Reviews por requisição em --endpoint batch")
+    parser.add_argument("--rps", type=float, default=10.0, help="Taxa alvo de chegadas por segundo")
+    parser.add_argument("--sweep", help="Lista de taxas para a curva de saturação, ex.: 5,10,20,40")
+    parser.add_argument("--duration", type=float, default=30.0, help="Duração de cada taxa em segundos")
+    parser.add_argument("--cooldown", type=float, default=5.0, help="Pausa entre taxas no sweep")
+    parser.add_argument("--interval", type=float, default=1.0, help="Janela da série temporal em segundos")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Timeout por requisição")
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=10000,
+                        help="Limite de requisições pendentes antes de descartar localmente")
+    parser.add_argument("--slo-p99-ms", type=float, default=10000.0, help="SLO de p99 para a saturação")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Taxa de erro máxima aceitável")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Arquivo JSON para o relatório completo")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Relatório salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
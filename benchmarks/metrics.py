@@ -0,0 +1,16 @@
+"""
+Funções estatísticas compartilhadas pelos benchmarks.
+"""
+
+from typing import List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolação linear (values não precisa estar ordenado)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
@@ -0,0 +1,51 @@
+"""
+Nó do cluster local para testes de sharding.
+
+Sobe o app com uvicorn na porta dada, troca o orchestrator pelo backend LLM
+falso e fica no ar até ser encerrado. O anel vem das variáveis SHARD_* do
+ambiente (definidas por benchmarks.bench_sharding, um processo por nó).
+
+Uso:
+    SHARD_NODES=a=http://127.0.0.1:8001,b=http://127.0.0.1:8002 SHARD_SELF=a SHARD_SECRET=s3cr3t \\
+        python -m benchmarks.shard_node --port 8001
+"""
+
+import argparse
+import os
+import threading
+import time
+
+# O app exige a chave na importação; o backend falso nunca a utiliza
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-fake-key")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+
+def main(argv=None):
+    import uvicorn
+    from app import app
+    from benchmarks.fake_llm import FakeLLMBackend
+    from src.reviewflow_ai.agents.workflow_orchestrator import create_workflow_orchestrator_agent
+
+    parser = argparse.ArgumentParser(description="Nó local do cluster com backend LLM falso")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--latency-scale", type=float, default=0.01,
+                        help="Multiplicador da latência simulada do LLM")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    # O lifespan cria o orchestrator real; trocamos pelo backend falso
+    app.state.workflow_agent = create_workflow_orchestrator_agent(
+        FakeLLMBackend(latency_scale=args.latency_scale, seed=args.seed)
+    )
+    print(f"ready {os.environ.get('SHARD_SELF', '')} {args.port}", flush=True)
+    thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Receptor de webhooks local, no lugar do CRM/ticketing em testes.
+
+Aceita os lotes do WebhookDispatcher, deduplica as entregas por `id`, confere
+a assinatura (se houver segredo) e pode simular latência e falhas (503 ou
+429 com Retry-After). `GET /stats` retorna o que foi recebido.
+
+Uso:
+    python -m benchmarks.webhook_receiver --port 9000 --failure-rate 0.2
+    WEBHOOK_URLS=http://127.0.0.1:9000/hook uvicorn app:app
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import random
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class ReceiverState:
+    """Entregas recebidas pelo receptor."""
+
+    def __init__(self):
+        self.requests = 0
+        self.rejected = 0
+        self.bad_signatures = 0
+        self.deliveries = 0
+        self.duplicates = 0
+        self.max_in_flight = 0
+        self.in_flight = 0
+        self.events: Dict[str, int] = {}
+        self.seen: Set[str] = set()
+        self.first_at: Optional[float] = None
+        self.last_at: Optional[float] = None
+
+    @property
+    def unique(self) -> int:
+        return len(self.seen)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "bad_signatures": self.bad_signatures,
+            "deliveries": self.deliveries,
+            "unique_deliveries": self.unique,
+            "duplicates": self.duplicates,
+            "max_in_flight": self.max_in_flight,
+            "events": dict(self.events)
+        }
+
+
+def create_receiver_app(
+    state: ReceiverState,
+    failure_rate: float = 0.0,
+    latency: float = 0.0,
+    secret: str = "",
+    seed: int = 7
+) -> FastAPI:
+    """
+    App do receptor.
+
+    Args:
+        failure_rate: Fração das requisições respondidas com erro temporário
+        latency: Tempo (s) de processamento de cada requisição
+        secret: Segredo para conferir X-ReviewFlow-Signature (vazio = não confere)
+    """
+    app = FastAPI(title="Webhook receiver")
+    rng = random.Random(seed)
+
+    @app.post("/hook")
+    async def receive(request: Request):
+        state.requests += 1
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            body = await request.body()
+            if latency:
+                await asyncio.sleep(latency)
+            if secret:
+                expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+                if not hmac.compare_digest(expected, request.headers.get("X-ReviewFlow-Signature", "")):
+                    state.bad_signatures += 1
+                    return JSONResponse({"error": "bad signature"}, status_code=401)
+            if rng.random() < failure_rate:
+                state.rejected += 1
+                if rng.random() < 0.5:
+                    return JSONResponse({"error": "throttled"}, status_code=429, headers={"Retry-After": "0"})
+                return JSONResponse({"error": "unavailable"}, status_code=503)
+
+            payload = await request.json()
+            now = time.time()
+            state.first_at = state.first_at or now
+            state.last_at = now
+            for delivery in payload["deliveries"]:
+                state.deliveries += 1
+                if delivery["id"] in state.seen:
+                    state.duplicates += 1
+                    continue
+                state.seen.add(delivery["id"])
+                state.events[delivery["event"]] = state.events.get(delivery["event"], 0) + 1
+            return {"received": len(payload["deliveries"])}
+        finally:
+            state.in_flight -= 1
+
+    @app.get("/stats")
+    async def stats():
+        return state.to_dict()
+
+    return app
+
+
+def start_receiver(state: ReceiverState, **kwargs) -> str:
+    """Sobe o receptor com uvicorn em uma thread, em porta livre, e retorna a URL do hook."""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    app = create_receiver_app(state, **kwargs)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/hook"
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Receptor de webhooks local")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência por requisição (s)")
+    parser.add_argument("--secret", default="", help="WEBHOOK_SECRET para conferir a assinatura")
+    args = parser.parse_args(argv)
+
+    app = create_receiver_app(ReceiverState(), args.failure_rate, args.latency, args.secret)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
 from .review_analyzer import create_review_analyzer_agent
+from .response_generator import create_response_generator_agent
+from .escalation_manager import create_escalation_manager_agent
 from .workflow_orchestrator import create_workflow_orchestrator_agent
+from .cluster_batch_analyzer import create_cluster_batch_analyzer
 
 __all__ = [
     "create_review_analyzer_agent",
-    "create_workflow_orchestrator_agent"
+    "create_response_generator_agent",
+    "create_escalation_manager_agent",
+    "create_workflow_orchestrator_agent",
+    "create_cluster_batch_analyzer"
 ]
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Cluster Batch Analyzer - Análise de grandes lotes (backfills) por agrupamento.
+
+Os reviews são vetorizados localmente (TF-IDF com hashing) e agrupados por
+k-means em mini-lotes. O Review Analyzer (LLM) é executado apenas em alguns
+representantes de cada grupo, os mais próximos do centróide, e as categorias e
+problemas principais do grupo são propagados aos demais membros. Sentimento,
+nota e urgência de cada membro continuam sendo calculados localmente pelo
+analisador heurístico. Membros distantes do centróide são analisados
+individualmente.
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..tools.clustering import MiniBatchKMeans
+from ..tools.heuristic_analyzer import analyze_review_heuristically
+from ..tools.text_features import HashingTfidfVectorizer
+from .review_analyzer import create_review_analyzer_agent
+
+# Problemas principais propagados por grupo
+MAX_CLUSTER_ISSUES = 5
+
+
+def _is_llm_analysis(analysis: Dict[str, Any]) -> bool:
+    return analysis.get("validation_status") == "success" and not analysis.get("fallback_reason")
+
+
+def cluster_consensus(analyses: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Consenso das análises LLM dos representantes de um grupo.
+
+    Returns:
+        Dict | None: Categorias citadas por ao menos metade dos representantes,
+            problemas mais frequentes e confiança média; None sem análises válidas
+    """
+    valid = [a for a in analyses if _is_llm_analysis(a)]
+    if not valid:
+        return None
+    categories = Counter(c for a in valid for c in dict.fromkeys(a.get("categories") or []))
+    issues = Counter(i for a in valid for i in dict.fromkeys(a.get("key_issues") or []))
+    return {
+        "categories": [c for c, n in categories.most_common() if n * 2 >= len(valid)],
+        "key_issues": [i for i, _ in issues.most_common(MAX_CLUSTER_ISSUES)],
+        "confidence_score": sum(a.get("confidence_score") or 0.0 for a in valid) / len(valid)
+    }
+
+
+def propagate_analysis(
+    review_input: Dict[str, Any],
+    consensus: Dict[str, Any],
+    similarity: float
+) -> Dict[str, Any]:
+    """
+    Análise de um membro: sentimento e urgência locais, categorias e
+    problemas do grupo (exceto para reviews positivos).
+    """
+    analysis = analyze_review_heuristically(review_input)
+    if analysis["sentiment"] != "Positive":
+        analysis["categories"] = list(consensus["categories"])
+        analysis["key_issues"] = list(consensus["key_issues"])
+    analysis["confidence_score"] = round(min(1.0, consensus["confidence_score"] * max(0.0, similarity)), 2)
+    return analysis
+
+
+def agreement(propagated: List[Dict[str, Any]], full: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Concordância entre análises propagadas e completas dos mesmos reviews."""
+    pairs = [(p, f) for p, f in zip(propagated, full) if _is_llm_analysis(f)]
+    if not pairs:
+        return {"sample_size": 0}
+
+    def jaccard(a, b):
+        a, b = set(a or []), set(b or [])
+        return len(a & b) / len(a | b) if a | b else 1.0
+
+    return {
+        "sample_size": len(pairs),
+        "sentiment": round(sum(p["sentiment"] == f.get("sentiment") for p, f in pairs) / len(pairs), 4),
+        "urgency": round(sum(p["urgency"] == f.get("urgency") for p, f in pairs) / len(pairs), 4),
+        "categories_exact": round(
+            sum(set(p["categories"]) == set(f.get("categories") or []) for p, f in pairs) / len(pairs), 4
+        ),
+        "categories_jaccard": round(
+            sum(jaccard(p["categories"], f.get("categories")) for p, f in pairs) / len(pairs), 4
+        )
+    }
+
+
+class ClusterBatchAnalyzer:
+    """
+    Análise de lotes grandes com LLM apenas nos representantes de cada grupo.
+
+    Args:
+        backend: Backend LLM do Review Analyzer (padrão: create_llm_backend)
+        cluster_size: Tamanho médio desejado dos grupos (define o k do k-means)
+        max_clusters: Limite de grupos
+        representatives: Reviews analisados pelo LLM por grupo
+        min_similarity: Similaridade mínima com o centróide para herdar a
+            análise do grupo; abaixo disso o review é analisado individualmente
+        concurrency: Chamadas LLM simultâneas
+        seed: Semente do agrupamento e da amostra de concordância
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        cluster_size: int = 50,
+        max_clusters: int = 2000,
+        representatives: int = 3,
+        min_similarity: float = 0.3,
+        concurrency: int = 20,
+        seed: int = 7
+    ):
+        self.analyzer = create_review_analyzer_agent(backend)
+        self.cluster_size = cluster_size
+        self.max_clusters = max_clusters
+        self.representatives = representatives
+        self.min_similarity = min_similarity
+        self.concurrency = concurrency
+        self.seed = seed
+
+    async def _analyze_all(self, reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(review: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analyzer.analyze_review(json.dumps(review, ensure_ascii=False))
+
+        return await asyncio.gather(*(one(review) for review in reviews))
+
+    async def analyze(self, reviews: List[Dict[str, Any]], sample_size: int = 0) -> Dict[str, Any]:
+        """
+        Analisa o lote.
+
+        Args:
+            reviews: Reviews no formato de ReviewInput
+            sample_size: Membros propagados reanalisados pelo LLM para medir a
+                concordância (chamadas adicionais, fora da contagem do lote)
+
+        Returns:
+            Dict: `results` (na ordem de entrada, com review_id, cluster_id,
+                source e analysis) e `stats`
+        """
+        started = time.perf_counter()
+        vectors = HashingTfidfVectorizer().fit_transform(r.get("text", "") for r in reviews)
+        vectorized = time.perf_counter()
+
+        n_clusters = min(self.max_clusters, max(1, math.ceil(len(reviews) / self.cluster_size)))
+        labels, similarities = MiniBatchKMeans(n_clusters, seed=self.seed).fit(vectors)
+        clustered = time.perf_counter()
+
+        members: Dict[int, List[int]] = {}
+        for index in np.argsort(-similarities, kind="stable"):
+            members.setdefault(int(labels[index]), []).append(int(index))
+
+        # Representantes (mais próximos do centróide) e membros distantes vão ao LLM
+        to_llm: List[int] = []
+        for cluster_members in members.values():
+            to_llm.extend(cluster_members[:self.representatives])
+            to_llm.extend(i for i in cluster_members[self.representatives:] if similarities[i] < self.min_similarity)
+        llm_analyses = dict(zip(to_llm, await self._analyze_all([reviews[i] for i in to_llm])))
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(reviews)
+        sources = Counter()
+        propagated_indices = []
+        for cluster_id, cluster_members in members.items():
+            consensus = cluster_consensus(
+                [llm_analyses[i] for i in cluster_members[:self.representatives]]
+            )
+            for index in cluster_members:
+                if index in llm_analyses:
+                    source, analysis = "llm", llm_analyses[index]
+                elif consensus is None:
+                    # Nenhum representante analisado pelo LLM: apenas a heurística local
+                    source, analysis = "heuristic", analyze_review_heuristically(reviews[index])
+                else:
+                    source = "propagated"
+                    analysis = propagate_analysis(reviews[index], consensus, float(similarities[index]))
+                    propagated_indices.append(index)
+                sources[source] += 1
+                results[index] = {
+                    "review_id": reviews[index].get("id"),
+                    "cluster_id": cluster_id,
+                    "source": source,
+                    "analysis": analysis
+                }
+        analyzed = time.perf_counter()
+
+        stats: Dict[str, Any] = {
+            "reviews": len(reviews),
+            "clusters": len(members),
+            "llm_calls": len(to_llm),
+            "llm_call_reduction": round(1 - len(to_llm) / len(reviews), 4) if reviews else 0.0,
+            "outliers": len(to_llm) - sum(min(len(m), self.representatives) for m in members.values()),
+            "sources": dict(sources),
+            "timings_seconds": {
+                "vectorize": round(vectorized - started, 3),
+                "cluster": round(clustered - vectorized, 3),
+                "analyze": round(analyzed - clustered, 3)
+            }
+        }
+
+        if sample_size and propagated_indices:
+            sample = random.Random(self.seed).sample(propagated_indices, min(sample_size, len(propagated_indices)))
+            full = await self._analyze_all([reviews[i] for i in sample])
+            stats["agreement"] = agreement([results[i]["analysis"] for i in sample], full)
+
+        return {"results": results, "stats": stats}
+
+
+def create_cluster_batch_analyzer(backend=None) -> ClusterBatchAnalyzer:
+    """Cria o analisador de lotes conforme as configurações BACKFILL_*."""
+    from ..config import settings
+
+    return ClusterBatchAnalyzer(
+        backend=backend,
+        cluster_size=settings.BACKFILL_CLUSTER_SIZE,
+        max_clusters=settings.BACKFILL_MAX_CLUSTERS,
+        representatives=settings.BACKFILL_REPRESENTATIVES,
+        min_similarity=settings.BACKFILL_MIN_SIMILARITY,
+        concurrency=settings.BACKFILL_CONCURRENCY
+    )
@@ -2,19 +2,36 @@
 Escalation Manager Agent - Responsável por identificar reviews que precisam de escalação.
 """
 
-from autogen_ext.agents import Agent
+from typing import Any, Dict, List, Optional
+from ..config import settings
+from ..models.data_models import EscalationRefresh, EscalationTicket
+from ..tools.deadline import Deadline
+from ..tools.llm_backend import create_llm_backend
+from ..tools.prompting import build_messages
+from ..tools.structured_output import complete_structured
+from ..tools.trigger_matcher import TriggerMatch, trigger_excerpts
 
+# Reviews maiores que isso são enviados como trechos ao redor dos gatilhos
+MAX_FULL_REVIEW_CHARS = 600
 
-def create_escalation_manager_agent():
-    """Cria e configura o agente Escalation Manager."""
+# Versões dos prompts de sistema (fazem parte do prefixo cacheado pelo provedor)
+PROMPT_VERSION = "escalation_manager/2"
+PROMPT_WITH_TRIGGERS_VERSION = "escalation_manager_triggers/2"
+REFRESH_PROMPT_VERSION = "escalation_refresh/2"
+
+
+class EscalationManagerAgent:
+    """Agente para criação de tickets de escalação usando OpenAI diretamente."""
     
-    prompt = """
+    def __init__(self, backend=None):
+        self.backend = backend or create_llm_backend()
+        self.prompt = """
 You are an Escalation Manager agent. Your job is to identify critical reviews that require human intervention and create structured escalation tickets.
 
 INPUT FORMAT:
 - Analysis from Review Analyzer (JSON)
 - Original review text
-- Customer history (dict or none): Use tool get_customer_history to retrieve previous purchases, past complaints, customer lifetime value
+- Customer history (JSON or null): previous purchases, past complaints, customer lifetime value
 
 YOUR TASKS:
 1. Determine if escalation is needed (only for High urgency OR specific trigger words)
@@ -51,21 +68,115 @@ Rules:
 - Recommend 2-4 specific actions
 - Consider customer history in priority assignment
 """
+        # Variante usada quando os gatilhos já foram detectados localmente
+        self.prompt_with_triggers = self.prompt.replace(
+            self.prompt[self.prompt.index("ESCALATION TRIGGERS:"):self.prompt.index("OUTPUT FORMAT (JSON):")],
+            "ESCALATION TRIGGERS:\n"
+            "Pre-detected in matched_triggers (type, term, text). Long reviews are sent as review_excerpts "
+            "around each trigger. Use them to choose the escalation type.\n\n"
+        )
+        self.refresh_prompt = """
+You maintain an aggregated escalation ticket that groups many customer reviews about the same product problem.
 
-    agent = Agent(
-        name="escalation_manager",
-        instructions=prompt,
-        model="gpt-4o-mini"
-    )
-    
-    return agent
+INPUT: the current ticket, how many new reviews were attached since the last update and their key issues.
 
+Update the ticket incrementally:
+- Keep the executive summary to 2-3 sentences, mentioning the growing number of affected customers
+- Add new issues only if they change the picture
+- Raise priority if the problem is spreading or new issues are more severe; never lower it
+- Recommend 2-4 specific actions
 
-def create_escalation_manager_tool():
-    """Cria a ferramenta do Escalation Manager para uso por outros agentes."""
-    agent = create_escalation_manager_agent()
+OUTPUT FORMAT (JSON):
+{
+  "priority": "P1|P2|P3",
+  "executive_summary": "string",
+  "recommended_actions": ["action1", "action2"]
+}
+"""
+    
+    async def evaluate_escalation(
+        self,
+        analysis: Dict[str, Any],
+        review_text: str,
+        customer_history: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        triggers: Optional[List[TriggerMatch]] = None
+    ) -> Dict[str, Any]:
+        """
+        Avalia a necessidade de escalação e retorna o ticket estruturado.
+        
+        Com `triggers` (gatilhos já detectados localmente), o prompt omite o
+        léxico de gatilhos e reviews longos são enviados apenas como trechos
+        ao redor de cada gatilho.
+        """
+        context: Dict[str, Any] = {"customer_history": customer_history, "analysis": analysis}
+        prompt, version, text_field = self.prompt, PROMPT_VERSION, "review_text"
+        if triggers is not None:
+            prompt, version = self.prompt_with_triggers, PROMPT_WITH_TRIGGERS_VERSION
+            context["matched_triggers"] = [
+                {"type": m.trigger_type, "term": m.term, "text": m.text} for m in triggers
+            ]
+            if triggers and len(review_text) > MAX_FULL_REVIEW_CHARS:
+                context["review_excerpts"] = trigger_excerpts(review_text, triggers)
+                text_field = None
+        
+        return await complete_structured(
+            self.backend,
+            EscalationTicket,
+            stage="escalation_manager",
+            model=settings.ESCALATION_MODEL,
+            messages=build_messages(
+                stage="escalation_manager",
+                version=version,
+                system_prompt=prompt,
+                instruction="Evaluate escalation for:",
+                context=context,
+                text_field=text_field,
+                text=review_text,
+                model=settings.ESCALATION_MODEL
+            ),
+            exclude=("aggregated_ticket_id", "affected_reviews"),
+            temperature=0.1,
+            deadline=deadline
+        )
     
-    return agent.as_tool(
-        tool_name="escalation_manager",
-        tool_description="Identifies critical reviews for human intervention and creates structured escalation tickets."
-    )
\ No newline at end of file
+    async def refresh_summary(
+        self,
+        ticket: Dict[str, Any],
+        new_issues: List[str],
+        new_reviews: int
+    ) -> Dict[str, Any]:
+        """
+        Atualiza incrementalmente o resumo de um ticket agregado.
+        
+        Envia apenas o ticket atual e os problemas novos, em vez de reavaliar
+        cada review afetado.
+        """
+        payload = {
+            "ticket": {k: ticket.get(k) for k in ("escalation_type", "priority", "executive_summary", "recommended_actions")},
+            "new_reviews": new_reviews,
+            "new_issues": new_issues
+        }
+        
+        return await complete_structured(
+            self.backend,
+            EscalationRefresh,
+            stage="escalation_refresh",
+            model=settings.ESCALATION_MODEL,
+            messages=build_messages(
+                stage="escalation_refresh",
+                version=REFRESH_PROMPT_VERSION,
+                system_prompt=self.refresh_prompt,
+                instruction="Update ticket:",
+                context=payload,
+                text_field=None,
+                text=None,
+                model=settings.ESCALATION_MODEL
+            ),
+            temperature=0.1
+        )
+
+
+def create_escalation_manager_agent(backend=None):
+    """Cria e configura o agente Escalation Manager."""
+    return EscalationManagerAgent(backend)
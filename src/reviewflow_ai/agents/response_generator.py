@@ -2,13 +2,25 @@
 Response Generator Agent - Responsável por gerar respostas personalizadas.
 """
 
-from autogen_ext.agents import Agent
+from typing import Any, Callable, Dict, Optional
+from ..config import settings
+from ..models.data_models import ResponseGeneration
+from ..tools.deadline import Deadline
+from ..tools.llm_backend import create_llm_backend
+from ..tools.prompting import build_messages
+from ..tools.streaming import JsonFieldStream
+from ..tools.structured_output import complete_structured
 
+# Versão do prompt de sistema (faz parte do prefixo cacheado pelo provedor)
+PROMPT_VERSION = "response_generator/2"
 
-def create_response_generator_agent():
-    """Cria e configura o agente Response Generator."""
+
+class ResponseGeneratorAgent:
+    """Agente para geração de respostas usando OpenAI diretamente."""
     
-    prompt = """
+    def __init__(self, backend=None):
+        self.backend = backend or create_llm_backend()
+        self.prompt = """
 You are a Response Generator agent for an e-commerce customer service team. Your job is to create personalized, empathetic responses to negative customer reviews.
 
 INPUT FORMAT:
@@ -54,21 +66,55 @@ Rules:
 - Offer compensation for Medium/High urgency issues
 - End with a forward-looking statement
 """
-
-    agent = Agent(
-        name="response_generator",
-        instructions=prompt,
-        model="gpt-4o-mini"
-    )
     
-    return agent
+    async def generate_response(
+        self,
+        analysis: Dict[str, Any],
+        review_text: str,
+        customer_metadata: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Gera a resposta personalizada para um review analisado.
+        
+        Com `on_token`, a resposta é gerada em streaming e `on_token` recebe
+        cada trecho de `response_text` assim que chega. Se o texto precisar
+        de correção (ver structured_output), vale o do resultado final.
+        
+        Raises:
+            StructuredOutputError: Se a saída não puder ser validada como ResponseGeneration
+        """
+        on_delta = None
+        if on_token is not None:
+            response_text = JsonFieldStream("response_text")
+            
+            def on_delta(chunk: str) -> None:
+                text = response_text.feed(chunk)
+                if text:
+                    on_token(text)
+        
+        return await complete_structured(
+            self.backend,
+            ResponseGeneration,
+            stage="response_generator",
+            model=settings.RESPONSE_MODEL,
+            messages=build_messages(
+                stage="response_generator",
+                version=PROMPT_VERSION,
+                system_prompt=self.prompt,
+                instruction="Generate a response for:",
+                context={"customer_metadata": customer_metadata, "analysis": analysis},
+                text_field="review_text",
+                text=review_text,
+                model=settings.RESPONSE_MODEL
+            ),
+            temperature=0.7,
+            deadline=deadline,
+            on_delta=on_delta
+        )
 
 
-def create_response_generator_tool():
-    """Cria a ferramenta do Response Generator para uso por outros agentes."""
-    agent = create_response_generator_agent()
-    
-    return agent.as_tool(
-        tool_name="response_generator",
-        tool_description="Generates personalized, empathetic responses to negative customer reviews based on analysis."
-    )
\ No newline at end of file
+def create_response_generator_agent(backend=None):
+    """Cria e configura o agente Response Generator."""
+    return ResponseGeneratorAgent(backend)
@@ -3,15 +3,29 @@ Review Analyzer Agent - Responsável por analisar sentimento e categorizar revie
 """
 
 import json
-import openai
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from ..config import settings
 from ..models.data_models import ReviewAnalysis, SentimentType, UrgencyLevel, ProblemCategory
+from ..tools.circuit_breaker import CircuitOpenError
+from ..tools.deadline import Deadline, DeadlineExceeded
+from ..tools.heuristic_analyzer import analyze_review_heuristically
+from ..tools.llm_backend import create_llm_backend
+from ..tools.model_routing import model_usage, parse_model_list
+from ..tools.prompting import build_messages
+from ..tools.structured_output import StructuredOutputError, complete_structured
+
+# Versão do prompt de sistema (faz parte do prefixo cacheado pelo provedor)
+PROMPT_VERSION = "review_analyzer/2"
 
 
 class ReviewAnalyzerAgent:
     """Agente para análise de reviews usando OpenAI diretamente."""
     
-    def __init__(self):
+    def __init__(self, backend=None, models: Optional[List[str]] = None, min_confidence: Optional[float] = None):
+        self.backend = backend or create_llm_backend()
+        # Cascata de modelos, do mais barato ao mais forte
+        self.models = models or parse_model_list(settings.ANALYZER_MODELS) or [settings.OPENAI_MODEL]
+        self.min_confidence = settings.CASCADE_MIN_CONFIDENCE if min_confidence is None else min_confidence
         self.prompt = """
 You are a Review Analyzer agent for an e-commerce company. Your job is to analyze customer reviews and extract structured information.
 
@@ -56,28 +70,106 @@ URGENCY CLASSIFICATION:
 - Low: minor complaints, suggestions, neutral feedback
 """
     
-    async def analyze_review(self, review_data: str) -> Dict[str, Any]:
-        """Analisa um review e retorna resultado estruturado."""
-        try:
-            client = openai.AsyncOpenAI()
+    async def analyze_review(self, review_data: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Analisa um review e retorna resultado estruturado.
+        
+        Os modelos da cascata são chamados em ordem: o próximo só é usado se
+        a saída continuar inválida para ReviewAnalysis após o reparo dos
+        campos (ver structured_output) ou se a confiança
+        ficar abaixo de `min_confidence`. Se um tier superior falhar ou o
+        deadline estourar, a última saída válida é mantida.
+        
+        Se o LLM estiver indisponível (circuito aberto ou falha na chamada),
+        retorna a análise heurística local com `fallback_reason` preenchido.
+        """
+        best = None
+        for tier, model in enumerate(self.models):
+            last_tier = tier == len(self.models) - 1
+            try:
+                result, reason = await self._analyze_with(model, review_data, deadline)
+            except DeadlineExceeded:
+                if best is not None:
+                    return best
+                raise
+            except CircuitOpenError:
+                return best or self._fallback_analysis(review_data, "LLM circuit open")
+            except Exception as e:
+                if best is not None:
+                    return best
+                if last_tier:
+                    return self._fallback_analysis(review_data, f"LLM call failed: {e}")
+                model_usage.record_escalation("review_analyzer", model, "call_failed")
+                continue
             
-            response = await client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": self.prompt},
-                    {"role": "user", "content": f"Analyze this review: {review_data}"}
-                ],
+            if reason is None or last_tier:
+                return result if reason != "invalid_output" else (
+                    best or self._fallback_analysis(review_data, "LLM output failed validation")
+                )
+            if reason == "low_confidence":
+                best = result
+            model_usage.record_escalation("review_analyzer", model, reason)
+        return best
+    
+    async def _analyze_with(
+        self,
+        model: str,
+        review_data: str,
+        deadline: Optional[Deadline]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Executa um tier da cascata.
+        
+        Returns:
+            Tuple: Análise (None se inválida) e motivo para escalar
+                (None, "invalid_output" ou "low_confidence")
+        """
+        try:
+            result = await complete_structured(
+                self.backend,
+                ReviewAnalysis,
+                stage="review_analyzer",
+                model=model,
+                messages=self._messages(model, review_data),
+                exclude=("analysis_source",),
                 temperature=0.1,
-                response_format={"type": "json_object"}
+                deadline=deadline
             )
-            
-            result = json.loads(response.choices[0].message.content)
+        except StructuredOutputError:
+            return None, "invalid_output"
+        if result.get("validation_status") == "success" and (result.get("confidence_score") or 0.0) < self.min_confidence:
+            return result, "low_confidence"
+        return result, None
+    
+    def _messages(self, model: str, review_data: str) -> List[Dict[str, str]]:
+        """Prompt com os metadados do review antes do texto, em JSON compacto."""
+        try:
+            review = json.loads(review_data)
+        except ValueError:
+            review = None
+        if not isinstance(review, dict):
+            review = {"text": review_data}
+        return build_messages(
+            stage="review_analyzer",
+            version=PROMPT_VERSION,
+            system_prompt=self.prompt,
+            instruction="Analyze this review:",
+            context={k: v for k, v in review.items() if k != "text"},
+            text_field="text" if "text" in review else None,
+            text=review.get("text"),
+            model=model
+        )
+    
+    def _fallback_analysis(self, review_data: str, reason: str) -> Dict[str, Any]:
+        """Executa a análise heurística local no lugar do LLM."""
+        try:
+            result = analyze_review_heuristically(json.loads(review_data))
+            result["fallback_reason"] = reason
             return result
-            
         except Exception as e:
             return {
                 "validation_status": "error",
-                "error_message": f"Processing error: {str(e)}",
+                "error_message": f"Processing error: {reason}; fallback failed: {str(e)}",
                 "sentiment": None,
                 "sentiment_score": None,
                 "categories": [],
@@ -90,6 +182,6 @@ URGENCY CLASSIFICATION:
             }
 
 
-def create_review_analyzer_agent():
+def create_review_analyzer_agent(backend=None):
     """Cria e configura o agente Review Analyzer."""
-    return ReviewAnalyzerAgent()
\ No newline at end of file
+    return ReviewAnalyzerAgent(backend)
\ No newline at end of file
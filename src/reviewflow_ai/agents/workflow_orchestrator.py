@@ -2,21 +2,74 @@
 Workflow Orchestrator Agent - Coordena todo o fluxo de processamento.
 """
 
+import asyncio
+import hashlib
 import json
-from typing import Dict, Any
-from .review_analyzer import create_review_analyzer_agent
+from typing import Callable, Dict, Any, Optional
+from .review_analyzer import PROMPT_VERSION as ANALYZER_PROMPT_VERSION, create_review_analyzer_agent
+from .response_generator import create_response_generator_agent
+from .escalation_manager import create_escalation_manager_agent
+from ..config import settings
+from ..models.data_models import CustomerHistory, ProductInfo
+from ..tools.anomaly_detector import create_anomaly_detector
 from ..tools.customer_service import get_customer_history
 from ..tools.product_service import get_product_info
+from ..tools.deadline import Deadline, DeadlineExceeded, run_within_deadline
+from ..tools.distilled_classifier import create_distilled_classifier
+from ..tools.escalation_aggregator import (
+    NON_AGGREGATED_TYPES,
+    create_escalation_aggregator,
+    issue_stems,
+    predict_escalation_type
+)
+from ..tools.llm_backend import create_llm_backend
+from ..tools.near_duplicate import PERSONAL_FIELDS, create_near_duplicate_index, personalize_analysis
+from ..tools.shared_cache import create_shared_cache
+from ..tools.token_usage import track_usage
+from ..tools.tracing import current_timings, tracer
+from ..tools.trigger_matcher import trigger_matcher
 
 
 class WorkflowOrchestrator:
     """Coordenador principal do workflow de processamento de reviews."""
     
-    def __init__(self):
-        self.review_analyzer = create_review_analyzer_agent()
+    def __init__(self, backend=None, cache=None):
+        self.backend = backend or create_llm_backend()
+        self.review_analyzer = create_review_analyzer_agent(self.backend)
+        self.response_generator = create_response_generator_agent(self.backend)
+        self.escalation_manager = create_escalation_manager_agent(self.backend)
+        self.anomaly_detector = create_anomaly_detector()
+        self.escalation_aggregator = create_escalation_aggregator()
+        self.duplicate_index = create_near_duplicate_index()
+        self.distilled_classifier = create_distilled_classifier()
+        # Análises e contextos compartilhados entre workers (LRU local + Redis)
+        self.cache = cache or create_shared_cache()
     
-    async def process_review(self, review_data: str) -> Dict[str, Any]:
-        """Processa um review completo através do workflow."""
+    async def process_review(
+        self,
+        review_data: str,
+        deadline: Optional[Deadline] = None,
+        on_response_token: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Processa um review completo através do workflow.
+        
+        Se um deadline for informado, estágios LLM opcionais sem orçamento
+        suficiente são pulados ou degradados, e o cancelamento da tarefa
+        interrompe a chamada LLM em andamento. Os tokens de todas as chamadas
+        LLM do review são devolvidos em `token_usage`.
+        
+        Com `on_response_token`, o texto da resposta ao cliente é repassado
+        em trechos enquanto é gerado.
+        """
+        with tracer.start_span("workflow"), track_usage() as usage:
+            result = await self._process_review(review_data, deadline, on_response_token)
+            if result.get("status") == "success":
+                result["token_usage"] = usage.to_dict()
+            return result
+    
+    async def _process_review(self, review_data, deadline, on_response_token=None):
+        """Executa os estágios do workflow, cada um em seu próprio span."""
         try:
             # Parse do input
             if isinstance(review_data, str):
@@ -24,8 +77,22 @@ class WorkflowOrchestrator:
             else:
                 review_input = review_data
             
-            # Stage 1: Análise do review
-            analysis_result = await self.review_analyzer.analyze_review(json.dumps(review_input))
+            # Análise e contextos já em cache (uma única leitura no Redis)
+            cache_keys = self._cache_keys(review_input)
+            with tracer.start_span("cache_lookup"):
+                cached = await self.cache.get_many(cache_keys.values())
+            cache_writes = {}
+            
+            # Stage 1: Análise do review (reutilizada do cache ou de um quase duplicado, se houver)
+            with tracer.start_span("analysis", review_id=review_input.get("id", "unknown")):
+                analysis_result, duplicate_of = await self._analyze_or_reuse(
+                    review_input, deadline, cached.get(cache_keys["analysis"])
+                )
+            if analysis_result.get("analysis_source") == "llm" and analysis_result.get("validation_status") == "success":
+                # O review de origem vai junto para que acertos do cache informem duplicate_of
+                cache_writes[cache_keys["analysis"]] = {
+                    **analysis_result, "origin_review_id": review_input.get("id", "unknown")
+                }
             
             if analysis_result.get("validation_status") != "success":
                 return {
@@ -34,30 +101,67 @@ class WorkflowOrchestrator:
                     "review_id": review_input.get("id", "unknown")
                 }
             
+            degradation_errors = []
+            if analysis_result.get("fallback_reason"):
+                degradation_errors.append(
+                    f"review_analyzer: heuristic fallback - {analysis_result['fallback_reason']}"
+                )
+            
             # Stage 2: Buscar contexto do cliente
             customer_context = None
             if review_input.get("customer_id"):
-                customer_context = get_customer_history(review_input["customer_id"])
+                key = cache_keys["customer"]
+                if key in cached:
+                    customer_context = CustomerHistory.model_validate(cached[key]) if cached[key] else None
+                else:
+                    with tracer.start_span("customer_lookup"):
+                        customer_context = get_customer_history(review_input["customer_id"])
+                    cache_writes[key] = customer_context.model_dump(mode="json") if customer_context else None
             
             # Stage 3: Buscar contexto do produto
             product_context = None
             if review_input.get("product_id"):
-                product_context = get_product_info(review_input["product_id"])
+                key = cache_keys["product"]
+                if key in cached:
+                    product_context = ProductInfo.model_validate(cached[key]) if cached[key] else None
+                else:
+                    with tracer.start_span("product_lookup"):
+                        product_context = get_product_info(review_input["product_id"])
+                    cache_writes[key] = product_context.model_dump(mode="json") if product_context else None
+            
+            # Escritas do cache em um único pipeline
+            if cache_writes:
+                with tracer.start_span("cache_store"):
+                    await self.cache.set_many(cache_writes)
             
             # Stage 4: Determinar workflow path
-            workflow_path = self._determine_workflow_path(
-                analysis_result, 
-                customer_context, 
-                product_context
-            )
+            with tracer.start_span("routing"):
+                workflow_path = self._determine_workflow_path(
+                    analysis_result, 
+                    customer_context, 
+                    product_context
+                )
+            
+            # Detecção de picos do produto (eventos agregados de escalação)
+            with tracer.start_span("anomaly_detection"):
+                anomaly_event = self.anomaly_detector.observe(
+                    review_input.get("id", "unknown"),
+                    analysis_result,
+                    review_input.get("text", ""),
+                    review_input.get("product_id"),
+                    product_context
+                )
             
             # Stage 5: Executar ações baseadas no workflow path
-            actions_taken = await self._execute_workflow_actions(
+            outcome = await self._execute_workflow_actions(
                 workflow_path,
                 analysis_result,
                 customer_context,
                 product_context,
-                review_input
+                review_input,
+                deadline,
+                on_response_token,
+                anomaly_event
             )
             
             # Resultado final
@@ -68,12 +172,29 @@ class WorkflowOrchestrator:
                 "customer_context": self._format_customer_context(customer_context),
                 "product_context": self._format_product_context(product_context),
                 "workflow_path": workflow_path,
-                "actions_taken": actions_taken,
+                "actions_taken": outcome["actions"],
+                "agents_triggered": outcome["agents_triggered"],
+                "response": outcome["response"],
+                "escalation": outcome["escalation"],
+                "errors": degradation_errors + outcome["errors"],
                 "priority_level": self._calculate_priority(analysis_result, customer_context),
                 "estimated_completion_time": self._estimate_completion_time(workflow_path),
-                "strategic_notes": self._generate_strategic_notes(analysis_result, customer_context)
+                "strategic_notes": self._generate_strategic_notes(
+                    analysis_result, customer_context, anomaly_event, outcome["spike_ticket_id"]
+                ),
+                "anomaly_event_id": anomaly_event.event_id if anomaly_event else None,
+                "duplicate_of": duplicate_of,
+                "timings": current_timings()
             }
             
+        except DeadlineExceeded as e:
+            return {
+                "status": "error",
+                "error_type": "deadline_exceeded",
+                "error": str(e),
+                "review_id": review_input.get("id", "unknown") if 'review_input' in locals() else "unknown"
+            }
+        
         except Exception as e:
             return {
                 "status": "error",
@@ -81,6 +202,75 @@ class WorkflowOrchestrator:
                 "review_id": review_input.get("id", "unknown") if 'review_input' in locals() else "unknown"
             }
     
+    def _cache_keys(self, review_input) -> Dict[str, Optional[str]]:
+        """
+        Chaves do cache compartilhado para o review.
+        
+        A análise é indexada pelo conteúdo do review sem os campos pessoais
+        (que são repostos na leitura), pela versão do prompt e pelos modelos
+        da cascata.
+        """
+        material = {k: v for k, v in review_input.items() if k != "id" and k not in PERSONAL_FIELDS}
+        digest = hashlib.sha256(
+            json.dumps([ANALYZER_PROMPT_VERSION, self.review_analyzer.models, material],
+                       sort_keys=True, ensure_ascii=False).encode()
+        ).hexdigest()
+        keys = {"analysis": self.cache.key("analysis", digest), "customer": None, "product": None}
+        if review_input.get("customer_id"):
+            keys["customer"] = self.cache.key("customer", review_input["customer_id"])
+        if review_input.get("product_id"):
+            keys["product"] = self.cache.key("product", review_input["product_id"])
+        return keys
+    
+    async def _analyze_or_reuse(self, review_input, deadline, cached_analysis=None):
+        """
+        Analisa o review ou reutiliza a análise do cache ou de um quase duplicado.
+        
+        Com o classificador destilado ativo, ele é consultado antes do LLM e
+        sua análise é usada quando a confiança é suficiente.
+        
+        Returns:
+            Tuple: Análise e review_id do original reutilizado, do cache ou do
+            índice de quase duplicados (None se analisado agora)
+        """
+        if cached_analysis:
+            analysis = personalize_analysis(cached_analysis, review_input)
+            origin = analysis.pop("origin_review_id", None)
+            analysis["analysis_source"] = "cache"
+            return analysis, origin
+        
+        signature = self.duplicate_index.signature(review_input.get("text", ""))
+        
+        if signature is not None:
+            original = self.duplicate_index.find(signature)
+            if original is not None:
+                with tracer.start_span("duplicate_reuse", duplicate_of=original.review_id):
+                    analysis = await run_within_deadline(asyncio.shield(original.ready), deadline, "analysis")
+                if analysis is not None:
+                    reused = personalize_analysis(analysis, review_input)
+                    reused["analysis_source"] = "duplicate"
+                    return reused, original.review_id
+        
+        if self.distilled_classifier is not None:
+            with tracer.start_span("distilled"):
+                analysis = self.distilled_classifier.try_analyze(review_input)
+            if analysis is not None:
+                return analysis, None
+        
+        entry = self.duplicate_index.reserve(review_input.get("id", "unknown"), signature) if signature else None
+        analysis = None
+        try:
+            analysis = await self.review_analyzer.analyze_review(json.dumps(review_input), deadline)
+            analysis["analysis_source"] = "heuristic" if analysis.get("fallback_reason") else "llm"
+            return analysis, None
+        finally:
+            if entry is not None:
+                # Apenas análises do LLM são reutilizadas
+                if analysis and analysis.get("validation_status") == "success" and not analysis.get("fallback_reason"):
+                    self.duplicate_index.resolve(entry, analysis)
+                else:
+                    self.duplicate_index.discard(entry)
+    
     def _determine_workflow_path(self, analysis, customer_context, product_context) -> str:
         """Determina o caminho do workflow baseado na análise."""
         sentiment = analysis.get("sentiment", "").lower()
@@ -100,21 +290,179 @@ class WorkflowOrchestrator:
         else:
             return "Response_Only"
     
-    async def _execute_workflow_actions(self, workflow_path, analysis, customer_context, product_context, review_input):
+    async def _execute_workflow_actions(
+        self, workflow_path, analysis, customer_context, product_context, review_input,
+        deadline=None, on_response_token=None, anomaly_event=None
+    ):
         """Executa as ações baseadas no workflow path."""
-        actions = []
+        outcome = {
+            "actions": [],
+            "agents_triggered": ["review_analyzer", "workflow_orchestrator"],
+            "response": None,
+            "escalation": None,
+            "errors": [],
+            "spike_ticket_id": None
+        }
+        actions = outcome["actions"]
         
         if workflow_path == "Archive":
             actions.append("Review archived - positive sentiment")
         
         elif workflow_path in ["Response_Only", "Response_And_Escalate", "Priority_Escalation"]:
-            # Simular geração de resposta
-            actions.append("Response generated")
+            review_text = review_input.get("text", "")
+            customer_metadata = self._format_customer_context(customer_context)
+            
+            # Resposta: pulada se não houver orçamento para uma chamada LLM
+            if self._stage_has_budget(deadline):
+                try:
+                    with tracer.start_span("response"):
+                        outcome["response"] = await self.response_generator.generate_response(
+                            analysis, review_text, customer_metadata, deadline, on_response_token
+                        )
+                    outcome["agents_triggered"].append("response_generator")
+                    actions.append("Response generated")
+                except DeadlineExceeded:
+                    outcome["errors"].append("response_generator: skipped - deadline exceeded")
+                except Exception as e:
+                    outcome["errors"].append(f"response_generator: {e}")
+            else:
+                outcome["errors"].append("response_generator: skipped - insufficient time budget")
             
             if workflow_path in ["Response_And_Escalate", "Priority_Escalation"]:
-                actions.append("Escalation ticket created")
+                triggers = trigger_matcher.find(review_text)
+                escalation_type = predict_escalation_type(analysis, triggers)
+                product_id = review_input.get("product_id")
+                
+                if anomaly_event is not None and escalation_type not in NON_AGGREGATED_TYPES:
+                    # Parte de um pico: um único ticket para o evento, sem chamada LLM por review
+                    outcome["escalation"] = self._join_anomaly_event(anomaly_event, analysis, review_input, outcome)
+                elif not triggers and (analysis.get("urgency") or "").lower() != "high":
+                    # Sem gatilhos e sem urgência alta o agente não escalaria: evita a chamada LLM
+                    outcome["escalation"] = self._no_escalation_ticket(customer_context)
+                    actions.append("Escalation skipped - no triggers and urgency below High")
+                elif not product_id or product_id == "UNKNOWN" or escalation_type in NON_AGGREGATED_TYPES:
+                    outcome["escalation"] = await self._evaluate_escalation(
+                        workflow_path, analysis, review_text, customer_context, triggers, deadline, outcome
+                    )
+                    actions.append("Escalation ticket created")
+                else:
+                    outcome["escalation"] = await self._aggregate_escalation(
+                        workflow_path, analysis, review_text, customer_context, review_input,
+                        product_id, escalation_type, triggers, deadline, outcome
+                    )
+        
+        return outcome
+    
+    async def _evaluate_escalation(self, workflow_path, analysis, review_text, customer_context, triggers, deadline, outcome):
+        """Ticket individual via LLM, degradado para regras sem orçamento ou em falha."""
+        escalation = None
+        if self._stage_has_budget(deadline):
+            try:
+                customer_history = customer_context.model_dump(mode="json") if customer_context else None
+                with tracer.start_span("escalation"):
+                    escalation = await self.escalation_manager.evaluate_escalation(
+                        analysis, review_text, customer_history, deadline, triggers
+                    )
+                outcome["agents_triggered"].append("escalation_manager")
+            except DeadlineExceeded:
+                outcome["errors"].append("escalation_manager: degraded - deadline exceeded")
+            except Exception as e:
+                outcome["errors"].append(f"escalation_manager: degraded - {e}")
+        else:
+            outcome["errors"].append("escalation_manager: degraded - insufficient time budget")
+        
+        return escalation or self._degraded_escalation_ticket(workflow_path, analysis, customer_context)
+    
+    async def _aggregate_escalation(
+        self, workflow_path, analysis, review_text, customer_context, review_input,
+        product_id, escalation_type, triggers, deadline, outcome
+    ):
+        """
+        Une o review a um ticket aberto do mesmo problema do produto.
+        
+        Apenas o primeiro review de cada ticket gera o resumo via LLM; os
+        seguintes aguardam esse resumo e são anexados ao ticket, que é
+        atualizado incrementalmente em segundo plano.
+        """
+        ticket, created = self.escalation_aggregator.find_or_open(
+            product_id, escalation_type, issue_stems(analysis, review_text)
+        )
+        ticket.attach(review_input.get("id", "unknown"), analysis.get("key_issues", []))
         
-        return actions
+        if created:
+            try:
+                content = await self._evaluate_escalation(
+                    workflow_path, analysis, review_text, customer_context, triggers, deadline, outcome
+                )
+                ticket.set_content(content)
+                if not content.get("escalation_needed"):
+                    self.escalation_aggregator.discard(ticket)
+                    return content
+            finally:
+                if not ticket.ready.done():
+                    # Cancelado antes do resumo: os reviews anexados recebem o ticket por regras
+                    ticket.set_content(self._degraded_escalation_ticket(workflow_path, analysis, customer_context))
+            outcome["actions"].append(f"Aggregated escalation ticket {ticket.ticket_id} opened")
+        else:
+            try:
+                with tracer.start_span("escalation_join"):
+                    content = await run_within_deadline(asyncio.shield(ticket.ready), deadline, "escalation")
+            except DeadlineExceeded:
+                outcome["errors"].append("escalation_manager: degraded - deadline exceeded")
+                return self._degraded_escalation_ticket(workflow_path, analysis, customer_context)
+            if not content.get("escalation_needed"):
+                return content
+            if self.escalation_aggregator.needs_refresh(ticket):
+                self.escalation_aggregator.schedule_refresh(ticket, self.escalation_manager.refresh_summary)
+            outcome["actions"].append(f"Attached to aggregated escalation ticket {ticket.ticket_id}")
+        
+        return ticket.ticket()
+    
+    def _join_anomaly_event(self, anomaly_event, analysis, review_input, outcome):
+        """Anexa o review ao ticket do pico do produto."""
+        ticket, created = self.escalation_aggregator.join_event(
+            anomaly_event.event_id, anomaly_event.product_id, anomaly_event.ticket.model_dump(mode="json")
+        )
+        ticket.attach(review_input.get("id", "unknown"), analysis.get("key_issues", []))
+        if self.escalation_aggregator.needs_refresh(ticket):
+            self.escalation_aggregator.schedule_refresh(ticket, self.escalation_manager.refresh_summary)
+        outcome["spike_ticket_id"] = ticket.ticket_id
+        outcome["actions"].append(
+            f"{'Opened' if created else 'Attached to'} spike escalation ticket {ticket.ticket_id} "
+            f"({anomaly_event.event_id})"
+        )
+        return ticket.ticket()
+    
+    def _stage_has_budget(self, deadline):
+        """Indica se há orçamento de tempo para mais um estágio LLM."""
+        return deadline is None or deadline.has_budget(settings.LLM_STAGE_MIN_SECONDS)
+    
+    def _degraded_escalation_ticket(self, workflow_path, analysis, customer_context):
+        """Cria um ticket de escalação baseado em regras, sem chamada LLM."""
+        key_issues = analysis.get("key_issues", [])
+        return {
+            "escalation_needed": True,
+            "escalation_type": None,
+            "priority": "P1" if workflow_path == "Priority_Escalation" else "P3",
+            "department": None,
+            "executive_summary": "Escalation created without LLM summary. Issues: " + (", ".join(key_issues) or "not identified"),
+            "recommended_actions": ["Manual review by the responsible team"],
+            "suggested_timeline": self._estimate_completion_time(workflow_path),
+            "customer_value": customer_context.lifetime_value if customer_context else None
+        }
+    
+    def _no_escalation_ticket(self, customer_context):
+        """Ticket negativo, decidido por regras sem chamada LLM."""
+        return {
+            "escalation_needed": False,
+            "escalation_type": None,
+            "priority": None,
+            "department": None,
+            "executive_summary": "No escalation triggers found and urgency below High.",
+            "recommended_actions": [],
+            "suggested_timeline": None,
+            "customer_value": customer_context.lifetime_value if customer_context else None
+        }
     
     def _format_customer_context(self, customer_context):
         """Formata contexto do cliente."""
@@ -171,7 +519,7 @@ class WorkflowOrchestrator:
         }
         return times.get(workflow_path, "2 hours")
     
-    def _generate_strategic_notes(self, analysis, customer_context):
+    def _generate_strategic_notes(self, analysis, customer_context, anomaly_event=None, spike_ticket_id=None):
         """Gera notas estratégicas."""
         notes = []
         
@@ -187,9 +535,14 @@ class WorkflowOrchestrator:
         if sentiment == "negative" and len(analysis.get("key_issues", [])) > 2:
             notes.append("Multiple issues reported - comprehensive response needed")
         
+        if anomaly_event and spike_ticket_id:
+            notes.append(f"Part of product spike {anomaly_event.event_id} - escalated in aggregate ({spike_ticket_id})")
+        elif anomaly_event:
+            notes.append(f"Part of product spike {anomaly_event.event_id}")
+        
         return "; ".join(notes) if notes else "Standard processing workflow"
 
 
-def create_workflow_orchestrator_agent():
+def create_workflow_orchestrator_agent(backend=None, cache=None):
     """Cria e configura o agente Workflow Orchestrator."""
-    return WorkflowOrchestrator()
\ No newline at end of file
+    return WorkflowOrchestrator(backend, cache)
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Backfill de reviews históricos em modo agrupar-e-analisar.
+
+Lê um corpus JSONL (um ReviewInput por linha), analisa com o
+ClusterBatchAnalyzer e grava uma análise por linha, além de um relatório com a
+redução de chamadas LLM e a concordância medida em uma amostra.
+
+Uso:
+    python -m src.reviewflow_ai.backfill --corpus reviews.jsonl --output analyses.jsonl
+    python -m src.reviewflow_ai.backfill --corpus reviews.jsonl --output analyses.jsonl --sample 200 --report backfill.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+from pydantic import ValidationError
+
+from .agents.cluster_batch_analyzer import ClusterBatchAnalyzer
+from .config import settings
+from .models.data_models import ReviewInput
+
+logger = logging.getLogger(__name__)
+
+
+def load_reviews(path: str) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Lê e valida o corpus.
+
+    Returns:
+        Tuple: Reviews válidos e quantidade de linhas rejeitadas
+    """
+    reviews, rejected = [], 0
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                reviews.append(ReviewInput.model_validate_json(line).model_dump(exclude_none=True))
+            except ValidationError as e:
+                rejected += 1
+                logger.warning(f"Linha {number} rejeitada: {e.errors()[0]['msg']}")
+    return reviews, rejected
+
+
+async def run(args) -> Dict[str, Any]:
+    reviews, rejected = load_reviews(args.corpus)
+    analyzer = ClusterBatchAnalyzer(
+        cluster_size=args.cluster_size,
+        max_clusters=args.max_clusters,
+        representatives=args.representatives,
+        min_similarity=args.min_similarity,
+        concurrency=args.concurrency,
+        seed=args.seed
+    )
+    batch = await analyzer.analyze(reviews, sample_size=args.sample)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        for result in batch["results"]:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    return {**batch["stats"], "rejected_lines": rejected}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="reviewflow-backfill",
+        description="Análise de lotes grandes de reviews com LLM apenas nos representantes de cada grupo"
+    )
+    parser.add_argument("--corpus", required=True, help="Corpus JSONL de reviews (um por linha)")
+    parser.add_argument("--output", required=True, help="Arquivo JSONL com uma análise por review")
+    parser.add_argument("--report", help="Arquivo JSON para o relatório")
+    parser.add_argument("--cluster-size", type=int, default=settings.BACKFILL_CLUSTER_SIZE,
+                        help="Tamanho médio desejado dos grupos")
+    parser.add_argument("--max-clusters", type=int, default=settings.BACKFILL_MAX_CLUSTERS)
+    parser.add_argument("--representatives", type=int, default=settings.BACKFILL_REPRESENTATIVES,
+                        help="Reviews analisados pelo LLM por grupo")
+    parser.add_argument("--min-similarity", type=float, default=settings.BACKFILL_MIN_SIMILARITY,
+                        help="Similaridade mínima com o centróide para herdar a análise do grupo")
+    parser.add_argument("--concurrency", type=int, default=settings.BACKFILL_CONCURRENCY)
+    parser.add_argument("--sample", type=int, default=0,
+                        help="Reviews propagados reanalisados pelo LLM para medir a concordância")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Relatório salvo em {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,16 +17,120 @@ class Settings:
     # OpenAI Configuration
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "20"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+    
+    # Model Routing Configuration (cascata do analyzer, do mais barato ao mais forte)
+    ANALYZER_MODELS: str = os.getenv("ANALYZER_MODELS", OPENAI_MODEL)
+    CASCADE_MIN_CONFIDENCE: float = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.7"))
+    RESPONSE_MODEL: str = os.getenv("RESPONSE_MODEL", OPENAI_MODEL)
+    ESCALATION_MODEL: str = os.getenv("ESCALATION_MODEL", OPENAI_MODEL)
+    # USD por 1M tokens (entrada/saída), usado nas métricas de custo por tier
+    LLM_PRICES: str = os.getenv("LLM_PRICES", "gpt-4o-mini=0.15/0.60,gpt-4o=2.50/10.00")
+    # Novos pedidos ao LLM só com os campos que falharam na validação
+    STRUCTURED_MAX_REASKS: int = int(os.getenv("STRUCTURED_MAX_REASKS", "1"))
+    # Tokens (entrada + saída) por lote; 0 = sem limite
+    BATCH_TOKEN_BUDGET: int = int(os.getenv("BATCH_TOKEN_BUDGET", "0"))
+    # Tokens do texto do review enviados ao LLM (o excedente é cortado no meio)
+    PROMPT_MAX_REVIEW_TOKENS: int = int(os.getenv("PROMPT_MAX_REVIEW_TOKENS", "1000"))
+    
+    # LLM Cassette Configuration (off, record ou replay)
+    LLM_CASSETTE_MODE: str = os.getenv("LLM_CASSETTE_MODE", "off")
+    LLM_CASSETTE_PATH: str = os.getenv("LLM_CASSETTE_PATH", "data/llm_cassette.bin")
+    
+    # Circuit Breaker Configuration
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RECOVERY_SECONDS: float = float(os.getenv("CIRCUIT_RECOVERY_SECONDS", "30"))
     
     # Application Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     MAX_BATCH_SIZE: int = int(os.getenv("MAX_BATCH_SIZE", "100"))
     
+    # Deadline Configuration
+    REQUEST_TIMEOUT_SECONDS: float = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+    LLM_STAGE_MIN_SECONDS: float = float(os.getenv("LLM_STAGE_MIN_SECONDS", "2.0"))
+    
+    # Profiling Configuration
+    ADMIN_TOKEN: Optional[str] = os.getenv("ADMIN_TOKEN")
+    PROFILE_SAMPLE_RATE: float = float(os.getenv("PROFILE_SAMPLE_RATE", "0.0"))
+    PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_OUTPUT_DIR: str = os.getenv("PROFILE_OUTPUT_DIR", "profiles")
+    
+    # Tracing Configuration (none ou file)
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "none")
+    TRACING_FILE: str = os.getenv("TRACING_FILE", "traces/spans.jsonl")
+    
+    # Product Insights Configuration (janela deslizante dos agregados)
+    INSIGHTS_WINDOW_HOURS: float = float(os.getenv("INSIGHTS_WINDOW_HOURS", "24"))
+    INSIGHTS_BUCKET_MINUTES: float = float(os.getenv("INSIGHTS_BUCKET_MINUTES", "60"))
+    
+    # Anomaly Detection Configuration (EWMA + CUSUM por produto)
+    ANOMALY_BASELINE_ALPHA: float = float(os.getenv("ANOMALY_BASELINE_ALPHA", "0.02"))
+    ANOMALY_CUSUM_SLACK: float = float(os.getenv("ANOMALY_CUSUM_SLACK", "0.1"))
+    ANOMALY_CUSUM_THRESHOLD: float = float(os.getenv("ANOMALY_CUSUM_THRESHOLD", "5.0"))
+    ANOMALY_WARMUP_REVIEWS: int = int(os.getenv("ANOMALY_WARMUP_REVIEWS", "20"))
+    
+    # Escalation Aggregation Configuration
+    ESCALATION_AGGREGATION_WINDOW_SECONDS: float = float(os.getenv("ESCALATION_AGGREGATION_WINDOW_SECONDS", "3600"))
+    ESCALATION_AGGREGATION_SIMILARITY: float = float(os.getenv("ESCALATION_AGGREGATION_SIMILARITY", "0.5"))
+    ESCALATION_SUMMARY_REFRESH_EVERY: int = int(os.getenv("ESCALATION_SUMMARY_REFRESH_EVERY", "10"))
+    
+    # Near-Duplicate Detection Configuration (MinHash LSH)
+    DUPLICATE_INDEX_SIZE: int = int(os.getenv("DUPLICATE_INDEX_SIZE", "20000"))
+    DUPLICATE_SIMILARITY_THRESHOLD: float = float(os.getenv("DUPLICATE_SIMILARITY_THRESHOLD", "0.8"))
+    DUPLICATE_MIN_TOKENS: int = int(os.getenv("DUPLICATE_MIN_TOKENS", "6"))
+    
+    # Backfill Configuration (análise de lotes grandes por agrupamento)
+    BACKFILL_CLUSTER_SIZE: int = int(os.getenv("BACKFILL_CLUSTER_SIZE", "50"))
+    BACKFILL_MAX_CLUSTERS: int = int(os.getenv("BACKFILL_MAX_CLUSTERS", "2000"))
+    BACKFILL_REPRESENTATIVES: int = int(os.getenv("BACKFILL_REPRESENTATIVES", "3"))
+    BACKFILL_MIN_SIMILARITY: float = float(os.getenv("BACKFILL_MIN_SIMILARITY", "0.3"))
+    BACKFILL_CONCURRENCY: int = int(os.getenv("BACKFILL_CONCURRENCY", "20"))
+    
+    # Distilled Classifier Configuration (modelo local antes do LLM; vazio desativa)
+    DISTILLED_MODEL_PATH: str = os.getenv("DISTILLED_MODEL_PATH", "")
+    DISTILLED_MIN_CONFIDENCE: float = float(os.getenv("DISTILLED_MIN_CONFIDENCE", "0.9"))
+    
+    # WebSocket Configuration (push de resultados processados)
+    WS_QUEUE_SIZE: int = int(os.getenv("WS_QUEUE_SIZE", "100"))
+    WS_MAX_SUBSCRIBERS: int = int(os.getenv("WS_MAX_SUBSCRIBERS", "500"))
+    WS_SEND_TIMEOUT_SECONDS: float = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+    
+    # Webhook Configuration (entrega de resultados para CRM/ticketing; vazio desativa)
+    WEBHOOK_URLS: str = os.getenv("WEBHOOK_URLS", "")
+    WEBHOOK_EVENTS: str = os.getenv("WEBHOOK_EVENTS", "review.completed,escalation.created")
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+    WEBHOOK_OUTBOX_PATH: str = os.getenv("WEBHOOK_OUTBOX_PATH", "data/webhook_outbox.db")
+    WEBHOOK_BATCH_SIZE: int = int(os.getenv("WEBHOOK_BATCH_SIZE", "50"))
+    WEBHOOK_BATCH_WINDOW_MS: float = float(os.getenv("WEBHOOK_BATCH_WINDOW_MS", "500"))
+    WEBHOOK_MAX_ATTEMPTS: int = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+    WEBHOOK_BACKOFF_BASE_SECONDS: float = float(os.getenv("WEBHOOK_BACKOFF_BASE_SECONDS", "1"))
+    WEBHOOK_BACKOFF_MAX_SECONDS: float = float(os.getenv("WEBHOOK_BACKOFF_MAX_SECONDS", "300"))
+    WEBHOOK_CONCURRENCY: int = int(os.getenv("WEBHOOK_CONCURRENCY", "4"))
+    WEBHOOK_TIMEOUT_SECONDS: float = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10"))
+    
+    # Idempotency Configuration (header Idempotency-Key)
+    IDEMPOTENCY_MAX_KEYS: int = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    
+    # Sharding Configuration (hashing consistente entre nós; vazio = nó único)
+    SHARD_NODES: str = os.getenv("SHARD_NODES", "")
+    SHARD_SELF: str = os.getenv("SHARD_SELF", "")
+    SHARD_SECRET: str = os.getenv("SHARD_SECRET", "")
+    SHARD_KEY: str = os.getenv("SHARD_KEY", "customer_id")
+    SHARD_VIRTUAL_NODES: int = int(os.getenv("SHARD_VIRTUAL_NODES", "160"))
+    SHARD_HEALTH_INTERVAL_SECONDS: float = float(os.getenv("SHARD_HEALTH_INTERVAL_SECONDS", "5"))
+    
     # Database Configuration (para futuro uso)
     DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
     
-    # Cache Configuration (para futuro uso)
+    # Cache Configuration (LRU local + Redis compartilhado entre workers)
     REDIS_URL: Optional[str] = os.getenv("REDIS_URL")
+    CACHE_LOCAL_MAX_ITEMS: int = int(os.getenv("CACHE_LOCAL_MAX_ITEMS", "10000"))
+    CACHE_LOCAL_TTL_SECONDS: float = float(os.getenv("CACHE_LOCAL_TTL_SECONDS", "60"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+    CACHE_REMOTE_TIMEOUT_MS: float = float(os.getenv("CACHE_REMOTE_TIMEOUT_MS", "50"))
+    CACHE_PUBSUB_INVALIDATION: bool = os.getenv("CACHE_PUBSUB_INVALIDATION", "true").lower() == "true"
     
     def __init__(self):
         if not self.OPENAI_API_KEY:
@@ -3,6 +3,7 @@ Modelos de dados para o sistema ReviewFlow AI.
 Utiliza Pydantic para validação e serialização de dados.
 """
 
+import hashlib
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional, Dict, Any
 from enum import Enum
@@ -33,6 +34,7 @@ class CustomerTier(str, Enum):
     SILVER = "Silver"
     GOLD = "Gold"
     PLATINUM = "Platinum"
+    UNKNOWN = "Unknown"  # Cliente não encontrado na base
 
 
 class ReviewInput(BaseModel):
@@ -49,7 +51,9 @@ class ReviewInput(BaseModel):
     @validator('id', pre=True, always=True)
     def generate_id_if_missing(cls, v, values):
         if not v and 'text' in values:
-            return f"REV-{hash(values['text']) % 10000:04d}"
+            # Hash estável entre processos (hash() de str é aleatorizado)
+            digest = hashlib.sha1(values['text'].encode('utf-8')).hexdigest()
+            return f"REV-{int(digest, 16) % 10000:04d}"
         return v
 
     class Config:
@@ -79,6 +83,9 @@ class ReviewAnalysis(BaseModel):
     customer_name: str
     product_name: str
     confidence_score: Optional[float] = Field(None, ge=0.0, le=1.0)
+    analysis_source: Optional[str] = Field(
+        None, description="Origem da análise: llm, heuristic, duplicate, distilled ou cache"
+    )
 
 
 class ResponseGeneration(BaseModel):
@@ -110,6 +117,17 @@ class EscalationTicket(BaseModel):
     recommended_actions: List[str] = []
     suggested_timeline: Optional[str] = None
     customer_value: Optional[str] = None
+    aggregated_ticket_id: Optional[str] = Field(
+        None, description="Ticket agregado do produto ao qual esta escalação foi unida"
+    )
+    affected_reviews: Optional[int] = None
+
+
+class EscalationRefresh(BaseModel):
+    """Atualização incremental de um ticket agregado pelo Escalation Manager."""
+    priority: PriorityLevel
+    executive_summary: str
+    recommended_actions: List[str] = []
 
 
 class WorkflowPath(str, Enum):
@@ -146,6 +164,12 @@ class WorkflowResult(BaseModel):
     estimated_completion_time: str
     sla_status: str
     strategic_notes: str
+    timings: Optional[Dict[str, float]] = Field(
+        None, description="Duração (ms) de cada estágio do workflow, por nome de span"
+    )
+    anomaly_event_id: Optional[str] = Field(
+        None, description="Evento agregado de pico do produto ao qual o review foi anexado"
+    )
 
 
 class CustomerHistory(BaseModel):
@@ -192,6 +216,32 @@ class ProductInfo(BaseModel):
     release_date: str
 
 
+class LLMCallUsage(BaseModel):
+    """Tokens de uma chamada LLM."""
+    stage: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: float = 0.0
+
+
+class TokenUsage(BaseModel):
+    """Tokens e custo estimado de todas as chamadas LLM de um review."""
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = Field(0, description="Tokens do prompt servidos do cache do provedor")
+    cost_usd: float = Field(0.0, description="Custo estimado pelos preços de LLM_PRICES")
+    calls: List[LLMCallUsage] = []
+
+
+class CacheInvalidation(BaseModel):
+    """Contextos a remover do cache compartilhado (todos os workers)."""
+    customer_ids: List[str] = []
+    product_ids: List[str] = []
+
+
 class ProcessingResult(BaseModel):
     """Resultado final do processamento completo de um review."""
     review_input: ReviewInput
@@ -202,4 +252,8 @@ class ProcessingResult(BaseModel):
     processing_time: float
     timestamp: datetime = Field(default_factory=datetime.now)
     status: str = "completed"
-    errors: List[str] = []
\ No newline at end of file
+    errors: List[str] = []
+    duplicate_of: Optional[str] = Field(
+        None, description="Review quase idêntico cuja análise foi reutilizada (possível abuso)"
+    )
+    token_usage: Optional[TokenUsage] = None
\ No newline at end of file
@@ -0,0 +1,297 @@
+"""
+Detecção online de picos de reviews negativos por produto.
+
+Para cada produto são monitoradas duas famílias de séries binárias: "review
+negativo" e "review menciona o common_issue X" (de ProductInfo.common_issues).
+Cada série guarda apenas uma linha de base (EWMA lenta), uma taxa recente (EWMA
+rápida) e uma soma CUSUM unilateral, portanto a memória por produto é
+constante. Quando a CUSUM ultrapassa o limiar, um único evento agregado de
+escalação é aberto; os reviews seguintes que contribuem para o pico são
+anexados ao mesmo evento em vez de gerar um ticket cada.
+"""
+
+import logging
+import math
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from ..models.data_models import EscalationTicket, ProductInfo
+from .heuristic_analyzer import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Reviews listados por evento (o contador continua sem limite)
+MAX_EVENT_REVIEWS = 100
+
+# Palavras ignoradas ao comparar reviews com common_issues
+_ISSUE_STOPWORDS = {
+    "para", "com", "sem", "por", "que", "nao", "mais", "muito", "pouco", "abaixo",
+    "acima", "esperado", "problema", "with", "from", "that", "this", "than"
+}
+
+
+def _stem(token: str) -> str:
+    return token[:5]
+
+
+def issue_signature(issue: str) -> frozenset:
+    """Radicais significativos da descrição de um common_issue."""
+    return frozenset(_stem(t) for t in tokenize(issue) if len(t) >= 4 and t not in _ISSUE_STOPWORDS)
+
+
+def matches_issue(review_stems: set, signature: frozenset) -> bool:
+    """O review cobre ao menos metade dos radicais do issue."""
+    if not signature:
+        return False
+    return len(review_stems & signature) >= math.ceil(len(signature) / 2)
+
+
+class CusumSeries:
+    """EWMA + CUSUM unilateral sobre uma série de 0/1."""
+
+    __slots__ = ("baseline", "rate", "cusum", "samples")
+
+    def __init__(self):
+        self.baseline = 0.0
+        self.rate = 0.0
+        self.cusum = 0.0
+        self.samples = 0
+
+    def update(
+        self, value: float, alpha: float, fast_alpha: float, slack: float, warmup: int, learn: bool = True
+    ) -> None:
+        self.samples += 1
+        self.rate += fast_alpha * (value - self.rate)
+        if self.samples <= warmup:
+            # Aquecimento: a linha de base é a média simples
+            self.baseline += (value - self.baseline) / self.samples
+            return
+        self.cusum = max(0.0, self.cusum + value - self.baseline - slack)
+        if learn:
+            self.baseline += alpha * (value - self.baseline)
+
+
+@dataclass
+class AnomalyEvent:
+    """Evento agregado de escalação para um pico de um produto."""
+
+    event_id: str
+    product_id: str
+    product_name: str
+    signal: str
+    baseline_rate: float
+    observed_rate: float
+    ticket: EscalationTicket
+    opened_at: datetime = field(default_factory=datetime.now)
+    closed_at: Optional[datetime] = None
+    affected_reviews: int = 0
+    review_ids: List[str] = field(default_factory=list)
+    quiet_reviews: int = 0
+
+    @property
+    def status(self) -> str:
+        return "open" if self.closed_at is None else "resolved"
+
+    def attach(self, review_id: str) -> None:
+        self.affected_reviews += 1
+        if len(self.review_ids) < MAX_EVENT_REVIEWS:
+            self.review_ids.append(review_id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "event_id": self.event_id,
+            "status": self.status,
+            "product_id": self.product_id,
+            "product_name": self.product_name,
+            "signal": self.signal,
+            "baseline_rate": round(self.baseline_rate, 4),
+            "observed_rate": round(self.observed_rate, 4),
+            "affected_reviews": self.affected_reviews,
+            "review_ids": self.review_ids,
+            "opened_at": self.opened_at.isoformat(),
+            "closed_at": self.closed_at.isoformat() if self.closed_at else None,
+            "ticket": self.ticket.model_dump()
+        }
+
+
+class _ProductState:
+    __slots__ = ("negative", "issues", "open_events")
+
+    def __init__(self, issues: List[str]):
+        self.negative = CusumSeries()
+        self.issues: Dict[str, CusumSeries] = {issue: CusumSeries() for issue in issues}
+        self.open_events: Dict[str, AnomalyEvent] = {}
+
+
+class AnomalyDetector:
+    """
+    Detector de picos por produto sobre o fluxo de análises.
+
+    Args:
+        alpha: Peso da EWMA lenta (linha de base)
+        fast_alpha: Peso da EWMA rápida (taxa reportada no evento)
+        slack: Folga k da CUSUM, em pontos de taxa acima da linha de base
+        threshold: Limiar h da CUSUM para abrir um evento
+        warmup: Reviews por série antes de começar a detectar
+        max_products: Produtos monitorados (LRU)
+        max_events: Eventos mantidos em memória (abertos e recentes)
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.02,
+        fast_alpha: float = 0.2,
+        slack: float = 0.1,
+        threshold: float = 5.0,
+        warmup: int = 20,
+        max_products: int = 10000,
+        max_events: int = 500
+    ):
+        self.alpha = alpha
+        self.fast_alpha = fast_alpha
+        self.slack = slack
+        self.threshold = threshold
+        self.warmup = warmup
+        self.max_products = max_products
+        self._products: "OrderedDict[str, _ProductState]" = OrderedDict()
+        self._signatures: Dict[str, frozenset] = {}
+        self._events: Deque[AnomalyEvent] = deque(maxlen=max_events)
+
+    def _state(self, product_id: str, product: Optional[ProductInfo]) -> _ProductState:
+        state = self._products.get(product_id)
+        if state is None:
+            issues = [item.get("issue", "") for item in product.common_issues] if product else []
+            state = self._products[product_id] = _ProductState([i for i in issues if i])
+            if len(self._products) > self.max_products:
+                self._products.popitem(last=False)
+        else:
+            self._products.move_to_end(product_id)
+        return state
+
+    def _signature(self, issue: str) -> frozenset:
+        signature = self._signatures.get(issue)
+        if signature is None:
+            signature = self._signatures[issue] = issue_signature(issue)
+        return signature
+
+    def observe(
+        self,
+        review_id: str,
+        analysis: Dict[str, Any],
+        review_text: str,
+        product_id: Optional[str],
+        product: Optional[ProductInfo] = None
+    ) -> Optional[AnomalyEvent]:
+        """
+        Atualiza as séries do produto com uma análise concluída.
+
+        Returns:
+            AnomalyEvent | None: Evento aberto ao qual o review foi anexado
+        """
+        if not product_id or product_id == "UNKNOWN":
+            return None
+
+        state = self._state(product_id, product)
+        negative = (analysis.get("sentiment") or "").lower() == "negative"
+        signals = {"negative_rate": (state.negative, negative)}
+
+        if state.issues and (analysis.get("sentiment") or "").lower() != "positive":
+            text = " ".join([review_text] + list(analysis.get("key_issues") or []))
+            review_stems = {_stem(t) for t in tokenize(text)}
+        else:
+            review_stems = set()
+        for issue, series in state.issues.items():
+            signals[f"common_issue:{issue}"] = (series, matches_issue(review_stems, self._signature(issue)))
+
+        attached = None
+        for signal, (series, hit) in signals.items():
+            event = state.open_events.get(signal)
+            # Durante um pico a linha de base fica congelada
+            series.update(
+                1.0 if hit else 0.0, self.alpha, self.fast_alpha, self.slack, self.warmup, learn=event is None
+            )
+
+            if event is None and series.cusum >= self.threshold:
+                event = self._open_event(product_id, product, signal, series, analysis)
+                state.open_events[signal] = event
+            elif event is not None:
+                # Encerra após `warmup` reviews seguidos com a taxa de volta à linha de base
+                event.quiet_reviews = event.quiet_reviews + 1 if series.rate <= series.baseline + self.slack else 0
+                if event.quiet_reviews >= self.warmup:
+                    series.cusum = 0.0
+                    event.closed_at = datetime.now()
+                    del state.open_events[signal]
+                    logger.info(f"Pico encerrado: {event.event_id} ({event.affected_reviews} reviews)")
+                    continue
+
+            if event is not None:
+                event.observed_rate = series.rate
+                if hit:
+                    event.attach(review_id)
+                    attached = attached or event
+        return attached
+
+    def _open_event(
+        self,
+        product_id: str,
+        product: Optional[ProductInfo],
+        signal: str,
+        series: CusumSeries,
+        analysis: Dict[str, Any]
+    ) -> AnomalyEvent:
+        product_name = product.product_name if product else analysis.get("product_name", product_id)
+        description = (
+            "aumento de reviews negativos" if signal == "negative_rate"
+            else f"aumento de relatos de '{signal.split(':', 1)[1]}'"
+        )
+        ticket = EscalationTicket(
+            escalation_needed=True,
+            escalation_type="Technical",
+            priority="P1" if series.rate >= 0.5 else "P2",
+            department="Qualidade de Produto",
+            executive_summary=(
+                f"Pico detectado em {product_name} ({product_id}): {description}. "
+                f"Taxa recente {series.rate:.0%} contra linha de base {series.baseline:.0%}."
+            ),
+            recommended_actions=[
+                "Verificar lote e fornecedor do produto",
+                "Avaliar suspensão temporária das vendas",
+                "Preparar comunicação proativa aos clientes afetados"
+            ],
+            suggested_timeline="4 hours"
+        )
+        event = AnomalyEvent(
+            event_id=f"ANOM-{uuid.uuid4().hex[:8]}",
+            product_id=product_id,
+            product_name=product_name,
+            signal=signal,
+            baseline_rate=series.baseline,
+            observed_rate=series.rate,
+            ticket=ticket
+        )
+        self._events.append(event)
+        logger.warning(f"Pico detectado: {event.event_id} {product_id} {signal}")
+        return event
+
+    def events(self, status: Optional[str] = None, product_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Eventos mais recentes primeiro, opcionalmente filtrados."""
+        return [
+            event.to_dict() for event in reversed(self._events)
+            if (status is None or event.status == status)
+            and (product_id is None or event.product_id == product_id)
+        ]
+
+
+def create_anomaly_detector() -> AnomalyDetector:
+    """Cria o detector conforme as configurações ANOMALY_*."""
+    from ..config import settings
+
+    return AnomalyDetector(
+        alpha=settings.ANOMALY_BASELINE_ALPHA,
+        slack=settings.ANOMALY_CUSUM_SLACK,
+        threshold=settings.ANOMALY_CUSUM_THRESHOLD,
+        warmup=settings.ANOMALY_WARMUP_REVIEWS
+    )
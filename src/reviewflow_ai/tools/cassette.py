@@ -0,0 +1,232 @@
+"""
+Cassete de gravação/reprodução do tráfego LLM.
+
+Formato do arquivo de dados (append-only): sequência de registros
+`[tamanho: uint32 big-endian][JSON comprimido com zlib]`. O índice fica em
+`<arquivo>.idx`, também append-only, com uma linha `chave<TAB>offset` por
+registro; se estiver ausente ou inconsistente, é reconstruído varrendo os dados.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional
+
+from .circuit_breaker import CircuitBreaker
+from .deadline import Deadline
+from .llm_backend import LLMResponse
+
+_LENGTH = struct.Struct(">I")
+
+
+class CassetteMiss(Exception):
+    """Levantada no modo replay quando a requisição não está gravada."""
+
+
+def request_key(
+    stage: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    response_format: Optional[Dict[str, Any]]
+) -> str:
+    """Chave determinística (SHA-256) de uma requisição ao LLM."""
+    canonical = json.dumps(
+        {
+            "stage": stage,
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": response_format
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CassetteWriter:
+    """Grava pares requisição/resposta no final do cassete."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._data = open(path, "ab")
+        self._index = open(path + ".idx", "a", encoding="utf-8")
+
+    def append(self, key: str, record: Dict[str, Any]) -> None:
+        payload = zlib.compress(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        )
+        offset = self._data.tell()
+        self._data.write(_LENGTH.pack(len(payload)) + payload)
+        self._data.flush()
+        self._index.write(f"{key}\t{offset}\n")
+        self._index.flush()
+
+    def close(self) -> None:
+        self._data.close()
+        self._index.close()
+
+
+class CassetteReader:
+    """Lê registros do cassete por chave, usando o índice para acesso direto."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = open(path, "rb")
+        self._offsets: Dict[str, List[int]] = self._load_index()
+        self._cursors: Dict[str, int] = defaultdict(int)
+
+    def __len__(self) -> int:
+        return sum(len(offsets) for offsets in self._offsets.values())
+
+    def _load_index(self) -> Dict[str, List[int]]:
+        offsets: Dict[str, List[int]] = defaultdict(list)
+        data_size = os.path.getsize(self.path)
+        try:
+            with open(self.path + ".idx", encoding="utf-8") as index:
+                for line in index:
+                    key, offset = line.rstrip("\n").split("\t")
+                    if int(offset) >= data_size:
+                        raise ValueError("index points past end of data")
+                    offsets[key].append(int(offset))
+            return offsets
+        except (OSError, ValueError):
+            return self._rebuild_index()
+
+    def _rebuild_index(self) -> Dict[str, List[int]]:
+        offsets: Dict[str, List[int]] = defaultdict(list)
+        for offset, record in self._scan():
+            offsets[record["key"]].append(offset)
+        return offsets
+
+    def _read_at(self, offset: int) -> Dict[str, Any]:
+        self._data.seek(offset)
+        (length,) = _LENGTH.unpack(self._data.read(_LENGTH.size))
+        return json.loads(zlib.decompress(self._data.read(length)))
+
+    def _scan(self) -> Iterator:
+        self._data.seek(0)
+        while True:
+            offset = self._data.tell()
+            header = self._data.read(_LENGTH.size)
+            if len(header) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(header)
+            payload = self._data.read(length)
+            if len(payload) < length:
+                # Registro truncado (gravação interrompida): ignora o final
+                return
+            yield offset, json.loads(zlib.decompress(payload))
+            self._data.seek(offset + _LENGTH.size + length)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Itera todos os registros na ordem de gravação."""
+        for _, record in self._scan():
+            yield record
+
+    def lookup(self, key: str) -> Dict[str, Any]:
+        """
+        Retorna o próximo registro gravado para a chave.
+
+        Requisições idênticas repetidas são reproduzidas na ordem em que foram
+        gravadas; esgotada a sequência, a última resposta é repetida.
+        """
+        offsets = self._offsets.get(key)
+        if not offsets:
+            raise CassetteMiss(f"No recorded response for request {key[:12]}")
+        position = min(self._cursors[key], len(offsets) - 1)
+        self._cursors[key] += 1
+        return self._read_at(offsets[position])
+
+    def close(self) -> None:
+        self._data.close()
+
+
+class RecordingBackend:
+    """Backend que delega ao backend real e grava cada par requisição/resposta."""
+
+    def __init__(self, inner, writer: CassetteWriter):
+        self.inner = inner
+        self.writer = writer
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self.inner.breaker
+
+    async def complete(
+        self,
+        *,
+        stage: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.1,
+        response_format: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> LLMResponse:
+        started = time.perf_counter()
+        response = await self.inner.complete(
+            stage=stage,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            response_format=response_format,
+            deadline=deadline
+        )
+        key = request_key(stage, model, messages, temperature, response_format)
+        self.writer.append(key, {
+            "key": key,
+            "stage": stage,
+            "recorded_at": time.time(),
+            "latency_seconds": time.perf_counter() - started,
+            "request": {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "response_format": response_format
+            },
+            "response": {
+                "content": response.content,
+                "model": response.model,
+                "prompt_tokens": response.prompt_tokens,
+                "completion_tokens": response.completion_tokens,
+                "cached_tokens": response.cached_tokens
+            }
+        })
+        return response
+
+
+class ReplayBackend:
+    """Backend que responde a partir do cassete, sem chamadas de rede."""
+
+    def __init__(self, reader: CassetteReader):
+        self.reader = reader
+        self.breaker = CircuitBreaker()
+
+    async def complete(
+        self,
+        *,
+        stage: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.1,
+        response_format: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> LLMResponse:
+        key = request_key(stage, model, messages, temperature, response_format)
+        record = self.reader.lookup(key)
+        return LLMResponse(
+            content=record["response"]["content"],
+            model=record["response"]["model"],
+            prompt_tokens=record["response"].get("prompt_tokens", 0),
+            completion_tokens=record["response"].get("completion_tokens", 0),
+            cached_tokens=record["response"].get("cached_tokens", 0)
+        )
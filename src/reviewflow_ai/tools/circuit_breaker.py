@@ -0,0 +1,78 @@
+"""
+Circuit breaker para o backend LLM.
+Evita que requisições esperem o timeout completo enquanto o provedor está degradado.
+"""
+
+import time
+from typing import Any, Dict
+
+
+class CircuitOpenError(Exception):
+    """Levantada quando o circuito está aberto e a chamada não é permitida."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com estados closed, open e half_open.
+
+    Após `failure_threshold` falhas consecutivas o circuito abre e rejeita
+    chamadas imediatamente. Passado `recovery_timeout`, uma única chamada de
+    prova é liberada (half_open): sucesso fecha o circuito, falha reabre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Indica se uma chamada pode prosseguir, reservando a prova em half_open."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self._rejected_calls += 1
+        return False
+
+    def record_success(self) -> None:
+        """Registra uma chamada bem-sucedida e fecha o circuito."""
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Registra uma falha do backend, abrindo o circuito se necessário."""
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def record_abandoned(self) -> None:
+        """Libera a prova de half_open quando a chamada foi cancelada sem resultado."""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual para health check e métricas."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "rejected_calls": self._rejected_calls
+        }
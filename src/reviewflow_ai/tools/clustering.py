@@ -0,0 +1,111 @@
+"""
+K-means esférico em mini-lotes sobre matrizes TF-IDF esparsas.
+
+Os centróides são vetores densos normalizados e a atribuição usa similaridade
+de cosseno (produto interno), o que é adequado para textos. A inicialização é
+k-means++ sobre uma amostra; o treino percorre mini-lotes aleatórios com taxa
+de aprendizado 1/n por centróide (Sculley, 2010), e uma passada final atribui
+todos os documentos.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .text_features import SparseRows
+
+# Linhas por bloco no produto esparso x denso (limita a memória temporária)
+_CHUNK_ROWS = 2048
+
+
+class MiniBatchKMeans:
+    """
+    Agrupamento de linhas normalizadas em L2 por similaridade de cosseno.
+
+    Args:
+        n_clusters: Número máximo de grupos (menos são usados se houver
+            menos textos distintos)
+        batch_size: Documentos por mini-lote
+        max_batches: Mini-lotes de treino
+        init_sample: Documentos considerados na inicialização k-means++
+        seed: Semente para resultados reprodutíveis
+    """
+
+    def __init__(
+        self,
+        n_clusters: int,
+        batch_size: int = 1024,
+        max_batches: int = 50,
+        init_sample: int = 10000,
+        seed: int = 7
+    ):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.init_sample = init_sample
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+
+    def _init_centroids(self, X: SparseRows, rng: np.random.Generator) -> np.ndarray:
+        sample = rng.choice(len(X), size=min(len(X), self.init_sample), replace=False)
+        S = X.take(sample)
+        chosen = [int(rng.integers(len(S)))]
+        centroids = [S.row(chosen[0])]
+        # Distância de cosseno de cada documento ao centróide mais próximo
+        distance = 1.0 - S.dot(centroids[0][None, :])[:, 0]
+        while len(centroids) < self.n_clusters:
+            weights = np.clip(distance, 0.0, None) ** 2
+            total = weights.sum()
+            if total <= 1e-9:
+                break  # Todos os documentos restantes coincidem com algum centróide
+            chosen.append(int(rng.choice(len(S), p=weights / total)))
+            centroids.append(S.row(chosen[-1]))
+            distance = np.minimum(distance, 1.0 - S.dot(centroids[-1][None, :])[:, 0])
+        # Ordem Fortran: SparseRows.dot lê colunas inteiras dos centróides
+        return np.asfortranarray(np.vstack(centroids))
+
+    def _assign(self, X: SparseRows) -> Tuple[np.ndarray, np.ndarray]:
+        labels = np.empty(len(X), dtype=np.int64)
+        similarities = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), _CHUNK_ROWS):
+            rows = np.arange(start, min(start + _CHUNK_ROWS, len(X)))
+            scores = X.take(rows).dot(self.centroids)
+            labels[rows] = scores.argmax(axis=1)
+            similarities[rows] = scores[np.arange(len(rows)), labels[rows]]
+        return labels, similarities
+
+    def fit(self, X: SparseRows) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Treina os centróides e atribui cada documento.
+
+        Returns:
+            Tuple: Rótulo (0..k-1, sem grupos vazios) e similaridade de cada
+                documento com o centróide do seu grupo
+        """
+        if len(X) == 0:
+            self.centroids = np.zeros((0, X.n_features), dtype=np.float32)
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        rng = np.random.default_rng(self.seed)
+        self.centroids = self._init_centroids(X, rng)
+        counts = np.zeros(len(self.centroids), dtype=np.float64)
+
+        for _ in range(self.max_batches if len(X) > len(self.centroids) else 0):
+            batch = X.take(rng.choice(len(X), size=min(len(X), self.batch_size), replace=False))
+            labels = batch.dot(self.centroids).argmax(axis=1)
+            batch_counts = np.bincount(labels, minlength=len(self.centroids))
+            sums = np.zeros_like(self.centroids)
+            batch.add_to(sums, labels)
+
+            counts += batch_counts
+            # Média móvel de cada centróide com taxa (docs do lote / docs vistos),
+            # reprojetada na esfera; centróides sem documentos no lote não mudam
+            seen = np.maximum(counts, 1)
+            self.centroids *= (1 - batch_counts / seen).astype(np.float32)[:, None]
+            self.centroids += sums * (1 / seen).astype(np.float32)[:, None]
+            self.centroids /= np.maximum(np.linalg.norm(self.centroids, axis=1, keepdims=True), 1e-12)
+
+        labels, similarities = self._assign(X)
+        used, labels = np.unique(labels, return_inverse=True)
+        self.centroids = self.centroids[used]
+        return labels, similarities
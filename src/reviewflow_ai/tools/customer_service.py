@@ -224,5 +224,5 @@ def get_customer_history_json(customer_id: str) -> Optional[str]:
     """
     customer = get_customer_history(customer_id)
     if customer:
-        return customer.model_dump_json(indent=2, ensure_ascii=False)
+        return customer.model_dump_json(indent=2)
     return None
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+Controle de deadline por requisição e cancelamento cooperativo entre estágios.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Levantada quando o orçamento de tempo da requisição se esgota."""
+
+
+class Deadline:
+    """Instante limite (relógio monotônico) para concluir uma requisição."""
+
+    def __init__(self, timeout_seconds: float):
+        self.timeout_seconds = timeout_seconds
+        self.expires_at = time.monotonic() + timeout_seconds
+
+    @classmethod
+    def from_header(cls, value: Optional[str], default_seconds: float) -> "Deadline":
+        """
+        Cria um deadline a partir do header X-Request-Timeout.
+
+        O cliente pode apenas encurtar o orçamento padrão; valores inválidos,
+        ausentes ou maiores que o padrão usam o padrão.
+        """
+        try:
+            seconds = float(value) if value else default_seconds
+        except ValueError:
+            seconds = default_seconds
+
+        if seconds <= 0:
+            seconds = default_seconds
+
+        return cls(min(seconds, default_seconds))
+
+    def remaining(self) -> float:
+        """Segundos restantes até o deadline (nunca negativo)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Indica se o deadline já passou."""
+        return time.monotonic() >= self.expires_at
+
+    def has_budget(self, seconds: float) -> bool:
+        """Indica se ainda há pelo menos `seconds` de orçamento."""
+        return self.remaining() >= seconds
+
+    def check(self, stage: str) -> None:
+        """Levanta DeadlineExceeded se o deadline já passou."""
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline exceeded before stage '{stage}'")
+
+
+async def run_within_deadline(awaitable: Awaitable[T], deadline: Optional[Deadline], stage: str) -> T:
+    """
+    Aguarda `awaitable` respeitando o tempo restante do deadline.
+
+    Ao estourar o prazo a tarefa interna é cancelada (abortando a chamada
+    HTTP em andamento) e DeadlineExceeded é levantada.
+    """
+    if deadline is None:
+        return await awaitable
+
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(f"Deadline exceeded before stage '{stage}'")
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout=remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline exceeded during stage '{stage}'") from None
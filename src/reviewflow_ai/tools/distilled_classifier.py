@@ -0,0 +1,271 @@
+"""
+Classificador local destilado das análises do LLM.
+
+Uma regressão logística sobre a presença de n-gramas com hashing (ver
+text_features) prevê sentimento e urgência (softmax) e categorias (sigmoide
+independente por categoria), treinada com os ReviewAnalysis já pagos e
+gravados no ResultStore. O modelo é salvo como arquivos .npy em um diretório e
+carregado com mmap, de modo que vários workers compartilham as páginas do
+sistema operacional e iniciam sem copiar os pesos.
+
+Layout das saídas (colunas de `weights`):
+    0-2 sentimento, 3-5 urgência, 6-9 categorias
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .heuristic_analyzer import analyze_review_heuristically
+from .text_features import HashingTfidfVectorizer, SparseRows, ngram_features
+
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+URGENCIES = ["Low", "Medium", "High"]
+CATEGORIES = ["Product_Quality", "Delivery", "Customer_Service", "Pricing"]
+
+_SENTIMENT = slice(0, 3)
+_URGENCY = slice(3, 6)
+_CATEGORIES = slice(6, 10)
+N_OUTPUTS = 10
+
+# Faixa de sentiment_score coerente com cada sentimento
+_SCORE_RANGES = {"Positive": (7, 10), "Neutral": (5, 6), "Negative": (1, 4)}
+
+MODEL_FILES = ("weights.npy", "bias.npy")
+
+
+def review_features(review_input: Dict[str, Any]) -> List[str]:
+    """N-gramas do texto mais a nota do cliente, quando houver."""
+    features = ngram_features(review_input.get("text", ""))
+    if review_input.get("rating"):
+        features.append(f"__rating {review_input['rating']}")
+    return features
+
+
+def encode_labels(analysis: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Alvos (0/1) das 10 saídas, ou None se a análise não tiver sentimento e urgência."""
+    if analysis.get("sentiment") not in SENTIMENTS or analysis.get("urgency") not in URGENCIES:
+        return None
+    target = np.zeros(N_OUTPUTS, dtype=np.float32)
+    target[SENTIMENTS.index(analysis["sentiment"])] = 1
+    target[3 + URGENCIES.index(analysis["urgency"])] = 1
+    for category in analysis.get("categories") or []:
+        if category in CATEGORIES:
+            target[6 + CATEGORIES.index(category)] = 1
+    return target
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _probabilities(logits: np.ndarray) -> np.ndarray:
+    probabilities = np.empty_like(logits)
+    probabilities[:, _SENTIMENT] = _softmax(logits[:, _SENTIMENT])
+    probabilities[:, _URGENCY] = _softmax(logits[:, _URGENCY])
+    probabilities[:, _CATEGORIES] = 1 / (1 + np.exp(-np.clip(logits[:, _CATEGORIES], -30, 30)))
+    return probabilities
+
+
+def confidences(probabilities: np.ndarray) -> np.ndarray:
+    """Confiança de cada previsão: a menor entre as de sentimento e urgência."""
+    return np.minimum(probabilities[:, _SENTIMENT].max(axis=1), probabilities[:, _URGENCY].max(axis=1))
+
+
+class DistilledClassifier:
+    """
+    Modelo treinado (pesos n_features x 10 e viés).
+
+    Args:
+        weights: Pesos, um vetor de saídas por coluna de feature
+        bias: Viés das 10 saídas
+        meta: Metadados (n_features, métricas do treino)
+        min_confidence: Confiança mínima para dispensar o LLM
+    """
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        meta: Optional[Dict[str, Any]] = None,
+        min_confidence: float = 0.9
+    ):
+        self.weights = weights
+        self.bias = bias
+        self.meta = meta or {}
+        self.min_confidence = min_confidence
+        self.vectorizer = HashingTfidfVectorizer(n_features=weights.shape[0], binary=True)
+        self.predictions = 0
+        self.accepted = 0
+
+    def vectorize(self, reviews: Iterable[Dict[str, Any]]) -> SparseRows:
+        return self.vectorizer.transform_features(review_features(r) for r in reviews)
+
+    def predict_proba(self, vectors: SparseRows) -> np.ndarray:
+        """Probabilidades das 10 saídas para cada linha."""
+        # weights.T em ordem Fortran: SparseRows.dot lê linhas contíguas do arquivo
+        return _probabilities(vectors.dot(self.weights.T) + self.bias)
+
+    def analyze(self, review_input: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        """
+        Análise no formato do Review Analyzer.
+
+        Sentimento, urgência e categorias vêm do modelo; problemas principais
+        e a nota (ajustada à faixa do sentimento) vêm do analisador heurístico.
+
+        Returns:
+            Tuple: Análise e confiança da previsão
+        """
+        probabilities = self.predict_proba(self.vectorize([review_input]))[0]
+        confidence = float(confidences(probabilities[None, :])[0])
+        sentiment = SENTIMENTS[int(probabilities[_SENTIMENT].argmax())]
+        low, high = _SCORE_RANGES[sentiment]
+
+        analysis = analyze_review_heuristically(review_input)
+        analysis.update({
+            "sentiment": sentiment,
+            "sentiment_score": min(high, max(low, analysis["sentiment_score"])),
+            "urgency": URGENCIES[int(probabilities[_URGENCY].argmax())],
+            "categories": [c for c, p in zip(CATEGORIES, probabilities[_CATEGORIES]) if p >= 0.5],
+            "confidence_score": round(confidence, 2),
+            "analysis_source": "distilled"
+        })
+        return analysis, confidence
+
+    def try_analyze(self, review_input: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Análise local se a confiança atingir `min_confidence`; None para usar o LLM.
+
+        Urgência alta sempre vai ao LLM, pois decide escalações.
+        """
+        analysis, confidence = self.analyze(review_input)
+        self.predictions += 1
+        if confidence < self.min_confidence or analysis["urgency"] == "High":
+            return None
+        self.accepted += 1
+        return analysis
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "predictions": self.predictions,
+            "accepted": self.accepted,
+            "acceptance_rate": round(self.accepted / self.predictions, 4) if self.predictions else 0.0,
+            "min_confidence": self.min_confidence,
+            "trained_at": self.meta.get("trained_at"),
+            "training_examples": self.meta.get("training_examples")
+        }
+
+    def save(self, path: str) -> None:
+        """Grava o modelo em `path` (diretório com .npy e meta.json)."""
+        os.makedirs(path, exist_ok=True)
+        for name, array in zip(MODEL_FILES, (self.weights, self.bias)):
+            np.save(os.path.join(path, name), np.ascontiguousarray(array, dtype=np.float32))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, min_confidence: float = 0.9, mmap: bool = True) -> "DistilledClassifier":
+        """Carrega um modelo salvo; com `mmap` os pesos são mapeados, não lidos."""
+        weights, bias = (
+            np.load(os.path.join(path, name), mmap_mode="r" if mmap else None) for name in MODEL_FILES
+        )
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(weights, np.asarray(bias), meta, min_confidence)
+
+
+def train_classifier(
+    reviews: List[Dict[str, Any]],
+    targets: np.ndarray,
+    n_features: int = 2 ** 18,
+    epochs: int = 8,
+    batch_size: int = 256,
+    learning_rate: float = 0.5,
+    l2: float = 1e-3,
+    seed: int = 7
+) -> DistilledClassifier:
+    """
+    Treina por Adagrad em mini-lotes, atualizando apenas as linhas de pesos
+    das features presentes em cada lote.
+
+    Args:
+        reviews: Reviews no formato de ReviewInput
+        targets: Alvos (len(reviews) x 10) de `encode_labels`
+    """
+    X = HashingTfidfVectorizer(n_features=n_features, binary=True).transform_features(
+        review_features(r) for r in reviews
+    )
+
+    weights = np.zeros((n_features, N_OUTPUTS), dtype=np.float32)
+    prior = targets.mean(axis=0).clip(1e-3, 1 - 1e-3)
+    bias = np.log(prior).astype(np.float32)
+    bias[_CATEGORIES] = np.log(prior[_CATEGORIES] / (1 - prior[_CATEGORIES]))
+    squared = np.full_like(weights, 1e-8)
+    squared_bias = np.full_like(bias, 1e-8)
+
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        order = rng.permutation(len(X))
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            batch = X.take(rows)
+            errors = _probabilities(batch.dot(weights.T) + bias) - targets[rows]
+
+            features, inverse = np.unique(batch.indices, return_inverse=True)
+            row_ids = np.repeat(np.arange(len(rows)), np.diff(batch.indptr))
+            gradient = np.zeros((len(features), N_OUTPUTS), dtype=np.float32)
+            np.add.at(gradient, inverse, batch.data[:, None] * errors[row_ids])
+            gradient += l2 * weights[features]
+
+            squared[features] += gradient ** 2
+            weights[features] -= learning_rate * gradient / np.sqrt(squared[features])
+            bias_gradient = errors.sum(axis=0)
+            squared_bias += bias_gradient ** 2
+            bias -= learning_rate * bias_gradient / np.sqrt(squared_bias)
+
+    return DistilledClassifier(weights, bias)
+
+
+def evaluate(model: DistilledClassifier, reviews: List[Dict[str, Any]], targets: np.ndarray) -> Dict[str, Any]:
+    """
+    Acurácia de sentimento e urgência, F1 micro das categorias e, por limiar de
+    confiança, a cobertura (fração dispensada do LLM) e a acurácia nela.
+    """
+    if not reviews:
+        return {"examples": 0}
+    probabilities = model.predict_proba(model.vectorize(reviews))
+    sentiment_ok = probabilities[:, _SENTIMENT].argmax(axis=1) == targets[:, _SENTIMENT].argmax(axis=1)
+    urgency_ok = probabilities[:, _URGENCY].argmax(axis=1) == targets[:, _URGENCY].argmax(axis=1)
+    predicted = probabilities[:, _CATEGORIES] >= 0.5
+    actual = targets[:, _CATEGORIES] >= 0.5
+    true_positives = (predicted & actual).sum()
+    f1 = 2 * true_positives / max(1, predicted.sum() + actual.sum())
+    confidence = confidences(probabilities)
+
+    gates = {}
+    for threshold in (0.7, 0.8, 0.9, 0.95):
+        accepted = confidence >= threshold
+        gates[str(threshold)] = {
+            "coverage": round(float(accepted.mean()), 4),
+            "sentiment_accuracy": round(float(sentiment_ok[accepted].mean()), 4) if accepted.any() else None,
+            "urgency_accuracy": round(float(urgency_ok[accepted].mean()), 4) if accepted.any() else None
+        }
+    return {
+        "examples": len(reviews),
+        "sentiment_accuracy": round(float(sentiment_ok.mean()), 4),
+        "urgency_accuracy": round(float(urgency_ok.mean()), 4),
+        "categories_f1": round(float(f1), 4),
+        "confidence_gates": gates
+    }
+
+
+def create_distilled_classifier() -> Optional[DistilledClassifier]:
+    """Carrega o modelo de DISTILLED_MODEL_PATH, ou None se o modo estiver desativado."""
+    from ..config import settings
+
+    if not settings.DISTILLED_MODEL_PATH:
+        return None
+    return DistilledClassifier.load(settings.DISTILLED_MODEL_PATH, settings.DISTILLED_MIN_CONFIDENCE)
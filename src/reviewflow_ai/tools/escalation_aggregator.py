@@ -0,0 +1,284 @@
+"""
+Agregação de escalações por produto.
+
+Quando um produto sai com defeito, centenas de reviews quase idênticos gerariam
+centenas de tickets e chamadas LLM. Aqui, escalações com o mesmo produto, o
+mesmo tipo (previsto por regras, antes de qualquer chamada LLM) e problemas
+semelhantes dentro de uma janela de tempo são unidas em um único ticket aberto
+com a lista crescente de reviews afetados. O resumo LLM é gerado uma vez, na
+abertura, e depois apenas atualizado de forma incremental com os problemas
+novos acumulados.
+
+Reviews que fazem parte de um pico detectado (AnomalyEvent) vão todos para o
+ticket do evento, aberto com o ticket gerado por regras pelo detector.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .anomaly_detector import issue_signature
+from .trigger_matcher import TriggerMatch, trigger_types
+
+# Reviews listados por ticket (o contador continua sem limite)
+MAX_TICKET_REVIEWS = 100
+
+# Problemas novos guardados para a próxima atualização do resumo
+MAX_PENDING_ISSUES = 20
+
+# Intervalo entre varreduras de todas as chaves (cada pico cria uma chave nova)
+SWEEP_INTERVAL_SECONDS = 60
+
+# Ameaças legais são tratadas caso a caso, nunca agregadas
+NON_AGGREGATED_TYPES = {"Legal"}
+
+
+def predict_escalation_type(analysis: Dict[str, Any], triggers: List[TriggerMatch]) -> str:
+    """Prevê o tipo de escalação (Legal, Commercial ou Technical) pelos gatilhos encontrados."""
+    types = set(trigger_types(triggers))
+    if "Legal" in types:
+        return "Legal"
+    if "Commercial" in types or "Pricing" in (analysis.get("categories") or []):
+        return "Commercial"
+    return "Technical"
+
+
+def issue_stems(analysis: Dict[str, Any], review_text: str) -> frozenset:
+    """Assinatura dos problemas do review (key_issues ou, sem eles, o texto)."""
+    issues = analysis.get("key_issues") or [review_text[:300]]
+    return frozenset().union(*(issue_signature(issue) for issue in issues))
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """Coeficiente de sobreposição entre duas assinaturas."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+class AggregatedTicket:
+    """Ticket de escalação compartilhado pelos reviews de um mesmo problema."""
+
+    def __init__(self, product_id: str, escalation_type: str, stems: frozenset):
+        self.ticket_id = f"ESC-{uuid.uuid4().hex[:8]}"
+        self.product_id = product_id
+        self.escalation_type = escalation_type
+        self.stems = stems
+        self.opened_at = datetime.now()
+        self.last_seen = time.monotonic()
+        self.affected_reviews = 0
+        self.review_ids: List[str] = []
+        self.pending_issues: List[str] = []
+        self.reviews_since_refresh = 0
+        self.content: Optional[Dict[str, Any]] = None
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.refreshing = False
+        self.refreshes = 0
+        self.anomaly_event_id: Optional[str] = None
+
+    def attach(self, review_id: str, key_issues: List[str]) -> None:
+        self.affected_reviews += 1
+        self.last_seen = time.monotonic()
+        if len(self.review_ids) < MAX_TICKET_REVIEWS:
+            self.review_ids.append(review_id)
+        if self.content is not None:
+            self.reviews_since_refresh += 1
+            for issue in key_issues:
+                if len(self.pending_issues) < MAX_PENDING_ISSUES and issue not in self.pending_issues:
+                    self.pending_issues.append(issue)
+
+    def set_content(self, content: Dict[str, Any]) -> None:
+        self.content = content
+        if not self.ready.done():
+            self.ready.set_result(content)
+
+    def ticket(self) -> Dict[str, Any]:
+        """Ticket atual, no formato de EscalationTicket."""
+        return {
+            **(self.content or {}),
+            "aggregated_ticket_id": self.ticket_id,
+            "affected_reviews": self.affected_reviews
+        }
+
+    def to_dict(self, status: str) -> Dict[str, Any]:
+        return {
+            "ticket_id": self.ticket_id,
+            "status": status,
+            "product_id": self.product_id,
+            "escalation_type": self.escalation_type,
+            "anomaly_event_id": self.anomaly_event_id,
+            "affected_reviews": self.affected_reviews,
+            "review_ids": self.review_ids,
+            "opened_at": self.opened_at.isoformat(),
+            "summary_refreshes": self.refreshes,
+            "ticket": self.content
+        }
+
+
+class EscalationAggregator:
+    """
+    Índice de tickets abertos por (produto, tipo de escalação).
+
+    Args:
+        window_seconds: Tempo sem novos reviews após o qual o ticket é encerrado
+        min_similarity: Sobreposição mínima de problemas para unir ao ticket
+        refresh_every: Reviews novos que disparam a atualização do resumo
+        max_history: Tickets encerrados mantidos em memória
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 3600,
+        min_similarity: float = 0.5,
+        refresh_every: int = 10,
+        max_history: int = 500
+    ):
+        self.window_seconds = window_seconds
+        self.min_similarity = min_similarity
+        self.refresh_every = refresh_every
+        self._open: Dict[Tuple[str, str], List[AggregatedTicket]] = {}
+        self._closed: Deque[AggregatedTicket] = deque(maxlen=max_history)
+        self._refresh_tasks: set = set()
+        self._last_sweep = time.monotonic()
+
+    def _expire(self, key: Tuple[str, str], now: float) -> List[AggregatedTicket]:
+        tickets = self._open.get(key, [])
+        alive = [t for t in tickets if now - t.last_seen < self.window_seconds]
+        for ticket in tickets:
+            if ticket not in alive:
+                self._closed.append(ticket)
+        if alive:
+            self._open[key] = alive
+        else:
+            self._open.pop(key, None)
+        return alive
+
+    def _sweep(self, now: float, force: bool = False) -> None:
+        """Encerra os tickets vencidos de todas as chaves, no máximo uma vez por intervalo."""
+        if not force and now - self._last_sweep < SWEEP_INTERVAL_SECONDS:
+            return
+        self._last_sweep = now
+        for key in list(self._open):
+            self._expire(key, now)
+
+    def find_or_open(
+        self,
+        product_id: str,
+        escalation_type: str,
+        stems: frozenset
+    ) -> Tuple[AggregatedTicket, bool]:
+        """
+        Localiza um ticket aberto semelhante ou abre um novo.
+
+        Returns:
+            Tuple: Ticket e True se foi criado agora (o chamador gera o resumo)
+        """
+        key = (product_id, escalation_type)
+        now = time.monotonic()
+        self._sweep(now)
+        best, best_score = None, 0.0
+        for ticket in self._expire(key, now):
+            score = similarity(stems, ticket.stems)
+            if score >= self.min_similarity and score > best_score:
+                best, best_score = ticket, score
+        if best is not None:
+            return best, False
+
+        ticket = AggregatedTicket(product_id, escalation_type, stems)
+        self._open.setdefault(key, []).append(ticket)
+        return ticket, True
+
+    def join_event(
+        self,
+        event_id: str,
+        product_id: str,
+        content: Dict[str, Any]
+    ) -> Tuple[AggregatedTicket, bool]:
+        """
+        Ticket único de um pico, aberto já com `content` (sem chamada LLM).
+
+        Returns:
+            Tuple: Ticket e True se foi criado agora
+        """
+        key = (product_id, event_id)
+        now = time.monotonic()
+        self._sweep(now)
+        alive = self._expire(key, now)
+        if alive:
+            return alive[0], False
+
+        ticket = AggregatedTicket(product_id, content.get("escalation_type") or "Technical", frozenset())
+        ticket.anomaly_event_id = event_id
+        ticket.set_content(content)
+        self._open[key] = [ticket]
+        return ticket, True
+
+    def discard(self, ticket: AggregatedTicket) -> None:
+        """Remove um ticket cuja escalação não foi confirmada pelo LLM."""
+        key = (ticket.product_id, ticket.escalation_type)
+        tickets = self._open.get(key, [])
+        if ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                self._open.pop(key, None)
+
+    def needs_refresh(self, ticket: AggregatedTicket) -> bool:
+        return (
+            not ticket.refreshing
+            and ticket.content is not None
+            and ticket.content.get("escalation_needed")
+            and ticket.reviews_since_refresh >= self.refresh_every
+        )
+
+    def schedule_refresh(self, ticket: AggregatedTicket, refresh) -> None:
+        """
+        Atualiza o resumo em segundo plano com os problemas pendentes.
+
+        `refresh(content, new_issues, new_reviews)` é uma corrotina que retorna
+        os campos atualizados do ticket.
+        """
+        new_issues, new_reviews = ticket.pending_issues, ticket.reviews_since_refresh
+        ticket.pending_issues, ticket.reviews_since_refresh = [], 0
+        ticket.refreshing = True
+
+        async def run():
+            try:
+                updates = await refresh(ticket.content, new_issues, new_reviews)
+                ticket.content = {**ticket.content, **updates}
+                ticket.refreshes += 1
+            except Exception:
+                # Mantém o resumo anterior; os problemas voltam para a próxima tentativa
+                ticket.pending_issues = (new_issues + ticket.pending_issues)[:MAX_PENDING_ISSUES]
+                ticket.reviews_since_refresh += new_reviews
+            finally:
+                ticket.refreshing = False
+
+        task = asyncio.create_task(run())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def tickets(self, status: Optional[str] = None, product_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Tickets abertos e encerrados recentes, filtrados opcionalmente."""
+        self._sweep(time.monotonic(), force=True)
+        items = [(t, "open") for tickets in self._open.values() for t in tickets]
+        items += [(t, "closed") for t in reversed(self._closed)]
+        return [
+            ticket.to_dict(ticket_status) for ticket, ticket_status in items
+            if ticket.content is not None
+            and (status is None or ticket_status == status)
+            and (product_id is None or ticket.product_id == product_id)
+        ]
+
+
+def create_escalation_aggregator() -> EscalationAggregator:
+    """Cria o agregador conforme as configurações ESCALATION_*."""
+    from ..config import settings
+
+    return EscalationAggregator(
+        window_seconds=settings.ESCALATION_AGGREGATION_WINDOW_SECONDS,
+        min_similarity=settings.ESCALATION_AGGREGATION_SIMILARITY,
+        refresh_every=settings.ESCALATION_SUMMARY_REFRESH_EVERY
+    )
@@ -0,0 +1,150 @@
+"""
+Analisador local baseado em léxico e regras.
+Usado como fallback quando o backend LLM está indisponível (circuito aberto).
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List
+
+# Confiança máxima atribuída a uma análise heurística
+HEURISTIC_MAX_CONFIDENCE = 0.4
+
+POSITIVE_TERMS = {
+    "excelente", "otimo", "bom", "boa", "perfeito", "perfeita", "adorei", "amei",
+    "recomendo", "maravilhoso", "rapido", "rapida", "satisfeito", "satisfeita",
+    "superou", "funciona", "excellent", "great", "good", "perfect",
+    "love", "loved", "recommend", "amazing", "fast", "satisfied", "happy", "works"
+}
+
+NEGATIVE_TERMS = {
+    "pessimo", "pessima", "ruim", "horrivel", "quebrado", "quebrada", "defeito",
+    "danificado", "danificada", "atraso", "atrasado", "demora", "lento", "caro",
+    "decepcionado", "decepcionada", "nunca", "problema", "reembolso", "devolucao",
+    "insatisfeito", "insatisfeita", "terrivel", "descaso", "enganado", "golpe",
+    "terrible", "awful", "bad", "broken", "damaged", "defect", "defective", "late",
+    "delay", "slow", "expensive", "disappointed", "refund", "problem", "worst"
+}
+
+NEGATORS = {"nao", "nem", "nunca", "not", "never"}
+
+CATEGORY_TERMS = {
+    "Product_Quality": {
+        "quebrado", "quebrada", "defeito", "danificado", "danificada", "qualidade",
+        "parou", "bateria", "tela", "broken", "defect", "defective", "damaged",
+        "quality", "stopped", "battery", "screen"
+    },
+    "Delivery": {
+        "entrega", "entregue", "atraso", "atrasado", "chegou", "frete", "transporte",
+        "prazo", "delivery", "shipping", "late", "delay", "arrived", "package"
+    },
+    "Customer_Service": {
+        "atendimento", "atendente", "suporte", "sac", "resposta", "descaso",
+        "service", "support", "agent", "response", "rude"
+    },
+    "Pricing": {
+        "preco", "caro", "cobranca", "cobrado", "desconto", "valor", "estorno",
+        "price", "expensive", "charged", "billing", "discount", "overcharged"
+    }
+}
+
+HIGH_URGENCY_TERMS = {
+    "procon", "advogado", "processar", "justica", "judicial", "reclameaqui",
+    "perigo", "perigoso", "incendio", "fogo", "choque", "explodiu", "lawsuit",
+    "lawyer", "authorities", "danger", "dangerous", "fire", "shock", "unsafe"
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_SENTENCE_PATTERN = re.compile(r"[^.!?]+")
+
+
+def normalize_text(text: str) -> str:
+    """Converte para minúsculas e remove acentos."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokeniza o texto normalizado em palavras."""
+    return _TOKEN_PATTERN.findall(normalize_text(text))
+
+
+def _score_tokens(tokens: List[str]) -> int:
+    """Soma de polaridade do léxico, invertendo termos precedidos de negação."""
+    score = 0
+    for i, token in enumerate(tokens):
+        polarity = 1 if token in POSITIVE_TERMS else -1 if token in NEGATIVE_TERMS else 0
+        if polarity and i > 0 and tokens[i - 1] in NEGATORS:
+            polarity = -polarity
+        score += polarity
+    return score
+
+
+def _extract_key_issues(text: str) -> List[str]:
+    """Seleciona as frases com termos negativos como problemas principais."""
+    issues = []
+    for sentence in _SENTENCE_PATTERN.findall(text):
+        sentence = sentence.strip()
+        if sentence and any(t in NEGATIVE_TERMS or t in HIGH_URGENCY_TERMS for t in tokenize(sentence)):
+            issues.append(sentence[:120])
+    return issues[:5]
+
+
+def analyze_review_heuristically(review_input: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Analisa um review sem LLM, no mesmo formato retornado pelo Review Analyzer.
+
+    Args:
+        review_input (Dict): Dados do review (text, customer_id, customer_name, ...)
+
+    Returns:
+        Dict: Análise com validation_status="success" e confiança reduzida
+    """
+    text = review_input.get("text", "")
+    tokens = tokenize(text)
+    token_set = set(tokens)
+    rating = review_input.get("rating")
+
+    lexical_score = _score_tokens(tokens)
+    # Escala 1-10 centrada em 5.5; a nota do cliente domina quando existe
+    sentiment_score = 5.5 + lexical_score
+    if rating:
+        sentiment_score = (sentiment_score + (rating * 2 - 1)) / 2
+    sentiment_score = int(round(min(10, max(1, sentiment_score))))
+
+    if sentiment_score >= 7:
+        sentiment = "Positive"
+    elif sentiment_score <= 4:
+        sentiment = "Negative"
+    else:
+        sentiment = "Neutral"
+
+    categories = [
+        category for category, terms in CATEGORY_TERMS.items()
+        if token_set & terms
+    ] if sentiment != "Positive" else []
+
+    if token_set & HIGH_URGENCY_TERMS:
+        urgency = "High"
+    elif sentiment == "Negative" and (len(categories) > 1 or sentiment_score <= 2):
+        urgency = "Medium"
+    else:
+        urgency = "Low"
+
+    # Confiança proporcional à quantidade de evidência léxica encontrada
+    evidence = sum(1 for t in tokens if t in POSITIVE_TERMS or t in NEGATIVE_TERMS)
+    confidence = min(HEURISTIC_MAX_CONFIDENCE, 0.15 + 0.05 * evidence)
+
+    return {
+        "validation_status": "success",
+        "error_message": None,
+        "sentiment": sentiment,
+        "sentiment_score": sentiment_score,
+        "categories": categories,
+        "urgency": urgency,
+        "key_issues": _extract_key_issues(text) if sentiment != "Positive" else [],
+        "customer_id": review_input.get("customer_id", ""),
+        "customer_name": review_input.get("customer_name", ""),
+        "product_name": review_input.get("product_name", ""),
+        "confidence_score": round(confidence, 2)
+    }
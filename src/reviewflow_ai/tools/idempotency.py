@@ -0,0 +1,136 @@
+"""
+Suporte ao header Idempotency-Key nos endpoints de processamento.
+
+A primeira requisição com uma chave executa o processamento em uma tarefa
+própria, desvinculada da conexão: se o cliente desistir por timeout e repetir
+a requisição, a repetição aguarda a mesma execução em vez de iniciar outra.
+Concluída com sucesso, a resposta fica guardada até IDEMPOTENCY_TTL_SECONDS
+(no máximo IDEMPOTENCY_MAX_KEYS chaves, descartando as mais antigas) e é
+devolvida a repetições. Falhas não são guardadas: a próxima repetição executa
+de novo. Reutilizar a chave com outro corpo é rejeitado.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .prompting import compact_json
+
+# Tamanho máximo aceito para a chave
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    """A chave já foi usada com um corpo de requisição diferente."""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "task", "created_at")
+
+    def __init__(self, fingerprint: str, task: asyncio.Task):
+        self.fingerprint = fingerprint
+        self.task = task
+        self.created_at = time.monotonic()
+
+
+def request_fingerprint(body: Any) -> str:
+    """Hash do corpo da requisição (JSON canônico)."""
+    return hashlib.sha256(compact_json(body).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Respostas e execuções em andamento por (endpoint, Idempotency-Key).
+
+    Args:
+        max_keys: Chaves mantidas (as mais antigas são descartadas)
+        ttl_seconds: Tempo de vida de uma resposta guardada
+    """
+
+    def __init__(self, max_keys: int = 10000, ttl_seconds: float = 86400.0):
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self.executed = 0
+        self.replayed = 0
+        self.joined = 0
+        self.conflicts = 0
+        self.evicted = 0
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        execute: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Executa `execute` uma única vez por chave.
+
+        Returns:
+            Tuple: Resposta e se ela foi reaproveitada (guardada ou em andamento)
+
+        Raises:
+            IdempotencyConflict: Chave já usada com outro `fingerprint`
+        """
+        entry_key = (scope, key)
+        entry = self._entries.get(entry_key)
+        if entry is not None and time.monotonic() - entry.created_at > self.ttl_seconds:
+            del self._entries[entry_key]
+            entry = None
+
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyConflict(f"Idempotency-Key '{key}' já usada com outro corpo de requisição")
+            if entry.task.done():
+                self.replayed += 1
+            else:
+                self.joined += 1
+            # shield: a desconexão de quem espera não cancela a execução
+            return await asyncio.shield(entry.task), True
+
+        task = asyncio.ensure_future(execute())
+        entry = self._entries[entry_key] = _Entry(fingerprint, task)
+        task.add_done_callback(lambda t: self._discard_failed(entry_key, entry))
+        self.executed += 1
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+        return await asyncio.shield(task), False
+
+    def _discard_failed(self, entry_key: Tuple[str, str], entry: _Entry) -> None:
+        # Falhas (inclusive HTTPException) não são guardadas
+        if entry.task.cancelled() or entry.task.exception() is not None:
+            if self._entries.get(entry_key) is entry:
+                del self._entries[entry_key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._entries),
+            "in_flight": sum(1 for e in self._entries.values() if not e.task.done()),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "joined_in_flight": self.joined,
+            "conflicts": self.conflicts,
+            "evicted": self.evicted
+        }
+
+
+def validate_idempotency_key(key: Optional[str]) -> Optional[str]:
+    """Normaliza o header; levanta ValueError se a chave for inválida."""
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f"Idempotency-Key deve ter entre 1 e {MAX_KEY_LENGTH} caracteres")
+    return key
+
+
+def create_idempotency_store() -> IdempotencyStore:
+    """Cria o store conforme as configurações IDEMPOTENCY_*."""
+    from ..config import settings
+
+    return IdempotencyStore(max_keys=settings.IDEMPOTENCY_MAX_KEYS, ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS)
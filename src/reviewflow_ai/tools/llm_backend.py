@@ -0,0 +1,229 @@
+"""
+Backend LLM compartilhado pelos agentes.
+Centraliza o cliente OpenAI para que deadlines, cancelamento e o circuit
+breaker sejam aplicados em um único ponto para todas as chamadas.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import asyncio
+import inspect
+import openai
+
+from ..config import settings
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .deadline import Deadline, DeadlineExceeded, run_within_deadline
+from .prompting import count_tokens
+from .tracing import tracer
+
+# Erros que indicam degradação do provedor (contam para o circuit breaker)
+BACKEND_FAILURES = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+@dataclass
+class LLMResponse:
+    """Resposta normalizada de uma chamada ao LLM."""
+    content: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Tokens do prompt servidos do cache de prefixo do provedor
+    cached_tokens: int = 0
+
+
+class OpenAIBackend:
+    """Executa chat completions na API da OpenAI com um cliente reutilizável."""
+
+    def __init__(
+        self,
+        client: Optional[openai.AsyncOpenAI] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self._client = client
+        # Limita chamadas simultâneas; a espera por vaga aparece como queue_wait no trace
+        self._slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=settings.CIRCUIT_RECOVERY_SECONDS
+        )
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        if self._client is None:
+            # Sem retries no SDK: o timeout do provedor chega ao breaker dentro do deadline
+            self._client = openai.AsyncOpenAI(timeout=settings.LLM_TIMEOUT_SECONDS, max_retries=0)
+        return self._client
+
+    async def complete(
+        self,
+        *,
+        stage: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.1,
+        response_format: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> LLMResponse:
+        """
+        Executa uma chamada de chat completion para o estágio informado.
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto (sem chamar a API)
+            DeadlineExceeded: Se o deadline da requisição estourar
+        """
+        kwargs = self._request_kwargs(model, messages, temperature, response_format)
+
+        async def call(kwargs):
+            response = await self.client.chat.completions.create(**kwargs)
+            usage = response.usage
+            details = getattr(usage, "prompt_tokens_details", None)
+            return LLMResponse(
+                content=response.choices[0].message.content or "",
+                model=response.model,
+                prompt_tokens=usage.prompt_tokens if usage else 0,
+                completion_tokens=usage.completion_tokens if usage else 0,
+                cached_tokens=(getattr(details, "cached_tokens", 0) or 0) if details else 0
+            )
+
+        return await self._execute(stage, model, kwargs, deadline, call)
+
+    async def complete_stream(
+        self,
+        *,
+        stage: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        on_delta: Callable[[str], None],
+        temperature: float = 0.1,
+        response_format: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> LLMResponse:
+        """
+        Como `complete`, mas com a resposta em streaming: `on_delta` recebe
+        cada trecho do conteúdo assim que chega.
+
+        Sem uso informado pelo stream (versões do SDK sem `stream_options`),
+        os tokens são contados localmente.
+        """
+        kwargs = self._request_kwargs(model, messages, temperature, response_format)
+        kwargs["stream"] = True
+        if self._stream_usage_supported():
+            kwargs["stream_options"] = {"include_usage": True}
+
+        async def call(kwargs):
+            parts: List[str] = []
+            usage, response_model = None, model
+            stream = await self.client.chat.completions.create(**kwargs)
+            async for chunk in stream:
+                response_model = chunk.model or response_model
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    on_delta(parts[-1])
+            content = "".join(parts)
+            if usage is None:
+                return LLMResponse(
+                    content=content,
+                    model=response_model,
+                    prompt_tokens=sum(count_tokens(m["content"], model) for m in messages),
+                    completion_tokens=count_tokens(content, model)
+                )
+            details = getattr(usage, "prompt_tokens_details", None)
+            return LLMResponse(
+                content=content,
+                model=response_model,
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+                cached_tokens=(getattr(details, "cached_tokens", 0) or 0) if details else 0
+            )
+
+        return await self._execute(stage, model, kwargs, deadline, call)
+
+    def _request_kwargs(self, model, messages, temperature, response_format) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if response_format:
+            kwargs["response_format"] = response_format
+        return kwargs
+
+    def _stream_usage_supported(self) -> bool:
+        return "stream_options" in inspect.signature(self.client.chat.completions.create).parameters
+
+    async def _execute(self, stage, model, kwargs, deadline, call) -> LLMResponse:
+        """Aplica circuit breaker, limite de concorrência e deadline a `call(kwargs)`."""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"LLM circuit open; stage '{stage}' not executed")
+
+        in_network = False
+        full_budget = True
+        try:
+            with tracer.start_span(f"llm.{stage}.queue_wait"):
+                await run_within_deadline(self._slots.acquire(), deadline, stage)
+            try:
+                if deadline is not None:
+                    # Timeout HTTP alinhado ao orçamento restante da requisição
+                    kwargs["timeout"] = min(max(deadline.remaining(), 0.001), settings.LLM_TIMEOUT_SECONDS)
+                    full_budget = kwargs["timeout"] >= settings.LLM_TIMEOUT_SECONDS
+                with tracer.start_span(f"llm.{stage}.network", model=model):
+                    in_network = True
+                    response = await run_within_deadline(call(kwargs), deadline, stage)
+            finally:
+                self._slots.release()
+        except openai.APITimeoutError:
+            # Só é lentidão do provedor se ele teve o LLM_TIMEOUT_SECONDS inteiro;
+            # um timeout encurtado pelo X-Request-Timeout do cliente não conta
+            if full_budget:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_abandoned()
+            raise
+        except BACKEND_FAILURES:
+            self.breaker.record_failure()
+            raise
+        except openai.APIStatusError:
+            # O provedor respondeu (ex.: 400): não indica degradação
+            self.breaker.record_success()
+            raise
+        except DeadlineExceeded:
+            # Prazo esgotado com a chamada em andamento e o orçamento completo do
+            # provedor: ele não respondeu a tempo. Esgotado na fila ou com timeout
+            # encurtado pelo cliente, a falha não é do provedor e não conta.
+            if in_network and full_budget:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_abandoned()
+            raise
+        except BaseException:
+            # Cancelamento por desconexão do cliente: sem resultado, sem culpa do provedor
+            self.breaker.record_abandoned()
+            raise
+
+        self.breaker.record_success()
+        return response
+
+
+def create_llm_backend():
+    """
+    Cria o backend LLM conforme LLM_CASSETTE_MODE.
+    
+    - off: chamadas diretas à OpenAI
+    - record: chamadas à OpenAI gravadas no cassete
+    - replay: respostas servidas do cassete, sem chamadas de rede
+    """
+    from .cassette import CassetteReader, CassetteWriter, RecordingBackend, ReplayBackend
+
+    mode = settings.LLM_CASSETTE_MODE.lower()
+    if mode == "record":
+        return RecordingBackend(OpenAIBackend(), CassetteWriter(settings.LLM_CASSETTE_PATH))
+    if mode == "replay":
+        return ReplayBackend(CassetteReader(settings.LLM_CASSETTE_PATH))
+    return OpenAIBackend()
@@ -0,0 +1,176 @@
+"""
+Roteamento de modelos e métricas de custo/latência por tier.
+
+Cada chamada LLM feita pelos agentes passa por `complete_with_usage`, que
+registra latência, tokens e custo estimado por (estágio, modelo). Para o
+Review Analyzer, que usa uma cascata de modelos, também são contadas as
+escalações de cada tier para o seguinte e o motivo (confiança baixa ou saída
+inválida), para ajustar o limiar de confiança.
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .llm_backend import LLMResponse
+from .token_usage import current_usage
+
+# Latências mantidas por tier para os percentis
+LATENCY_WINDOW = 1000
+
+
+def parse_model_list(value: str) -> List[str]:
+    """'gpt-4o-mini, gpt-4o' -> ['gpt-4o-mini', 'gpt-4o']."""
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+
+def parse_prices(value: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Preços em USD por 1M de tokens, no formato 'modelo=entrada/saída,...'.
+
+    Returns:
+        Dict: Modelo -> (preço de entrada, preço de saída)
+    """
+    prices = {}
+    for part in value.split(","):
+        model, _, price = part.partition("=")
+        if not model.strip():
+            continue
+        prompt_price, _, completion_price = price.partition("/")
+        prices[model.strip()] = (float(prompt_price), float(completion_price or prompt_price))
+    return prices
+
+
+def cached_token_ratio(cached_tokens: int, prompt_tokens: int) -> float:
+    """Fração dos tokens de entrada servida do cache de prefixo do provedor."""
+    return round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class TierStats:
+    """Contadores de um (estágio, modelo)."""
+
+    __slots__ = (
+        "calls", "errors", "escalations", "prompt_tokens", "completion_tokens", "cached_tokens",
+        "cost_usd", "latencies"
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.escalations: Dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cost_usd = 0.0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "escalations": dict(self.escalations),
+            "escalation_rate": round(sum(self.escalations.values()) / self.calls, 4) if self.calls else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_token_ratio": cached_token_ratio(self.cached_tokens, self.prompt_tokens),
+            "cost_usd": round(self.cost_usd, 6),
+            "latency_p50_ms": round(_percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+            "latency_p95_ms": round(_percentile(latencies, 0.95) * 1000, 1) if latencies else None
+        }
+
+
+class ModelUsage:
+    """
+    Métricas de uso por estágio e modelo.
+
+    Args:
+        prices: Modelo -> (USD por 1M tokens de entrada, de saída)
+    """
+
+    def __init__(self, prices: Dict[str, Tuple[float, float]]):
+        self.prices = prices
+        self._tiers: Dict[Tuple[str, str], TierStats] = {}
+
+    def _tier(self, stage: str, model: str) -> TierStats:
+        tier = self._tiers.get((stage, model))
+        if tier is None:
+            tier = self._tiers[(stage, model)] = TierStats()
+        return tier
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prompt_price, completion_price = self.prices.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record_call(self, stage: str, model: str, latency: float, response: Optional[LLMResponse] = None) -> None:
+        tier = self._tier(stage, model)
+        tier.calls += 1
+        tier.latencies.append(latency)
+        if response is None:
+            tier.errors += 1
+            return
+        tier.prompt_tokens += response.prompt_tokens
+        tier.completion_tokens += response.completion_tokens
+        tier.cached_tokens += response.cached_tokens
+        tier.cost_usd += self.cost(model, response.prompt_tokens, response.completion_tokens)
+
+    def record_escalation(self, stage: str, model: str, reason: str) -> None:
+        """Registra que a saída de `model` foi descartada e o próximo tier foi chamado."""
+        escalations = self._tier(stage, model).escalations
+        escalations[reason] = escalations.get(reason, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """{estágio: {modelo: métricas}}."""
+        result: Dict[str, Dict[str, Any]] = {}
+        for (stage, model), tier in self._tiers.items():
+            result.setdefault(stage, {})[model] = tier.to_dict()
+        return result
+
+
+async def complete_with_usage(
+    backend,
+    *,
+    stage: str,
+    model: str,
+    on_delta: Optional[Callable[[str], None]] = None,
+    **kwargs
+) -> LLMResponse:
+    """
+    `backend.complete` registrando latência, tokens e custo em `model_usage`
+    e no escopo de contabilidade da requisição (ver token_usage).
+
+    Com `on_delta`, a resposta é pedida em streaming (`complete_stream`) e
+    cada trecho é repassado; backends sem streaming entregam tudo de uma vez.
+    """
+    started = time.perf_counter()
+    response = None
+    try:
+        if on_delta is None:
+            response = await backend.complete(stage=stage, model=model, **kwargs)
+        elif hasattr(backend, "complete_stream"):
+            response = await backend.complete_stream(stage=stage, model=model, on_delta=on_delta, **kwargs)
+        else:
+            response = await backend.complete(stage=stage, model=model, **kwargs)
+            on_delta(response.content)
+        usage = current_usage()
+        if usage is not None:
+            usage.add(stage, model, response, model_usage.cost(model, response.prompt_tokens, response.completion_tokens))
+        return response
+    finally:
+        model_usage.record_call(stage, model, time.perf_counter() - started, response)
+
+
+def _create_model_usage() -> ModelUsage:
+    from ..config import settings
+
+    return ModelUsage(parse_prices(settings.LLM_PRICES))
+
+
+# Métricas globais do processo, expostas em /api/v1/stats
+model_usage = _create_model_usage()
@@ -0,0 +1,184 @@
+"""
+Índice de reviews quase duplicados (MinHash LSH).
+
+Campanhas de bots e copia-e-cola geram textos quase idênticos que um cache por
+hash exato não detecta. Cada review é reduzido ao conjunto de bigramas de
+palavras do texto normalizado e a uma assinatura MinHash, cuja fração de
+posições iguais estima a similaridade de Jaccard entre dois textos. A busca usa
+LSH por bandas (apenas reviews que coincidem em alguma banda são comparados) e
+o índice é um LRU de tamanho fixo.
+"""
+
+import asyncio
+import hashlib
+import random
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .heuristic_analyzer import tokenize
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+# Campos da análise que identificam o autor e são refeitos ao reutilizá-la
+PERSONAL_FIELDS = ("customer_id", "customer_name", "product_name")
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str) -> Set[str]:
+    """Bigramas de palavras do texto normalizado."""
+    tokens = tokenize(text)
+    return {f"{tokens[i]} {tokens[i + 1]}" for i in range(len(tokens) - 1)}
+
+
+def minhash(features: Set[str]) -> Signature:
+    """Assinatura MinHash de um conjunto de shingles."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "big")
+        for f in features
+    ]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimated_jaccard(a: Signature, b: Signature) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERMUTATIONS
+
+
+def _band_keys(signature: Signature) -> List[int]:
+    return [hash(signature[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+
+
+def personalize_analysis(analysis: Dict[str, Any], review_input: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia da análise com os campos pessoais do review atual."""
+    result = {k: v for k, v in analysis.items() if k != "fallback_reason"}
+    for field in PERSONAL_FIELDS:
+        result[field] = review_input.get(field, "")
+    return result
+
+
+class DuplicateEntry:
+    """Review indexado; `ready` resolve com a análise (ou None se falhou)."""
+
+    __slots__ = ("entry_id", "review_id", "signature", "analysis", "ready")
+
+    def __init__(self, entry_id: int, review_id: str, signature: Signature):
+        self.entry_id = entry_id
+        self.review_id = review_id
+        self.signature = signature
+        self.analysis: Optional[Dict[str, Any]] = None
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class NearDuplicateIndex:
+    """
+    Índice MinHash LSH com LRU.
+
+    Reviews em análise também ficam no índice (entradas pendentes), de modo
+    que cópias que chegam ao mesmo tempo aguardam a análise do primeiro em vez
+    de chamar o LLM cada uma.
+
+    Args:
+        max_entries: Reviews mantidos no índice
+        threshold: Similaridade de Jaccard estimada mínima para duplicata
+        min_tokens: Palavras mínimas para indexar um texto
+    """
+
+    def __init__(self, max_entries: int = 20000, threshold: float = 0.8, min_tokens: int = 6):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self._entries: "OrderedDict[int, DuplicateEntry]" = OrderedDict()
+        self._bands: List[Dict[int, Set[int]]] = [{} for _ in range(BANDS)]
+        self._next_id = 0
+        self.lookups = 0
+        self.hits = 0
+
+    def signature(self, text: str) -> Optional[Signature]:
+        """Assinatura do texto, ou None se for curto demais para comparar."""
+        features = shingles(text)
+        if len(features) < self.min_tokens - 1:
+            return None
+        return minhash(features)
+
+    def find(self, signature: Signature) -> Optional[DuplicateEntry]:
+        """Entrada mais semelhante acima do limiar, se houver."""
+        self.lookups += 1
+        candidates: Set[int] = set()
+        for band, key in enumerate(_band_keys(signature)):
+            candidates |= self._bands[band].get(key, set())
+
+        best, best_score = None, self.threshold
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            score = estimated_jaccard(signature, entry.signature)
+            if score >= best_score:
+                best, best_score = entry, score
+        if best is None:
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(best.entry_id)
+        return best
+
+    def reserve(self, review_id: str, signature: Signature) -> DuplicateEntry:
+        """Registra um review em análise; conclua com `resolve` ou `discard`."""
+        entry = DuplicateEntry(self._next_id, review_id, signature)
+        self._next_id += 1
+        self._entries[entry.entry_id] = entry
+        for band, key in enumerate(_band_keys(signature)):
+            self._bands[band].setdefault(key, set()).add(entry.entry_id)
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._unlink(evicted)
+        return entry
+
+    def resolve(self, entry: DuplicateEntry, analysis: Dict[str, Any]) -> None:
+        entry.analysis = analysis
+        if not entry.ready.done():
+            entry.ready.set_result(analysis)
+
+    def discard(self, entry: DuplicateEntry) -> None:
+        """Remove uma entrada cuja análise falhou; quem aguardava analisa por conta própria."""
+        if self._entries.pop(entry.entry_id, None) is not None:
+            self._unlink(entry)
+        if not entry.ready.done():
+            entry.ready.set_result(None)
+
+    def _unlink(self, entry: DuplicateEntry) -> None:
+        for band, key in enumerate(_band_keys(entry.signature)):
+            bucket = self._bands[band].get(key)
+            if bucket is not None:
+                bucket.discard(entry.entry_id)
+                if not bucket:
+                    del self._bands[band][key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0
+        }
+
+
+def create_near_duplicate_index() -> NearDuplicateIndex:
+    """Cria o índice conforme as configurações DUPLICATE_*."""
+    from ..config import settings
+
+    return NearDuplicateIndex(
+        max_entries=settings.DUPLICATE_INDEX_SIZE,
+        threshold=settings.DUPLICATE_SIMILARITY_THRESHOLD,
+        min_tokens=settings.DUPLICATE_MIN_TOKENS
+    )
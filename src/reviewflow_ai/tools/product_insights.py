@@ -0,0 +1,167 @@
+"""
+Agregados de sentimento por produto e por categoria, mantidos em streaming.
+
+Cada análise concluída atualiza contadores e somas em O(1) (um número fixo de
+chaves por review). Além do acumulado total, uma janela deslizante com buckets
+de tempo mantém os totais recentes incrementalmente: ao avançar o relógio,
+apenas os buckets expirados são subtraídos. Consultas leem os totais prontos,
+em tempo constante.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ..models.data_models import ReviewAnalysis
+
+
+def analysis_deltas(analysis: ReviewAnalysis) -> Counter:
+    """Contribuição de uma análise para os agregados."""
+    deltas = Counter({"reviews": 1})
+    if analysis.sentiment:
+        deltas[f"sentiment.{analysis.sentiment.value}"] += 1
+    if analysis.sentiment_score is not None:
+        deltas["score_sum"] += analysis.sentiment_score
+        deltas["score_count"] += 1
+    if analysis.confidence_score is not None:
+        deltas["confidence_sum"] += analysis.confidence_score
+    if analysis.urgency:
+        deltas[f"urgency.{analysis.urgency.value}"] += 1
+    for category in analysis.categories:
+        deltas[f"category.{category.value}"] += 1
+    return deltas
+
+
+def summarize(totals: Counter) -> Dict[str, Any]:
+    """Converte os contadores brutos na visão exposta pela API."""
+    reviews = totals.get("reviews", 0)
+    score_count = totals.get("score_count", 0)
+
+    def group(prefix: str) -> Dict[str, int]:
+        return {
+            key[len(prefix):]: int(value)
+            for key, value in totals.items()
+            if key.startswith(prefix) and value
+        }
+
+    return {
+        "reviews": int(reviews),
+        "sentiment": group("sentiment."),
+        "negative_rate": round(totals.get("sentiment.Negative", 0) / reviews, 4) if reviews else 0.0,
+        "average_sentiment_score": round(totals["score_sum"] / score_count, 2) if score_count else None,
+        "average_confidence": round(totals.get("confidence_sum", 0) / reviews, 3) if reviews else None,
+        "urgency": group("urgency."),
+        "categories": group("category.")
+    }
+
+
+class SlidingWindow:
+    """
+    Janela deslizante de `bucket_count` buckets de `bucket_seconds` cada.
+
+    `total` é sempre a soma dos buckets vivos; avançar o relógio expira no
+    máximo `bucket_count` buckets, então a atualização é O(1) amortizado.
+    """
+
+    def __init__(self, bucket_seconds: float, bucket_count: int):
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self.buckets: List[Counter] = [Counter() for _ in range(bucket_count)]
+        self.head: Optional[int] = None
+        self.total: Counter = Counter()
+
+    def _advance(self, bucket_id: int) -> None:
+        if self.head is not None and bucket_id <= self.head:
+            return
+        first = bucket_id - self.bucket_count + 1
+        if self.head is not None:
+            first = max(first, self.head + 1)
+        for expired_id in range(first, bucket_id + 1):
+            slot = expired_id % self.bucket_count
+            if self.buckets[slot]:
+                self.total.subtract(self.buckets[slot])
+                self.buckets[slot] = Counter()
+        self.head = bucket_id
+
+    def add(self, timestamp: float, deltas: Counter) -> None:
+        bucket_id = int(timestamp // self.bucket_seconds)
+        self._advance(bucket_id)
+        if bucket_id <= self.head - self.bucket_count:
+            return  # Mais antigo que a janela
+        slot = bucket_id % self.bucket_count
+        self.buckets[slot].update(deltas)
+        self.total.update(deltas)
+
+    def totals(self, now: float) -> Counter:
+        self._advance(int(now // self.bucket_seconds))
+        return self.total
+
+    def series(self, now: float) -> List[Dict[str, Any]]:
+        """Reviews e negativos por bucket, do mais antigo ao mais recente."""
+        self._advance(int(now // self.bucket_seconds))
+        points = []
+        for bucket_id in range(self.head - self.bucket_count + 1, self.head + 1):
+            bucket = self.buckets[bucket_id % self.bucket_count]
+            points.append({
+                "start": datetime.fromtimestamp(bucket_id * self.bucket_seconds).isoformat(),
+                "reviews": int(bucket.get("reviews", 0)),
+                "negative": int(bucket.get("sentiment.Negative", 0))
+            })
+        return points
+
+
+class InsightAggregate:
+    """Acumulado total e janela deslizante de uma chave (produto ou categoria)."""
+
+    def __init__(self, bucket_seconds: float, bucket_count: int):
+        self.total: Counter = Counter()
+        self.window = SlidingWindow(bucket_seconds, bucket_count)
+        self.updated_at: Optional[float] = None
+
+    def add(self, timestamp: float, deltas: Counter) -> None:
+        self.total.update(deltas)
+        self.window.add(timestamp, deltas)
+        self.updated_at = max(self.updated_at or timestamp, timestamp)
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "all_time": summarize(self.total),
+            "window": {
+                "hours": round(self.window.bucket_seconds * self.window.bucket_count / 3600, 2),
+                **summarize(self.window.totals(now))
+            },
+            "buckets": self.window.series(now),
+            "updated_at": datetime.fromtimestamp(self.updated_at).isoformat() if self.updated_at else None
+        }
+
+
+class ProductInsights:
+    """Agregados por product_id e por categoria de problema."""
+
+    def __init__(self, window_hours: float = 24, bucket_minutes: float = 60):
+        self.bucket_seconds = bucket_minutes * 60
+        self.bucket_count = max(1, int(round(window_hours * 60 / bucket_minutes)))
+        self.products: Dict[str, InsightAggregate] = {}
+        self.categories: Dict[str, InsightAggregate] = {}
+
+    def _aggregate(self, table: Dict[str, InsightAggregate], key: str) -> InsightAggregate:
+        aggregate = table.get(key)
+        if aggregate is None:
+            aggregate = table[key] = InsightAggregate(self.bucket_seconds, self.bucket_count)
+        return aggregate
+
+    def record(self, analysis: ReviewAnalysis, product_id: Optional[str], timestamp: float) -> None:
+        """Incorpora uma análise concluída aos agregados do produto e das categorias."""
+        deltas = analysis_deltas(analysis)
+        if product_id:
+            self._aggregate(self.products, product_id).add(timestamp, deltas)
+        for category in analysis.categories:
+            self._aggregate(self.categories, category.value).add(timestamp, deltas)
+
+    def product_snapshot(self, product_id: str, now: float) -> Optional[Dict[str, Any]]:
+        aggregate = self.products.get(product_id)
+        return {"product_id": product_id, **aggregate.snapshot(now)} if aggregate else None
+
+    def category_snapshot(self, category: str, now: float) -> Optional[Dict[str, Any]]:
+        aggregate = self.categories.get(category)
+        return {"category": category, **aggregate.snapshot(now)} if aggregate else None
@@ -218,5 +218,5 @@ def get_product_info_json(product_id: str) -> Optional[str]:
     """
     product = get_product_info(product_id)
     if product:
-        return product.model_dump_json(indent=2, ensure_ascii=False)
+        return product.model_dump_json(indent=2)
     return None
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Profiling sob demanda por requisição.
+
+Um profiler de amostragem observa a thread do event loop enquanto o review
+perfilado está em andamento. Cada amostra é classificada como `cpu` (a tarefa
+perfilada está executando) ou `wait` (a tarefa está suspensa em um await, com a
+pilha de awaits no momento da amostra). O tempo de CPU da tarefa é medido
+passo a passo; `wall - cpu` é o tempo de espera assíncrona.
+
+A saída `.folded` usa o formato de pilhas colapsadas (flamegraph.pl,
+speedscope, inferno) e o `.json` traz o resumo de tempos.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Coroutine, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class _TaskCPUTimer:
+    """Awaitable que mede o tempo de CPU gasto em cada passo da corrotina."""
+
+    def __init__(self, coro):
+        self._coro = coro
+        self.cpu_seconds = 0.0
+
+    def __await__(self):
+        coro = self._coro
+        send_value, throw_exc = None, None
+        while True:
+            started = time.thread_time()
+            try:
+                if throw_exc is not None:
+                    yielded = coro.throw(throw_exc)
+                else:
+                    yielded = coro.send(send_value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.cpu_seconds += time.thread_time() - started
+
+            try:
+                send_value, throw_exc = (yield yielded), None
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as e:
+                send_value, throw_exc = None, e
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame, root_code) -> List[str]:
+    """Pilha da thread (raiz → topo), começando na corrotina perfilada."""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame.f_code))
+        if frame.f_code is root_code:
+            break
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_stack(coro) -> List[str]:
+    """Cadeia de awaits de uma corrotina suspensa (raiz → ponto de espera)."""
+    stack = []
+    awaitable = coro
+    while awaitable is not None:
+        code = getattr(awaitable, "cr_code", None) or getattr(awaitable, "gi_code", None)
+        if code is None:
+            stack.append(type(awaitable).__name__)
+            break
+        stack.append(_frame_label(code))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return stack
+
+
+class _Sampler(threading.Thread):
+    """Thread que amostra a thread do event loop em intervalos fixos."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, task: asyncio.Task, coro, interval: float):
+        super().__init__(name="reviewflow-profiler", daemon=True)
+        self.loop = loop
+        self.task = task
+        self.coro = coro
+        self.interval = interval
+        self.loop_thread_id = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                # Leituras concorrentes de estruturas do loop podem falhar; descarta a amostra
+                self.samples["dropped"] += 1
+
+    def _sample(self) -> None:
+        running = asyncio.current_task(self.loop)
+        if running is self.task:
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                self.stacks[";".join(["cpu"] + _thread_stack(frame, self.coro.cr_code))] += 1
+                self.samples["cpu"] += 1
+        elif not self.task.done():
+            self.stacks[";".join(["wait"] + _await_stack(self.coro))] += 1
+            # Loop ocupado com outra tarefa: a espera inclui contenção do loop
+            self.samples["wait_loop_busy" if running is not None else "wait_idle"] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfiler:
+    """
+    Decide quando perfilar uma requisição e grava o resultado em disco.
+
+    Args:
+        output_dir: Diretório de saída dos perfis
+        sample_rate: Fração de requisições perfiladas automaticamente
+        interval: Intervalo de amostragem em segundos
+        admin_token: Token exigido no header para perfilar sob demanda
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        sample_rate: float = 0.0,
+        interval: float = 0.005,
+        admin_token: Optional[str] = None,
+        max_concurrent: int = 2
+    ):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.admin_token = admin_token
+        self.max_concurrent = max_concurrent
+        self._active = 0
+
+    def should_profile(self, profile_header: Optional[str], admin_token: Optional[str]) -> bool:
+        """Header X-Profile com token de admin válido, ou amostragem aleatória."""
+        if self._active >= self.max_concurrent:
+            return False
+        if profile_header and self.admin_token and admin_token == self.admin_token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def profile(self, coro: Coroutine[Any, Any, T], label: str) -> Tuple[T, str]:
+        """
+        Executa `coro` na tarefa atual sob o profiler de amostragem.
+
+        O perfil é gravado em `<output_dir>/<profile_id>.folded` e `.json`.
+
+        Returns:
+            Tuple: Resultado da corrotina e o profile_id gravado
+        """
+        loop = asyncio.get_running_loop()
+        sampler = _Sampler(loop, asyncio.current_task(), coro, self.interval)
+        timer = _TaskCPUTimer(coro)
+        # O label vem do review (id do cliente): só caracteres seguros no nome do arquivo
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]", "_", label)[:100]
+        profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{safe_label}"
+
+        self._active += 1
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            result = await timer
+        finally:
+            wall = time.perf_counter() - started
+            sampler.stop()
+            self._active -= 1
+            summary = {
+                "profile_id": profile_id,
+                "label": label,
+                "wall_seconds": round(wall, 6),
+                "cpu_seconds": round(timer.cpu_seconds, 6),
+                "async_wait_seconds": round(max(0.0, wall - timer.cpu_seconds), 6),
+                "sampling_interval_seconds": self.interval,
+                "samples": dict(sampler.samples)
+            }
+            try:
+                await asyncio.to_thread(self._write, profile_id, sampler.stacks, summary)
+            except Exception as e:
+                # Falha ao gravar o perfil (disco cheio, permissão) não falha a requisição
+                logger.warning(f"Não foi possível gravar o perfil {profile_id}: {e}")
+        return result, profile_id
+
+    def _write(self, profile_id: str, stacks: Counter, summary: Dict[str, Any]) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, profile_id)
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
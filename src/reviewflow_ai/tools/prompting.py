@@ -0,0 +1,134 @@
+"""
+Montagem de prompts para o cache de prefixo do provedor.
+
+O provedor reaproveita o processamento do maior prefixo idêntico entre
+requisições (a partir de ~1024 tokens). Por isso as mensagens seguem sempre a
+mesma ordem: prompt de sistema versionado e imutável, instrução fixa, contexto
+em JSON compacto com campos estáveis primeiro e, por último, o texto do
+review, que é o que mais varia. O texto é limitado a PROMPT_MAX_REVIEW_TOKENS
+tokens, contados com o tokenizer do modelo (tiktoken) ou estimados por
+caracteres quando ele não estiver disponível.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # requirements-production.txt pode não incluir o tiktoken
+    tiktoken = None
+
+# Estimativa usada sem tokenizer
+CHARS_PER_TOKEN = 4
+
+# Marca inserida no lugar do trecho removido de reviews longos
+TRUNCATION_MARK = " [...] "
+
+# Fração do orçamento mantida do início do review (o restante vem do fim)
+HEAD_FRACTION = 0.7
+
+
+@lru_cache(maxsize=16)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Arquivos BPE indisponíveis (ex.: sem rede no primeiro uso)
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Tokens de `text` no tokenizer de `model` (ou estimativa por caracteres)."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> Tuple[str, bool]:
+    """
+    Limita `text` a cerca de `max_tokens`, mantendo o início e o fim.
+
+    Returns:
+        Tuple: Texto (possivelmente encurtado) e se houve corte
+    """
+    if max_tokens <= 0 or count_tokens(text, model) <= max_tokens:
+        return text, False
+    head = int(max_tokens * HEAD_FRACTION)
+    tail = max_tokens - head
+    encoding = _encoding(model)
+    if encoding is None:
+        head_chars, tail_chars = head * CHARS_PER_TOKEN, tail * CHARS_PER_TOKEN
+        return text[:head_chars].rstrip() + TRUNCATION_MARK + text[-tail_chars:].lstrip(), True
+    tokens = encoding.encode(text)
+    return (
+        encoding.decode(tokens[:head]).rstrip() + TRUNCATION_MARK + encoding.decode(tokens[-tail:]).lstrip(),
+        True
+    )
+
+
+def compact_json(value: Any) -> str:
+    """JSON sem espaços nem indentação."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def system_message(version: str, prompt: str) -> Dict[str, str]:
+    """Prompt de sistema com a versão no início (muda a versão, muda o prefixo)."""
+    return {"role": "system", "content": f"Prompt version: {version}\n{prompt.strip()}"}
+
+
+class PromptStats:
+    """Reviews encurtados pelo orçamento de tokens, por estágio."""
+
+    def __init__(self):
+        self.versions: Dict[str, str] = {}
+        self.truncated: Dict[str, int] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"versions": dict(self.versions), "truncated_reviews": dict(self.truncated)}
+
+
+# Métricas globais do processo, expostas em /api/v1/stats
+prompt_stats = PromptStats()
+
+
+def build_messages(
+    *,
+    stage: str,
+    version: str,
+    system_prompt: str,
+    instruction: str,
+    context: Dict[str, Any],
+    text_field: Optional[str],
+    text: Optional[str],
+    model: str,
+    max_text_tokens: Optional[int] = None
+) -> List[Dict[str, str]]:
+    """
+    Mensagens na ordem favorável ao cache: sistema, instrução, contexto e, por
+    último, o texto do review (limitado a `max_text_tokens`).
+
+    Args:
+        context: Campos do payload JSON, na ordem em que devem aparecer
+        text_field: Nome do campo do texto, acrescentado ao final do payload
+        max_text_tokens: Orçamento do texto (padrão: PROMPT_MAX_REVIEW_TOKENS)
+    """
+    from ..config import settings
+
+    prompt_stats.versions[stage] = version
+    payload = dict(context)
+    if text_field is not None:
+        budget = settings.PROMPT_MAX_REVIEW_TOKENS if max_text_tokens is None else max_text_tokens
+        text, truncated = truncate_to_tokens(text or "", budget, model)
+        if truncated:
+            prompt_stats.truncated[stage] = prompt_stats.truncated.get(stage, 0) + 1
+        payload[text_field] = text
+    return [
+        system_message(version, system_prompt),
+        {"role": "user", "content": f"{instruction}\n{compact_json(payload)}"}
+    ]
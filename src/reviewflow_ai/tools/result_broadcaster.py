@@ -0,0 +1,124 @@
+"""
+Distribuição de resultados processados para assinantes (WebSocket).
+
+Cada assinante tem uma fila limitada própria. A publicação nunca espera por um
+assinante: se a fila estiver cheia, a mensagem mais antiga é descartada e o
+assinante recebe, antes das próximas, um aviso com a quantidade perdida. Assim
+um navegador parado não segura o event loop nem faz a memória crescer.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+from ..models.data_models import ProcessingResult
+
+# Campos pelos quais um assinante pode filtrar
+FILTER_FIELDS = ("batch_id", "product_id", "workflow_path")
+
+
+def result_summary(result: ProcessingResult, batch_id: Optional[str] = None) -> Dict[str, Any]:
+    """Resumo de um ProcessingResult enviado aos assinantes."""
+    analysis = result.analysis
+    return {
+        "review_id": result.workflow.review_id,
+        "batch_id": batch_id,
+        "customer_id": result.review_input.customer_id,
+        "product_id": result.review_input.product_id,
+        "workflow_path": result.workflow.workflow_path.value,
+        "status": result.status,
+        "sentiment": analysis.sentiment.value if analysis.sentiment else None,
+        "urgency": analysis.urgency.value if analysis.urgency else None,
+        "priority_level": result.workflow.priority_level,
+        "escalation_needed": bool(result.escalation and result.escalation.escalation_needed),
+        "processing_time": round(result.processing_time, 3),
+        "timestamp": result.timestamp.isoformat()
+    }
+
+
+class ResultSubscriber:
+    """
+    Fila limitada de um assinante.
+
+    Args:
+        filters: Valores exigidos em FILTER_FIELDS (ausentes = qualquer valor)
+        max_queue: Mensagens pendentes antes de descartar as mais antigas
+    """
+
+    def __init__(self, filters: Dict[str, Optional[str]], max_queue: int = 100):
+        self.filters = {k: v for k, v in filters.items() if k in FILTER_FIELDS and v}
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._pending_dropped = 0
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+
+    def matches(self, summary: Dict[str, Any]) -> bool:
+        return all(summary.get(field) == value for field, value in self.filters.items())
+
+    def offer(self, summary: Dict[str, Any]) -> None:
+        """Enfileira sem bloquear, descartando a mensagem mais antiga se cheio."""
+        if len(self._queue) >= self.max_queue:
+            self._queue.popleft()
+            self._pending_dropped += 1
+            self.dropped += 1
+        self._queue.append(summary)
+        self._ready.set()
+
+    async def next_message(self) -> Dict[str, Any]:
+        """Próxima mensagem: aviso de descarte (se houve) ou resultado."""
+        while not self._queue:
+            self._ready.clear()
+            await self._ready.wait()
+        if self._pending_dropped:
+            count, self._pending_dropped = self._pending_dropped, 0
+            return {"type": "dropped", "count": count}
+        return {"type": "result", "data": self._queue.popleft()}
+
+
+class ResultBroadcaster:
+    """
+    Assinantes ativos e publicação de resultados.
+
+    Args:
+        max_queue: Tamanho da fila de cada assinante
+        max_subscribers: Limite de assinantes simultâneos
+    """
+
+    def __init__(self, max_queue: int = 100, max_subscribers: int = 500):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self.published = 0
+        self._subscribers: Set[ResultSubscriber] = set()
+
+    def subscribe(self, filters: Dict[str, Optional[str]]) -> Optional[ResultSubscriber]:
+        """Novo assinante, ou None se o limite foi atingido."""
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        subscriber = ResultSubscriber(filters, self.max_queue)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: ResultSubscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def publish(self, summary: Dict[str, Any]) -> None:
+        """Entrega o resumo aos assinantes cujos filtros ele atende (não bloqueia)."""
+        self.published += 1
+        for subscriber in self._subscribers:
+            if subscriber.matches(summary):
+                subscriber.offer(summary)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped_for_active_subscribers": sum(s.dropped for s in self._subscribers)
+        }
+
+
+def create_result_broadcaster() -> ResultBroadcaster:
+    """Cria o distribuidor conforme as configurações WS_*."""
+    from ..config import settings
+
+    return ResultBroadcaster(max_queue=settings.WS_QUEUE_SIZE, max_subscribers=settings.WS_MAX_SUBSCRIBERS)
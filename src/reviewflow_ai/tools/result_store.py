@@ -0,0 +1,204 @@
+"""
+Armazenamento indexado dos resultados de processamento (SQLite embutido).
+
+Cada ProcessingResult é persistido com colunas indexadas para os filtros mais
+usados pela moderação. As consultas usam paginação por keyset sobre
+(timestamp, id), de modo que cada página é uma busca em índice em vez de um
+OFFSET que varre as linhas anteriores.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..models.data_models import ProcessingResult
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    review_id TEXT NOT NULL,
+    customer_id TEXT,
+    product_id TEXT,
+    sentiment TEXT,
+    workflow_path TEXT,
+    batch_id TEXT,
+    ts REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_review ON results (review_id, ts);
+CREATE INDEX IF NOT EXISTS idx_results_customer ON results (customer_id, ts, id);
+CREATE INDEX IF NOT EXISTS idx_results_product ON results (product_id, ts, id);
+CREATE INDEX IF NOT EXISTS idx_results_sentiment ON results (sentiment, ts, id);
+CREATE INDEX IF NOT EXISTS idx_results_path ON results (workflow_path, ts, id);
+CREATE INDEX IF NOT EXISTS idx_results_path_product ON results (workflow_path, product_id, ts, id);
+CREATE INDEX IF NOT EXISTS idx_results_batch ON results (batch_id, ts, id);
+CREATE INDEX IF NOT EXISTS idx_results_ts ON results (ts, id);
+"""
+
+# Colunas filtráveis por igualdade na API de consulta
+FILTER_COLUMNS = ("review_id", "customer_id", "product_id", "sentiment", "workflow_path", "batch_id")
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(ts: float, row_id: int) -> str:
+    """Cursor opaco para a próxima página."""
+    return base64.urlsafe_b64encode(f"{ts!r}|{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return float(ts), int(row_id)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+
+class ResultStore:
+    """
+    Repositório de ProcessingResult sobre SQLite.
+
+    A conexão é compartilhada entre threads e protegida por lock; os métodos
+    `*_async` executam a operação em uma thread para não bloquear o event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def save(self, result: ProcessingResult, batch_id: Optional[str] = None) -> int:
+        """Persiste um resultado e retorna o id da linha."""
+        row = (
+            result.workflow.review_id,
+            result.review_input.customer_id,
+            result.review_input.product_id,
+            result.analysis.sentiment.value if result.analysis.sentiment else None,
+            result.workflow.workflow_path.value,
+            batch_id,
+            result.timestamp.timestamp(),
+            result.model_dump_json()
+        )
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO results (review_id, customer_id, product_id, sentiment, "
+                "workflow_path, batch_id, ts, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                row
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def get(self, review_id: str) -> Optional[Dict[str, Any]]:
+        """Resultado mais recente de um review."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM results WHERE review_id = ? ORDER BY ts DESC LIMIT 1",
+                (review_id,)
+            ).fetchone()
+        return json.loads(row["payload"]) if row else None
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Optional[str]]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lista resultados do mais recente para o mais antigo.
+
+        Args:
+            filters: Igualdade por coluna (ver FILTER_COLUMNS); None é ignorado
+            since / until: Intervalo de timestamp (epoch, segundos)
+            limit: Tamanho da página (máximo MAX_PAGE_SIZE)
+            cursor: Cursor retornado pela página anterior
+
+        Returns:
+            Tuple: Itens da página e cursor da próxima página (None no fim)
+        """
+        clauses, params = [], []
+        for column, value in (filters or {}).items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Filtro não suportado: {column}")
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if cursor:
+            cursor_ts, cursor_id = decode_cursor(cursor)
+            clauses.append("(ts < ? OR (ts = ? AND id < ?))")
+            params.extend([cursor_ts, cursor_ts, cursor_id])
+
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT id, ts, payload FROM results {where} ORDER BY ts DESC, id DESC LIMIT ?"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["ts"], rows[-1]["id"])
+        return [json.loads(row["payload"]) for row in rows], next_cursor
+
+    def iter_payloads(self, chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Todos os resultados, do mais antigo ao mais recente, lidos em blocos."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, payload FROM results WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            for row in rows:
+                yield json.loads(row["payload"])
+
+    async def save_async(self, result: ProcessingResult, batch_id: Optional[str] = None) -> int:
+        return await asyncio.to_thread(self.save, result, batch_id)
+
+    async def get_async(self, review_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, review_id)
+
+    async def query_async(self, **kwargs) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await asyncio.to_thread(self.query, **kwargs)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_result_store(database_url: Optional[str]) -> ResultStore:
+    """
+    Cria o ResultStore a partir de DATABASE_URL.
+
+    Aceita `sqlite:///caminho/arquivo.db` ou `sqlite:///:memory:`; sem URL,
+    usa `data/reviewflow.db`.
+    """
+    if not database_url:
+        return ResultStore(os.path.join("data", "reviewflow.db"))
+    if database_url.startswith("sqlite:///"):
+        return ResultStore(database_url[len("sqlite:///"):])
+    raise ValueError(f"DATABASE_URL não suportada (apenas sqlite:///): {database_url}")
@@ -0,0 +1,301 @@
+"""
+Roteamento de lotes entre nós por hashing consistente.
+
+Todos os reviews de um mesmo cliente (SHARD_KEY, com product_id como
+alternativa) vão para o mesmo nó, mantendo quentes os caches locais
+(near-duplicate, LRU do cache compartilhado) e os agregados por cliente, e
+permitindo processá-los em ordem. O anel usa SHARD_VIRTUAL_NODES pontos por
+nó para equilibrar a carga; quando um nó entra ou sai (health check), apenas
+as chaves dele mudam de dono, cerca de 1/N do total.
+
+O nó que recebe o lote processa a sua parte e encaminha as demais para os
+donos via `POST /api/v1/reviews/batch` com o header X-Shard-Forwarded (o
+destino processa sem reencaminhar). A parte é assinada com HMAC-SHA256 de
+SHARD_SECRET sobre batch_id, orçamento e corpo (X-Shard-Signature): sem
+assinatura válida, o destino recusa os headers de encaminhamento. Se o dono
+não responder, ele sai do anel e a parte é roteada de novo.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+FORWARDED_HEADER = "X-Shard-Forwarded"
+BATCH_ID_HEADER = "X-Batch-Id"
+SIGNATURE_HEADER = "X-Shard-Signature"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def parse_nodes(value: str) -> Dict[str, str]:
+    """'node-a=http://10.0.0.1:8000,node-b=...' -> {'node-a': 'http://10.0.0.1:8000', ...}."""
+    nodes = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, url = item.partition("=")
+        if not url:
+            raise ValueError(f"Nó inválido em SHARD_NODES: '{item}' (esperado nome=url)")
+        nodes[name.strip()] = url.strip().rstrip("/")
+    return nodes
+
+
+class HashRing:
+    """
+    Anel de hashing consistente com nós virtuais.
+
+    Args:
+        nodes: Nós iniciais
+        vnodes: Pontos no anel por nó
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 160):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes: set = set()
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def node_for(self, key: str) -> Optional[str]:
+        """Primeiro nó no sentido horário a partir do hash da chave."""
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+class KeyedSerializer:
+    """
+    Executa as tarefas de uma mesma chave uma de cada vez, na ordem de chegada.
+
+    A ordem é a das chamadas a `run`; chaves diferentes seguem em paralelo.
+    """
+
+    def __init__(self):
+        self._tails: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, execute: Callable[[], Awaitable[Any]]) -> Any:
+        previous = self._tails.get(key)
+        done = asyncio.get_running_loop().create_future()
+        self._tails[key] = done
+        try:
+            if previous is not None:
+                await asyncio.shield(previous)
+            return await execute()
+        finally:
+            done.set_result(None)
+            if self._tails.get(key) is done:
+                del self._tails[key]
+
+
+class ShardRouter:
+    """
+    Membros do cluster, anel e encaminhamento de partes de lotes.
+
+    Args:
+        nodes: Nome -> URL base de cada nó (incluindo este)
+        self_name: Nome deste nó em `nodes`
+        key_field: Campo do review usado como chave (ex.: customer_id)
+        fallback_field: Campo usado quando `key_field` está vazio
+        vnodes: Nós virtuais por nó
+        health_interval: Intervalo (s) do health check dos outros nós
+        timeout: Timeout (s) do health check e do encaminhamento
+        secret: Segredo compartilhado que assina as partes encaminhadas
+    """
+
+    def __init__(
+        self,
+        nodes: Dict[str, str],
+        self_name: str = "",
+        key_field: str = "customer_id",
+        fallback_field: str = "product_id",
+        vnodes: int = 160,
+        health_interval: float = 5.0,
+        timeout: float = 10.0,
+        secret: str = ""
+    ):
+        if nodes and self_name not in nodes:
+            raise ValueError(f"SHARD_SELF '{self_name}' não está em SHARD_NODES")
+        if len(nodes) > 1 and not secret:
+            raise ValueError("SHARD_SECRET é obrigatório com mais de um nó em SHARD_NODES")
+        self.secret = secret
+        self.nodes = nodes
+        self.self_name = self_name
+        self.key_field = key_field
+        self.fallback_field = fallback_field
+        self.health_interval = health_interval
+        self.timeout = timeout
+        self.ring = HashRing(nodes, vnodes)
+        self.serializer = KeyedSerializer()
+        self.down: Dict[str, float] = {}
+        self.rebalances: List[Dict[str, Any]] = []
+        self.routed: Dict[str, int] = {name: 0 for name in nodes}
+        self.forward_errors = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.nodes) > 1
+
+    def shard_key(self, review: Dict[str, Any]) -> str:
+        return str(review.get(self.key_field) or review.get(self.fallback_field) or review.get("id") or "")
+
+    def owner(self, review: Dict[str, Any]) -> str:
+        return self.ring.node_for(self.shard_key(review)) or self.self_name
+
+    def partition(self, reviews: List[Any]) -> Dict[str, List[Any]]:
+        """Reviews (ReviewInput ou dict) agrupados pelo nó dono, na ordem original."""
+        parts: Dict[str, List[Any]] = {}
+        for review in reviews:
+            data = review.model_dump() if hasattr(review, "model_dump") else review
+            node = self.owner(data)
+            parts.setdefault(node, []).append(review)
+            self.routed[node] = self.routed.get(node, 0) + 1
+        return parts
+
+    def _membership_changed(self, node: str, action: str) -> None:
+        self.rebalances.append({"node": node, "action": action, "at": time.time(), "members": self.ring.nodes})
+        del self.rebalances[:-20]
+        logger.warning(
+            f"Anel de shards: nó {node} {action}; {len(self.ring.nodes)} membros, "
+            f"~1/{max(len(self.ring.nodes), 1)} das chaves mudam de dono"
+        )
+
+    def mark_down(self, node: str) -> None:
+        if node == self.self_name or node in self.down:
+            return
+        self.down[node] = time.time()
+        self.ring.remove(node)
+        self._membership_changed(node, "removido")
+
+    def mark_up(self, node: str) -> None:
+        if self.down.pop(node, None) is None:
+            return
+        self.ring.add(node)
+        self._membership_changed(node, "readicionado")
+
+    def sign(self, batch_id: str, token_budget: Optional[int], body: bytes) -> str:
+        message = f"{batch_id}\n{token_budget}\n".encode() + body
+        return "sha256=" + hmac.new(self.secret.encode(), message, hashlib.sha256).hexdigest()
+
+    def verify(
+        self, origin: Optional[str], signature: Optional[str], batch_id: str,
+        token_budget: Optional[int], body: bytes
+    ) -> bool:
+        """A parte veio de um nó do cluster (assinatura com SHARD_SECRET)?"""
+        if not self.enabled or origin not in self.nodes or not signature or not batch_id:
+            return False
+        return hmac.compare_digest(signature, self.sign(batch_id, token_budget, body))
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        self._client = httpx.AsyncClient(timeout=self.timeout)
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def _check(self, node: str) -> None:
+        try:
+            response = await self._client.get(f"{self.nodes[node]}/health")
+            healthy = response.status_code == 200 and response.json().get("status") != "unhealthy"
+        except (httpx.HTTPError, ValueError):
+            healthy = False
+        if healthy:
+            self.mark_up(node)
+        else:
+            self.mark_down(node)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.gather(*(self._check(node) for node in self.nodes if node != self.self_name))
+            await asyncio.sleep(self.health_interval)
+
+    async def forward(
+        self, node: str, batch_id: str, reviews: List[Any], token_budget: Optional[int]
+    ) -> Dict[str, Any]:
+        """Envia uma parte do lote ao nó dono; levanta httpx.HTTPError se falhar."""
+        params = {} if token_budget is None else {"token_budget": token_budget}
+        body = json.dumps(
+            [r.model_dump(mode="json") if hasattr(r, "model_dump") else r for r in reviews],
+            ensure_ascii=False
+        ).encode()
+        response = await self._client.post(
+            f"{self.nodes[node]}/api/v1/reviews/batch",
+            content=body,
+            params=params,
+            headers={
+                "Content-Type": "application/json",
+                FORWARDED_HEADER: self.self_name,
+                BATCH_ID_HEADER: batch_id,
+                SIGNATURE_HEADER: self.sign(batch_id, token_budget, body)
+            }
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "self": self.self_name,
+            "key_field": self.key_field,
+            "members": self.ring.nodes,
+            "down": sorted(self.down),
+            "routed_reviews": dict(self.routed),
+            "forward_errors": self.forward_errors,
+            "rebalances": list(self.rebalances)
+        }
+
+
+def create_shard_router() -> ShardRouter:
+    """Cria o roteador conforme as configurações SHARD_* (vazio = nó único)."""
+    from ..config import settings
+
+    return ShardRouter(
+        nodes=parse_nodes(settings.SHARD_NODES),
+        self_name=settings.SHARD_SELF,
+        key_field=settings.SHARD_KEY,
+        vnodes=settings.SHARD_VIRTUAL_NODES,
+        health_interval=settings.SHARD_HEALTH_INTERVAL_SECONDS,
+        secret=settings.SHARD_SECRET
+    )
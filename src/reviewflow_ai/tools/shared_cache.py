@@ -0,0 +1,304 @@
+"""
+Cache em dois níveis: LRU no processo na frente de um Redis compartilhado.
+
+Com vários workers uvicorn, cada processo tem seus próprios caches e a taxa de
+acerto cai com o número de workers. O nível 1 (LRU local, TTL curto) responde
+sem rede; o nível 2 (Redis em REDIS_URL) é compartilhado por todos os workers.
+Leituras de vários itens usam um único MGET e escritas um único pipeline, de
+modo que uma requisição faz no máximo duas idas ao Redis. Os valores são
+gravados em JSON compacto com um byte de formato, comprimido com zlib acima de
+COMPRESS_MIN_BYTES. Invalidações apagam a chave no Redis e são publicadas em
+um canal pub/sub para que os outros workers descartem a cópia local.
+
+Sem REDIS_URL (ou sem o pacote `redis`) funciona só o nível local. Falhas do
+Redis nunca falham a requisição: um circuit breaker o tira do caminho e o
+cache segue apenas com o nível local até a recuperação.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .circuit_breaker import CircuitBreaker
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # requirements-production.txt pode não incluir o redis
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+# Primeiro byte de cada valor
+FORMAT_NONE = 0
+FORMAT_JSON = 1
+FORMAT_ZLIB_JSON = 2
+
+# Valores menores não compensam a compressão
+COMPRESS_MIN_BYTES = 256
+
+_MISSING = object()
+
+
+def encode_value(value: Any) -> bytes:
+    """Codifica um valor JSON (None inclusive, para cache negativo)."""
+    if value is None:
+        return bytes([FORMAT_NONE])
+    data = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+    if len(data) >= COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(data, 6)
+        if len(compressed) < len(data):
+            return bytes([FORMAT_ZLIB_JSON]) + compressed
+    return bytes([FORMAT_JSON]) + data
+
+
+def decode_value(data: bytes) -> Any:
+    fmt, body = data[0], data[1:]
+    if fmt == FORMAT_NONE:
+        return None
+    if fmt == FORMAT_ZLIB_JSON:
+        body = zlib.decompress(body)
+    elif fmt != FORMAT_JSON:
+        raise ValueError(f"Formato de cache desconhecido: {fmt}")
+    return json.loads(body)
+
+
+class LocalLRU:
+    """LRU com TTL, no processo."""
+
+    def __init__(self, max_items: int = 10000, ttl: float = 60.0):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        """Valor guardado, ou _MISSING."""
+        item = self._items.get(key)
+        if item is None:
+            return _MISSING
+        expires_at, value = item
+        if time.monotonic() >= expires_at:
+            del self._items[key]
+            return _MISSING
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._items.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class TwoLevelCache:
+    """
+    Cache local + Redis compartilhado.
+
+    Args:
+        remote: Cliente redis.asyncio (ou compatível); None = apenas local
+        local_max_items / local_ttl: Tamanho e TTL (s) do nível local
+        remote_ttl: TTL (s) das chaves no Redis
+        remote_timeout: Tempo máximo (s) de cada operação no Redis
+        namespace: Prefixo das chaves e do canal de invalidação
+        invalidation: Assina o canal pub/sub de invalidação
+    """
+
+    def __init__(
+        self,
+        remote=None,
+        local_max_items: int = 10000,
+        local_ttl: float = 60.0,
+        remote_ttl: float = 3600.0,
+        remote_timeout: float = 0.05,
+        namespace: str = "reviewflow:v1",
+        invalidation: bool = True
+    ):
+        self.remote = remote
+        self.local = LocalLRU(local_max_items, local_ttl)
+        self.remote_ttl = remote_ttl
+        self.remote_timeout = remote_timeout
+        self.namespace = namespace
+        self.channel = f"{namespace}:invalidate"
+        self.invalidation = invalidation and remote is not None
+        self.breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10.0)
+        self._origin = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self.counters = {
+            "local_hits": 0, "remote_hits": 0, "misses": 0, "remote_round_trips": 0,
+            "remote_errors": 0, "invalidations_received": 0, "bytes_written": 0
+        }
+
+    def key(self, kind: str, ident: str) -> str:
+        return f"{self.namespace}:{kind}:{ident}"
+
+    async def _remote_call(self, coro_factory) -> Any:
+        """Executa uma operação no Redis; _MISSING se indisponível ou com erro."""
+        if self.remote is None or not self.breaker.allow_request():
+            return _MISSING
+        self._ensure_listener()
+        self.counters["remote_round_trips"] += 1
+        try:
+            result = await asyncio.wait_for(coro_factory(), self.remote_timeout)
+        except asyncio.CancelledError:
+            self.breaker.record_abandoned()
+            raise
+        except Exception as e:
+            self.breaker.record_failure()
+            self.counters["remote_errors"] += 1
+            logger.warning(f"Cache Redis indisponível ({type(e).__name__}: {e}); usando apenas o nível local")
+            return _MISSING
+        self.breaker.record_success()
+        return result
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Valores encontrados (o valor pode ser None: cache negativo); uma ida ao Redis."""
+        found: Dict[str, Any] = {}
+        remote_keys: List[str] = []
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key)
+            if value is _MISSING:
+                remote_keys.append(key)
+            else:
+                found[key] = value
+                self.counters["local_hits"] += 1
+        if not remote_keys:
+            return found
+
+        values = await self._remote_call(lambda: self.remote.mget(remote_keys))
+        if values is _MISSING:
+            values = [None] * len(remote_keys)
+        for key, data in zip(remote_keys, values):
+            if data is None:
+                self.counters["misses"] += 1
+                continue
+            try:
+                value = decode_value(data)
+            except Exception as e:
+                logger.warning(f"Valor inválido no cache para {key}: {e}")
+                self.counters["misses"] += 1
+                continue
+            self.local.set(key, value)
+            found[key] = value
+            self.counters["remote_hits"] += 1
+        return found
+
+    async def set_many(self, items: Dict[str, Any]) -> None:
+        """Grava nos dois níveis; as escritas no Redis vão em um único pipeline."""
+        if not items:
+            return
+        for key, value in items.items():
+            self.local.set(key, value)
+        if self.remote is None:
+            return
+        encoded = {key: encode_value(value) for key, value in items.items()}
+
+        async def write():
+            pipe = self.remote.pipeline(transaction=False)
+            for key, data in encoded.items():
+                pipe.set(key, data, ex=int(self.remote_ttl))
+            return await pipe.execute()
+
+        if await self._remote_call(write) is not _MISSING:
+            self.counters["bytes_written"] += sum(len(data) for data in encoded.values())
+
+    async def invalidate(self, keys: Iterable[str]) -> None:
+        """Remove as chaves dos dois níveis e avisa os outros workers."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return
+        for key in keys:
+            self.local.delete(key)
+        if self.remote is None:
+            return
+
+        async def delete_and_publish():
+            pipe = self.remote.pipeline(transaction=False)
+            pipe.delete(*keys)
+            if self.invalidation:
+                pipe.publish(self.channel, json.dumps({"origin": self._origin, "keys": keys}))
+            return await pipe.execute()
+
+        await self._remote_call(delete_and_publish)
+
+    def _ensure_listener(self) -> None:
+        if self.invalidation and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Descarta cópias locais invalidadas por outros workers."""
+        while True:
+            pubsub = self.remote.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") == self._origin:
+                        continue
+                    for key in payload.get("keys", []):
+                        self.local.delete(key)
+                    self.counters["invalidations_received"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Assinatura de invalidação do cache interrompida: {e}")
+                await asyncio.sleep(1.0)
+            finally:
+                with suppress(Exception):
+                    await pubsub.aclose()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._listener
+            self._listener = None
+        if self.remote is not None:
+            with suppress(Exception):
+                await self.remote.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["local_hits"] + self.counters["remote_hits"] + self.counters["misses"]
+        hits = self.counters["local_hits"] + self.counters["remote_hits"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "local_items": len(self.local),
+            "remote": "disabled" if self.remote is None else self.breaker.state
+        }
+
+
+def create_shared_cache(remote=None) -> TwoLevelCache:
+    """
+    Cria o cache conforme as configurações CACHE_* e REDIS_URL.
+
+    Args:
+        remote: Cliente Redis já criado (ex.: o substituto em memória dos testes)
+    """
+    from ..config import settings
+
+    if remote is None and settings.REDIS_URL:
+        if redis_asyncio is None:
+            logger.warning("REDIS_URL definido, mas o pacote redis não está instalado; cache apenas local")
+        else:
+            remote = redis_asyncio.from_url(settings.REDIS_URL)
+    return TwoLevelCache(
+        remote=remote,
+        local_max_items=settings.CACHE_LOCAL_MAX_ITEMS,
+        local_ttl=settings.CACHE_LOCAL_TTL_SECONDS,
+        remote_ttl=settings.CACHE_TTL_SECONDS,
+        remote_timeout=settings.CACHE_REMOTE_TIMEOUT_MS / 1000,
+        invalidation=settings.CACHE_PUBSUB_INVALIDATION
+    )
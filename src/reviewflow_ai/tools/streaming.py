@@ -0,0 +1,103 @@
+"""
+Streaming de respostas do LLM para o cliente (Server-Sent Events).
+
+O Response Generator devolve um objeto JSON; `JsonFieldStream` acompanha esse
+JSON enquanto ele chega e extrai, já decodificado, o texto de um campo string
+(ex.: `response_text`), para que ele seja exibido antes do fim da geração.
+"""
+
+import json
+from typing import Optional
+
+# Escapes simples de strings JSON
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonFieldStream:
+    """
+    Extrai incrementalmente o valor de um campo string de um objeto JSON
+    recebido em trechos.
+
+    Args:
+        field: Nome do campo (apenas campos string de primeiro nível)
+    """
+
+    def __init__(self, field: str):
+        self._key = json.dumps(field)
+        self._buffer = ""
+        self._inside = False
+        self._done = False
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> str:
+        """Consome um trecho do JSON e devolve o novo texto do campo (pode ser vazio)."""
+        if self._done:
+            return ""
+        if self._inside:
+            return self._decode(chunk)
+
+        self._buffer += chunk
+        while True:
+            position = self._buffer.find(self._key)
+            if position == -1:
+                # Mantém apenas o suficiente para achar a chave dividida entre trechos
+                self._buffer = self._buffer[-len(self._key):]
+                return ""
+            rest = self._buffer[position + len(self._key):].lstrip()
+            if rest and not rest.startswith(":"):
+                # O texto da chave apareceu dentro de outro valor
+                self._buffer = rest
+                continue
+            value = rest[1:].lstrip()
+            if not value:
+                # Chave encontrada, valor ainda não chegou
+                self._buffer = self._buffer[position:]
+                return ""
+            self._buffer = ""
+            if not value.startswith('"'):
+                # Valor não é string (ex.: null)
+                self._done = True
+                return ""
+            self._inside = True
+            return self._decode(value[1:])
+
+    def _decode(self, chunk: str) -> str:
+        out = []
+        for char in chunk:
+            if self._escape is not None:
+                self._escape += char
+                if self._escape.startswith("u"):
+                    if len(self._escape) == 5:
+                        self._append_code_point(int(self._escape[1:], 16), out)
+                        self._escape = None
+                else:
+                    out.append(_ESCAPES.get(char, char))
+                    self._escape = None
+            elif char == "\\":
+                self._escape = ""
+            elif char == '"':
+                self._done = True
+                break
+            else:
+                out.append(char)
+        return "".join(out)
+
+    def _append_code_point(self, code: int, out) -> None:
+        # Caracteres fora do BMP chegam como par de surrogates (\ud83d\ude00)
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+        elif 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            out.append(chr(0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)))
+            self._high_surrogate = None
+        else:
+            out.append(chr(code))
+
+
+def sse_event(event: str, data: str) -> str:
+    """Formata um evento SSE; `data` é JSON de uma linha."""
+    return f"event: {event}\ndata: {data}\n\n"
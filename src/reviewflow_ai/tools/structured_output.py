@@ -0,0 +1,300 @@
+"""
+Saída estruturada dos agentes com JSON Schema estrito.
+
+Os schemas são gerados dos modelos Pydantic e enviados como `response_format`
+do tipo `json_schema` com `strict=True`, e a resposta é validada direto no
+modelo em uma única passada. Restrições que o modo estrito não garante
+(limites numéricos, variações de grafia dos enums) são corrigidas localmente
+campo a campo; o que não puder ser corrigido é pedido de novo ao modelo, apenas
+para os campos inválidos, em vez de repetir a requisição inteira.
+"""
+
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from ..config import settings
+from .deadline import Deadline
+from .model_routing import complete_with_usage
+
+# Palavras-chave de JSON Schema não aceitas no modo estrito
+UNSUPPORTED_KEYWORDS = {"default", "title", "minimum", "maximum", "minLength", "maxLength", "format"}
+
+
+class StructuredOutputError(Exception):
+    """A resposta não pôde ser convertida no modelo, mesmo após o reparo."""
+
+    def __init__(self, message: str, fields: Optional[List[str]] = None):
+        super().__init__(message)
+        self.fields = fields or []
+
+
+def _strict(node: Any) -> Any:
+    if isinstance(node, list):
+        return [_strict(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+    node = {k: _strict(v) for k, v in node.items() if k not in UNSUPPORTED_KEYWORDS}
+    if node.get("type") == "object" and "properties" in node:
+        node["required"] = list(node["properties"])
+        node["additionalProperties"] = False
+    return node
+
+
+def strict_json_schema(
+    model: Type[BaseModel],
+    exclude: Iterable[str] = (),
+    include: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """
+    JSON Schema estrito de `model`: todos os campos obrigatórios (opcionais
+    aceitam null), sem propriedades adicionais.
+
+    Args:
+        exclude: Campos preenchidos pelo sistema, fora da saída do LLM
+        include: Restringe o schema a estes campos (usado nas correções)
+    """
+    schema = model.model_json_schema()
+    properties = {k: v for k, v in schema["properties"].items() if k not in set(exclude)}
+    if include is not None:
+        properties = {k: v for k, v in properties.items() if k in set(include)}
+    strict = {"type": "object", "properties": properties}
+    if "$defs" in schema:
+        strict["$defs"] = schema["$defs"]
+    return _strict(strict)
+
+
+def json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """`response_format` da API de chat para um schema estrito."""
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+def _normalize(value: Any) -> str:
+    return re.sub(r"[\s_\-]+", "", str(value)).lower()
+
+
+def _enum_values(model: Type[BaseModel], field: str) -> List[str]:
+    """Valores aceitos por um campo enum (ou lista de enums) do modelo."""
+    schema = model.model_json_schema()
+    defs = schema.get("$defs", {})
+    pending = [schema["properties"].get(field, {})]
+    while pending:
+        node = pending.pop()
+        if "enum" in node:
+            return node["enum"]
+        if "$ref" in node:
+            pending.append(defs.get(node["$ref"].rsplit("/", 1)[-1], {}))
+        pending.extend(node.get("anyOf", []))
+        if "items" in node:
+            pending.append(node["items"])
+    return []
+
+
+def repair_fields(
+    model: Type[BaseModel],
+    data: Dict[str, Any],
+    errors: List[Dict[str, Any]]
+) -> Tuple[List[str], List[str]]:
+    """
+    Corrige localmente, em `data`, os erros de validação determinísticos.
+
+    - enum com outra grafia ("negative", "product quality"): valor canônico
+    - item inválido de lista de enums: removido
+    - número fora dos limites: ajustado ao limite
+    - inteiro enviado como decimal: arredondado
+
+    Returns:
+        Tuple: Campos corrigidos e campos que precisam ser pedidos de novo
+    """
+    repaired, unresolved = [], []
+    dropped: Dict[str, List[int]] = {}
+    for error in errors:
+        loc = error.get("loc") or ()
+        if not loc or not isinstance(loc[0], str):
+            unresolved.append("__root__")
+            continue
+        field, kind = loc[0], error["type"]
+        fixed = False
+
+        if kind == "enum":
+            canonical = {_normalize(v): v for v in _enum_values(model, field)}
+            match = canonical.get(_normalize(error.get("input")))
+            if len(loc) == 1 and match is not None:
+                data[field], fixed = match, True
+            elif len(loc) == 2 and isinstance(loc[1], int):
+                if match is not None:
+                    data[field][loc[1]] = match
+                else:
+                    dropped.setdefault(field, []).append(loc[1])
+                fixed = True
+        elif kind in ("greater_than_equal", "less_than_equal") and len(loc) == 1:
+            ctx = error.get("ctx") or {}
+            limit = next(iter(ctx.values()), None)
+            if limit is not None:
+                data[field], fixed = limit, True
+        elif kind == "int_from_float" and len(loc) == 1:
+            data[field], fixed = round(data[field]), True
+
+        (repaired if fixed else unresolved).append(field)
+
+    for field, positions in dropped.items():
+        data[field] = [item for i, item in enumerate(data[field]) if i not in set(positions)]
+    unresolved = list(dict.fromkeys(unresolved))
+    repaired = [f for f in dict.fromkeys(repaired) if f not in unresolved]
+    return repaired, unresolved
+
+
+class StructuredOutputStats:
+    """
+    Contadores por estágio.
+
+    `retries_saved` conta respostas inválidas aproveitadas sem repetir a
+    requisição inteira (por reparo local ou pedido só dos campos inválidos).
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def _stage(self, stage: str) -> Dict[str, Any]:
+        counters = self._stages.get(stage)
+        if counters is None:
+            counters = self._stages[stage] = {
+                "responses": 0, "valid_first_pass": 0, "repaired_locally": 0,
+                "field_reasks": 0, "full_reasks": 0, "failed": 0, "retries_saved": 0,
+                "repaired_fields": {}
+            }
+        return counters
+
+    def record(self, stage: str, outcome: str, fields: Iterable[str] = ()) -> None:
+        """Registra o desfecho de uma resposta (uma das chaves de contagem)."""
+        counters = self._stage(stage)
+        counters["responses"] += 1
+        counters[outcome] += 1
+        if outcome in ("repaired_locally", "field_reasks"):
+            counters["retries_saved"] += 1
+        for field in fields:
+            counters["repaired_fields"][field] = counters["repaired_fields"].get(field, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            stage: {**counters, "repaired_fields": dict(counters["repaired_fields"])}
+            for stage, counters in self._stages.items()
+        }
+
+
+# Métricas globais do processo, expostas em /api/v1/stats
+structured_output_stats = StructuredOutputStats()
+
+
+def _validate(model: Type[BaseModel], data: Dict[str, Any]) -> Tuple[Optional[BaseModel], List[str], List[str]]:
+    """Valida `data`, reparando localmente; devolve (instância, corrigidos, pendentes)."""
+    repaired: List[str] = []
+    pending: List[str] = []
+    for _ in range(3):
+        try:
+            return model.model_validate(data), repaired, []
+        except ValidationError as e:
+            fixed, pending = repair_fields(model, data, e.errors())
+            repaired.extend(f for f in fixed if f not in repaired)
+            if pending or not fixed:
+                pending = pending or list(dict.fromkeys(str(err["loc"][0]) for err in e.errors() if err["loc"]))
+                break
+    return None, repaired, pending
+
+
+async def complete_structured(
+    backend,
+    output_model: Type[BaseModel],
+    *,
+    stage: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    exclude: Iterable[str] = (),
+    temperature: float = 0.1,
+    deadline: Optional[Deadline] = None,
+    on_delta: Optional[Callable[[str], None]] = None
+) -> Dict[str, Any]:
+    """
+    Chamada LLM com saída no schema estrito de `output_model`.
+
+    Com `on_delta`, a primeira resposta é recebida em streaming (os pedidos de
+    correção não são).
+
+    A resposta é validada direto no modelo; erros determinísticos são
+    corrigidos localmente e, se restarem campos inválidos, eles são pedidos de
+    novo uma única vez (STRUCTURED_MAX_REASKS), com um schema só desses campos.
+
+    Returns:
+        Dict: Saída validada (`model_dump(mode="json")`, sem os campos `exclude`)
+
+    Raises:
+        StructuredOutputError: Se a saída continuar inválida
+    """
+    exclude = tuple(exclude)
+    name = output_model.__name__
+    response = await complete_with_usage(
+        backend,
+        stage=stage,
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        response_format=json_schema_format(name, strict_json_schema(output_model, exclude)),
+        deadline=deadline,
+        on_delta=on_delta
+    )
+    try:
+        instance = output_model.model_validate_json(response.content)
+        structured_output_stats.record(stage, "valid_first_pass")
+        return instance.model_dump(mode="json", exclude=set(exclude))
+    except ValidationError:
+        pass
+
+    try:
+        data = json.loads(response.content)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        instance, repaired, invalid = _validate(output_model, data)
+        if instance is not None:
+            structured_output_stats.record(stage, "repaired_locally", repaired)
+            return instance.model_dump(mode="json", exclude=set(exclude))
+    else:
+        data, repaired, invalid = {}, [], []
+
+    for _ in range(settings.STRUCTURED_MAX_REASKS):
+        # Pede de novo apenas os campos inválidos (ou tudo, se não houver JSON)
+        fields = [f for f in invalid if f in output_model.model_fields and f not in exclude] or None
+        outcome = "field_reasks" if fields else "full_reasks"
+        schema = strict_json_schema(output_model, exclude, include=fields)
+        instruction = (
+            f"These fields were invalid: {', '.join(fields)}. "
+            "Return a JSON object with corrected values for only these fields."
+            if fields else "The previous answer was not valid JSON for the required schema. Answer again."
+        )
+        response = await complete_with_usage(
+            backend,
+            stage=stage,
+            model=model,
+            messages=messages + [
+                {"role": "assistant", "content": response.content},
+                {"role": "user", "content": instruction}
+            ],
+            temperature=temperature,
+            response_format=json_schema_format(f"{name}_fix" if fields else name, schema),
+            deadline=deadline
+        )
+        try:
+            update = json.loads(response.content)
+        except ValueError:
+            update = None
+        if isinstance(update, dict):
+            data.update(update)
+            instance, fixed, invalid = _validate(output_model, data)
+            if instance is not None:
+                structured_output_stats.record(stage, outcome, dict.fromkeys(repaired + (fields or []) + fixed))
+                return instance.model_dump(mode="json", exclude=set(exclude))
+
+    structured_output_stats.record(stage, "failed")
+    raise StructuredOutputError(f"{stage}: invalid {name} output", invalid)
@@ -0,0 +1,149 @@
+"""
+Vetorização local de reviews (TF-IDF com hashing) em matrizes esparsas NumPy.
+
+Palavras e bigramas do texto normalizado são mapeados por hash para um número
+fixo de colunas, sem vocabulário a manter. A matriz resultante fica no formato
+CSR (indptr, indices, data), com linhas normalizadas em L2, de modo que o
+produto com centróides também normalizados é a similaridade de cosseno.
+"""
+
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, List
+
+import numpy as np
+
+from .heuristic_analyzer import tokenize
+
+
+@dataclass
+class SparseRows:
+    """Matriz esparsa CSR com as linhas de documentos vetorizados."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    n_features: int
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    def row(self, i: int) -> np.ndarray:
+        """Linha `i` como vetor denso."""
+        dense = np.zeros(self.n_features, dtype=np.float32)
+        start, end = self.indptr[i], self.indptr[i + 1]
+        dense[self.indices[start:end]] = self.data[start:end]
+        return dense
+
+    def take(self, rows: np.ndarray) -> "SparseRows":
+        """Submatriz com as linhas selecionadas, na ordem dada."""
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SparseRows(indptr, self.indices[positions], self.data[positions], self.n_features)
+
+    def dot(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Produto com uma matriz densa (k x n_features); retorna (linhas x k).
+
+        É mais rápido com `matrix` em ordem Fortran, pois cada coluna usada
+        fica contígua na memória.
+        """
+        out = np.zeros((len(self), matrix.shape[0]), dtype=np.float32)
+        if self.nnz == 0:
+            return out
+        contributions = np.ascontiguousarray(matrix.T)[self.indices] * self.data[:, None]
+        nonempty = np.diff(self.indptr) > 0
+        out[nonempty] = np.add.reduceat(contributions, self.indptr[:-1][nonempty], axis=0)
+        return out
+
+    def add_to(self, matrix: np.ndarray, targets: np.ndarray) -> None:
+        """Soma cada linha `i` em `matrix[targets[i]]` (in-place)."""
+        row_targets = np.repeat(np.asarray(targets), np.diff(self.indptr))
+        np.add.at(matrix, (row_targets, self.indices), self.data)
+
+
+def ngram_features(text: str) -> List[str]:
+    """Palavras e bigramas do texto normalizado."""
+    tokens = tokenize(text)
+    return tokens + [f"{tokens[i]} {tokens[i + 1]}" for i in range(len(tokens) - 1)]
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF sobre palavras e bigramas com o truque do hashing.
+
+    Args:
+        n_features: Colunas da matriz (potência de 2)
+        min_token_length: Palavras menores que isso são ignoradas
+        binary: Usa apenas a presença (1.0) de cada feature, sem IDF nem
+            normalização, como entrada de modelos lineares
+    """
+
+    def __init__(self, n_features: int = 2 ** 14, min_token_length: int = 2, binary: bool = False):
+        if n_features & (n_features - 1):
+            raise ValueError("n_features deve ser potência de 2")
+        self.n_features = n_features
+        self.min_token_length = min_token_length
+        self.binary = binary
+        self.idf: np.ndarray = np.ones(n_features, dtype=np.float32)
+
+    def _hash(self, feature: str) -> int:
+        # crc32 é estável entre processos, ao contrário de hash()
+        return zlib.crc32(feature.encode()) & (self.n_features - 1)
+
+    def _term_counts(self, documents: Iterable[List[str]]) -> SparseRows:
+        indptr, indices, data = [0], [], []
+        for features in documents:
+            counts = Counter(
+                self._hash(f) for f in features
+                if " " in f or len(f) >= self.min_token_length
+            )
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        return SparseRows(
+            np.array(indptr, dtype=np.int64),
+            np.array(indices, dtype=np.int64),
+            np.array(data, dtype=np.float32),
+            self.n_features
+        )
+
+    def fit_transform(self, texts: Iterable[str]) -> SparseRows:
+        """Aprende o IDF do próprio lote e retorna a matriz TF-IDF normalizada."""
+        return self.fit_transform_features(map(ngram_features, texts))
+
+    def transform(self, texts: Iterable[str]) -> SparseRows:
+        """Vetoriza com o IDF já aprendido."""
+        return self.transform_features(map(ngram_features, texts))
+
+    def fit_transform_features(self, documents: Iterable[List[str]]) -> SparseRows:
+        """Como `fit_transform`, para documentos já convertidos em features."""
+        counts = self._term_counts(documents)
+        document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf = (np.log((1 + len(counts)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return self._weight(counts)
+
+    def transform_features(self, documents: Iterable[List[str]]) -> SparseRows:
+        """Como `transform`, para documentos já convertidos em features."""
+        return self._weight(self._term_counts(documents))
+
+    def _weight(self, counts: SparseRows) -> SparseRows:
+        if self.binary:
+            return SparseRows(counts.indptr, counts.indices, np.ones_like(counts.data), self.n_features)
+        # TF sublinear (1 + log tf) vezes IDF, com cada linha normalizada em L2
+        data = (1 + np.log(counts.data)) * self.idf[counts.indices]
+        lengths = np.diff(counts.indptr)
+        norms = np.sqrt(np.add.reduceat(data ** 2, counts.indptr[:-1][lengths > 0])) if counts.nnz else np.array([])
+        row_norms = np.ones(len(counts), dtype=np.float32)
+        row_norms[lengths > 0] = norms
+        data = data / np.repeat(row_norms, lengths)
+        return SparseRows(counts.indptr, counts.indices, data.astype(np.float32), self.n_features)
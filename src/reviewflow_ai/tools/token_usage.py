@@ -0,0 +1,167 @@
+"""
+Contabilidade de tokens e custo por requisição, caminho de workflow e lote.
+
+Cada requisição abre um escopo (`track_usage`) propagado via contextvars,
+como os spans do tracing; toda chamada feita por `complete_with_usage` dentro
+dele é anotada com estágio, modelo e tokens (entrada, saída e em cache). O
+total vai para o ProcessingResult e é agregado no `UsageLedger` por
+workflow_path e por lote. `TokenBudget` interrompe um lote quando o orçamento
+de tokens acaba.
+"""
+
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .llm_backend import LLMResponse
+
+# Lotes mantidos no ledger (os mais antigos são descartados)
+MAX_TRACKED_BATCHES = 1000
+
+_current_usage: contextvars.ContextVar[Optional["RequestUsage"]] = contextvars.ContextVar(
+    "reviewflow_current_usage", default=None
+)
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"requests": 0, "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "cached_tokens": 0, "cost_usd": 0.0}
+
+
+class RequestUsage:
+    """Chamadas LLM de uma requisição."""
+
+    __slots__ = ("calls", "closed")
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self.closed = False
+
+    def add(self, stage: str, model: str, response: LLMResponse, cost_usd: float) -> None:
+        # Tarefas em segundo plano herdam o contexto: chamadas após o fim do escopo não contam
+        if self.closed:
+            return
+        self.calls.append({
+            "stage": stage,
+            "model": model,
+            "prompt_tokens": response.prompt_tokens,
+            "completion_tokens": response.completion_tokens,
+            "cached_tokens": response.cached_tokens,
+            "cost_usd": cost_usd
+        })
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(c["prompt_tokens"] + c["completion_tokens"] for c in self.calls)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Totais e chamadas, no formato de TokenUsage."""
+        return {
+            "llm_calls": len(self.calls),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in self.calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in self.calls),
+            "cached_tokens": sum(c["cached_tokens"] for c in self.calls),
+            "cost_usd": round(sum(c["cost_usd"] for c in self.calls), 6),
+            "calls": [{**c, "cost_usd": round(c["cost_usd"], 6)} for c in self.calls]
+        }
+
+
+@contextmanager
+def track_usage() -> Iterator[RequestUsage]:
+    """Escopo de contabilidade de uma requisição."""
+    usage = RequestUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        usage.closed = True
+        _current_usage.reset(token)
+
+
+def current_usage() -> Optional[RequestUsage]:
+    """Escopo da requisição em andamento, se houver."""
+    return _current_usage.get()
+
+
+class TokenBudget:
+    """
+    Orçamento de tokens (entrada + saída) de um lote.
+
+    Reviews já em andamento quando o orçamento acaba terminam normalmente;
+    o excedente fica limitado à concorrência do lote.
+
+    Args:
+        limit: Tokens disponíveis (0 = ilimitado)
+    """
+
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self.spent = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return bool(self.limit) and self.spent >= self.limit
+
+    def charge(self, tokens: int) -> None:
+        self.spent += tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"limit": self.limit or None, "spent": self.spent, "exhausted": self.exhausted}
+
+
+class UsageLedger:
+    """Totais de tokens e custo por workflow_path e por lote."""
+
+    def __init__(self, max_batches: int = MAX_TRACKED_BATCHES):
+        self.max_batches = max_batches
+        self._by_path: Dict[str, Dict[str, Any]] = {}
+        self._by_batch: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _batch(self, batch_id: str) -> Dict[str, Any]:
+        totals = self._by_batch.get(batch_id)
+        if totals is None:
+            totals = self._by_batch[batch_id] = {**_empty_totals(), "skipped": 0, "budget": None}
+            while len(self._by_batch) > self.max_batches:
+                self._by_batch.popitem(last=False)
+        return totals
+
+    def record(self, workflow_path: str, usage: Optional[Dict[str, Any]], batch_id: Optional[str] = None) -> None:
+        """Soma o TokenUsage de um resultado concluído."""
+        targets = [self._by_path.setdefault(workflow_path, _empty_totals())]
+        if batch_id:
+            targets.append(self._batch(batch_id))
+        for totals in targets:
+            totals["requests"] += 1
+            if usage:
+                for key in ("llm_calls", "prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd"):
+                    totals[key] += usage.get(key, 0)
+
+    def record_skipped(self, batch_id: str, budget: TokenBudget) -> None:
+        """Review do lote não processado por falta de orçamento."""
+        totals = self._batch(batch_id)
+        totals["skipped"] += 1
+        totals["budget"] = budget.to_dict()
+
+    def set_budget(self, batch_id: str, budget: TokenBudget) -> None:
+        self._batch(batch_id)["budget"] = budget.to_dict()
+
+    def batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        totals = self._by_batch.get(batch_id)
+        return _rounded(totals) if totals else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "by_workflow_path": {path: _rounded(t) for path, t in self._by_path.items()},
+            "by_batch": {batch_id: _rounded(t) for batch_id, t in self._by_batch.items()}
+        }
+
+
+def _rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **totals,
+        "cost_usd": round(totals["cost_usd"], 6),
+        "cached_token_ratio": (
+            round(totals["cached_tokens"] / totals["prompt_tokens"], 4) if totals["prompt_tokens"] else 0.0
+        )
+    }
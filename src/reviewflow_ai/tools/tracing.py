@@ -0,0 +1,216 @@
+"""
+Tracing leve por estágio, no estilo OpenTelemetry.
+
+Spans são propagados via contextvars (inclusive entre tarefas asyncio) e, ao
+terminar, acumulam sua duração no span raiz, o que permite expor um resumo de
+tempos por estágio em cada resultado. O exportador em arquivo grava uma linha
+por trace no formato OTLP/JSON (ExportTraceServiceRequest), que pode ser
+enviada diretamente ao endpoint /v1/traces de um OpenTelemetry Collector.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+SERVICE_NAME = "reviewflow-ai"
+
+# Intervalo máximo entre gravações do exportador em arquivo
+FLUSH_INTERVAL_SECONDS = 1.0
+
+# Traces aguardando gravação; além disso, novos traces são descartados
+MAX_BUFFERED_TRACES = 10000
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "reviewflow_current_span", default=None
+)
+
+
+class Span:
+    """Um intervalo de tempo nomeado dentro de um trace."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "root", "attributes",
+        "start_ns", "end_ns", "status", "timings", "spans"
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.root = parent.root if parent else self
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        # Apenas no span raiz: tempos agregados e spans terminados do trace
+        self.timings: Dict[str, float] = {}
+        self.spans: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 1 if self.status == "ok" else 2}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class FileSpanExporter:
+    """
+    Grava cada trace concluído como uma linha OTLP/JSON em um arquivo.
+
+    `export` só enfileira o trace; uma thread em segundo plano serializa e
+    grava o lote acumulado a cada FLUSH_INTERVAL_SECONDS, sem I/O no event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._pending: List[List[Dict[str, Any]]] = []
+        self._cond = threading.Condition()
+        self._closing = False
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        otlp_spans = [span.to_otlp() for span in spans]
+        with self._cond:
+            if self._closing or len(self._pending) >= MAX_BUFFERED_TRACES:
+                self.dropped += 1
+                return
+            self._pending.append(otlp_spans)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closing:
+                    self._cond.wait(FLUSH_INTERVAL_SECONDS)
+                batch, self._pending = self._pending, []
+                closing = self._closing
+            if batch:
+                self._write(batch)
+            if closing:
+                return
+
+    def _write(self, batch: List[List[Dict[str, Any]]]) -> None:
+        lines = []
+        for otlp_spans in batch:
+            payload = {
+                "resourceSpans": [{
+                    "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                    "scopeSpans": [{
+                        "scope": {"name": "reviewflow_ai"},
+                        "spans": otlp_spans
+                    }]
+                }]
+            }
+            lines.append(json.dumps(payload, separators=(",", ":")) + "\n")
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except OSError as e:
+            with self._cond:
+                self.dropped += len(batch)
+            logger.warning(f"Falha ao gravar {len(batch)} traces em {self.path}: {e}")
+
+    def close(self) -> None:
+        """Grava os traces pendentes e encerra a thread."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+
+
+class Tracer:
+    """Cria spans e envia traces concluídos ao exportador configurado."""
+
+    def __init__(self, exporter: Optional[FileSpanExporter] = None):
+        self.exporter = exporter
+
+    def close(self) -> None:
+        """Grava os traces pendentes do exportador, se houver."""
+        if self.exporter is not None:
+            self.exporter.close()
+
+    @contextmanager
+    def start_span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Abre um span filho do span atual (ou raiz de um novo trace)."""
+        parent = _current_span.get()
+        span = Span(name, parent, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["error.type"] = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            root = span.root
+            if span is not root:
+                root.timings[name] = round(root.timings.get(name, 0.0) + span.duration_ms, 3)
+            if self.exporter is not None:
+                root.spans.append(span)
+                if span is root:
+                    self.exporter.export(root.spans)
+
+
+def current_span() -> Optional[Span]:
+    """Span ativo no contexto atual, se houver."""
+    return _current_span.get()
+
+
+def current_timings() -> Dict[str, float]:
+    """Tempos (ms) por estágio acumulados no trace atual."""
+    span = _current_span.get()
+    return dict(span.root.timings) if span else {}
+
+
+def create_tracer() -> Tracer:
+    """Cria o tracer conforme TRACING_EXPORTER (none ou file)."""
+    from ..config import settings
+
+    if settings.TRACING_EXPORTER.lower() == "file":
+        return Tracer(FileSpanExporter(settings.TRACING_FILE))
+    return Tracer()
+
+
+tracer = create_tracer()
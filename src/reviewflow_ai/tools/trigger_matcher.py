@@ -0,0 +1,151 @@
+"""
+Detecção de gatilhos de escalação com autômato Aho-Corasick.
+
+Os léxicos de gatilhos (português e inglês, com expressões de várias palavras)
+são compilados uma única vez em um autômato; cada review é percorrido em uma
+só passada, independentemente do número de termos. O texto é comparado sem
+acentos e em minúsculas, mas as posições retornadas referem-se ao texto
+original, para que os trechos possam ser enviados ao agente.
+"""
+
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+# Termos terminados em "*" casam como prefixo (ex.: "superaquec*")
+TRIGGER_LEXICON: Dict[str, List[str]] = {
+    "Legal": [
+        "procon", "advogado", "advogada", "meu advogado", "processar", "vou processar",
+        "processo judicial", "acao judicial", "justica", "juizado", "pequenas causas",
+        "reclame aqui", "reclameaqui", "policia", "boletim de ocorrencia", "ministerio publico",
+        "lawsuit", "lawyer", "attorney", "legal action", "sue you", "small claims",
+        "authorities", "police", "better business bureau"
+    ],
+    "Technical": [
+        "pegou fogo", "incendio", "explodiu", "explosao", "choque eletrico", "levei choque",
+        "superaquec*", "esquentando muito", "fumaca", "queimou", "perigo", "perigoso",
+        "machucou", "ferimento", "parou de funcionar", "nao liga", "defeito de fabrica",
+        "caught fire", "fire hazard", "exploded", "electric shock", "overheat*", "smoke",
+        "burned", "unsafe", "dangerous", "injury", "injured", "stopped working",
+        "safety issue", "malfunction*"
+    ],
+    "Commercial": [
+        "reembolso", "estorno", "estornar", "dinheiro de volta", "cobranca indevida",
+        "cobrado duas vezes", "cobraram duas vezes", "cobrado a mais", "preco errado",
+        "cancelar a compra", "chargeback", "refund", "money back", "charged twice",
+        "double charged", "overcharged", "billing error", "wrong price", "dispute"
+    ]
+}
+
+
+@dataclass(frozen=True)
+class TriggerMatch:
+    """Ocorrência de um gatilho no texto original."""
+
+    trigger_type: str
+    term: str
+    start: int
+    end: int
+    text: str
+
+
+def fold_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """
+    Remove acentos e converte para minúsculas, preservando as posições.
+
+    Returns:
+        Tuple: Texto normalizado e, para cada caractere dele, o índice no original
+    """
+    if text.isascii():
+        return text.lower(), list(range(len(text)))
+    folded, offsets = [], []
+    for index, char in enumerate(text):
+        for c in unicodedata.normalize("NFKD", char.lower()):
+            if not unicodedata.combining(c):
+                folded.append(c)
+                offsets.append(index)
+    return "".join(folded), offsets
+
+
+class TriggerMatcher:
+    """Autômato Aho-Corasick sobre um léxico {tipo: [termos]}."""
+
+    def __init__(self, lexicon: Dict[str, Iterable[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Por estado: (tipo, termo, comprimento, é_prefixo) dos termos que terminam nele
+        self._output: List[List[Tuple[str, str, int, bool]]] = [[]]
+
+        for trigger_type, terms in lexicon.items():
+            for term in terms:
+                prefix = term.endswith("*")
+                pattern = fold_with_offsets(term.rstrip("*"))[0]
+                self._add(pattern, (trigger_type, term.rstrip("*"), len(pattern), prefix))
+        self._build_failure_links()
+
+    def _add(self, pattern: str, output: Tuple[str, str, int, bool]) -> None:
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append(output)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find(self, text: str) -> List[TriggerMatch]:
+        """Gatilhos presentes no texto, em ordem de posição, respeitando limites de palavra."""
+        folded, offsets = fold_with_offsets(text)
+        matches = []
+        state = 0
+        for i, char in enumerate(folded):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for trigger_type, term, length, prefix in self._output[state]:
+                start = i - length + 1
+                if start > 0 and folded[start - 1].isalnum():
+                    continue
+                if not prefix and i + 1 < len(folded) and folded[i + 1].isalnum():
+                    continue
+                end = offsets[i] + 1
+                matches.append(TriggerMatch(trigger_type, term, offsets[start], end, text[offsets[start]:end]))
+        matches.sort(key=lambda m: (m.start, -m.end))
+        return matches
+
+
+def trigger_types(matches: Iterable[TriggerMatch]) -> List[str]:
+    """Tipos de gatilho encontrados, sem repetição e na ordem de aparição."""
+    return list(dict.fromkeys(m.trigger_type for m in matches))
+
+
+def trigger_excerpts(text: str, matches: List[TriggerMatch], context: int = 80) -> List[str]:
+    """Trechos do texto ao redor de cada gatilho, unindo janelas sobrepostas."""
+    windows: List[List[int]] = []
+    for match in matches:
+        start, end = max(0, match.start - context), min(len(text), match.end + context)
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([start, end])
+    return [text[start:end].strip() for start, end in windows]
+
+
+# Autômato padrão, compilado uma vez na importação
+trigger_matcher = TriggerMatcher(TRIGGER_LEXICON)
@@ -46,4 +46,4 @@ def validate_and_serialize_review(review_data: Union[str, Dict]) -> str:
         str: JSON string validado
     """
     validated_review = validate_review_input(review_data)
-    return validated_review.model_dump_json(indent=2, ensure_ascii=False)
\ No newline at end of file
+    return validated_review.model_dump_json(indent=2)
\ No newline at end of file
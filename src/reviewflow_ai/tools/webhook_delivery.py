@@ -0,0 +1,444 @@
+"""
+Entrega de resultados por webhook (CRM, ticketing) com outbox persistente.
+
+Cada evento é gravado primeiro no outbox (SQLite), uma linha por endpoint, e
+só sai de lá quando o endpoint responde 2xx. Um worker por endpoint agrupa as
+entregas em lotes de até WEBHOOK_BATCH_SIZE eventos, enviados quando o lote
+enche ou quando o evento mais antigo espera WEBHOOK_BATCH_WINDOW_MS. Falhas
+temporárias (rede, 408, 429, 5xx) voltam ao outbox com backoff exponencial e
+jitter; após WEBHOOK_MAX_ATTEMPTS tentativas, ou em erros 4xx definitivos, o
+evento fica como `dead` para inspeção. O envio usa um único cliente httpx com
+pool de conexões e no máximo WEBHOOK_CONCURRENCY lotes em andamento por
+endpoint.
+
+A entrega é "pelo menos uma vez": um lote em andamento quando o processo cai
+é reenviado após o lease. O receptor deve deduplicar por `id`.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import suppress
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from ..models.data_models import ProcessingResult
+from .result_broadcaster import result_summary
+
+logger = logging.getLogger(__name__)
+
+EVENT_REVIEW_COMPLETED = "review.completed"
+EVENT_ESCALATION_CREATED = "escalation.created"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    delivery_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    event TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (endpoint, status, available_at);
+"""
+
+# Status HTTP que justificam nova tentativa
+RETRYABLE_STATUS = {408, 425, 429}
+
+
+def parse_list(value: str) -> List[str]:
+    """'https://a/hook, https://b/hook' -> ['https://a/hook', 'https://b/hook']."""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class WebhookOutbox:
+    """
+    Fila persistente de entregas sobre SQLite.
+
+    Uma entrega "reservada" para envio tem `available_at` adiado pelo lease;
+    se o processo cair antes da confirmação, ela volta a ficar disponível.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def enqueue(self, endpoints: List[str], event: str, payload: Dict[str, Any]) -> None:
+        """Grava o evento para cada endpoint."""
+        now = time.time()
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        rows = [(str(uuid.uuid4()), endpoint, event, body, now, now) for endpoint in endpoints]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO outbox (delivery_id, endpoint, event, payload, created_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def pending(self, endpoint: str, now: float) -> Tuple[int, Optional[float], Optional[float]]:
+        """
+        Situação das entregas pendentes de um endpoint.
+
+        Returns:
+            Tuple: Quantidade disponível agora, `available_at` mais antigo entre
+            elas e o próximo `available_at` futuro (retry ou lease)
+        """
+        with self._lock:
+            due = self._conn.execute(
+                "SELECT COUNT(*), MIN(available_at) FROM outbox "
+                "WHERE endpoint = ? AND status = 'pending' AND available_at <= ?",
+                (endpoint, now)
+            ).fetchone()
+            upcoming = self._conn.execute(
+                "SELECT MIN(available_at) FROM outbox "
+                "WHERE endpoint = ? AND status = 'pending' AND available_at > ?",
+                (endpoint, now)
+            ).fetchone()
+        return due[0], due[1], upcoming[0]
+
+    def claim(self, endpoint: str, limit: int, now: float, lease_until: float) -> List[sqlite3.Row]:
+        """Reserva até `limit` entregas disponíveis, das mais antigas para as mais novas."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, delivery_id, event, payload, created_at, attempts FROM outbox "
+                "WHERE endpoint = ? AND status = 'pending' AND available_at <= ? "
+                "ORDER BY available_at, id LIMIT ?",
+                (endpoint, now, limit)
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET available_at = ? WHERE id = ?",
+                [(lease_until, row["id"]) for row in rows]
+            )
+            self._conn.commit()
+        return rows
+
+    def delivered(self, ids: List[int]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def failed(self, updates: List[Tuple[int, int, Optional[float], str]]) -> None:
+        """
+        Registra uma tentativa sem sucesso.
+
+        Args:
+            updates: (id, tentativas, próximo available_at ou None para `dead`, erro)
+        """
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = ?, available_at = COALESCE(?, available_at), "
+                "status = CASE WHEN ? IS NULL THEN 'dead' ELSE 'pending' END, last_error = ? WHERE id = ?",
+                [(attempts, next_at, next_at, error, row_id) for row_id, attempts, next_at, error in updates]
+            )
+            self._conn.commit()
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Entregas no outbox por endpoint e status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT endpoint, status, COUNT(*) AS n FROM outbox GROUP BY endpoint, status"
+            ).fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            counts.setdefault(row["endpoint"], {})[row["status"]] = row["n"]
+        return counts
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class _EndpointState:
+    url: str
+    slots: asyncio.Semaphore
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    hint: int = 0
+    inflight: Set[asyncio.Task] = field(default_factory=set)
+    delivered: int = 0
+    batches: int = 0
+    failed_attempts: int = 0
+    dead: int = 0
+    last_error: Optional[str] = None
+
+
+class WebhookDispatcher:
+    """
+    Envia o outbox aos endpoints configurados.
+
+    Args:
+        endpoints: URLs que recebem todos os eventos
+        outbox: Fila persistente
+        events: Eventos enviados (os demais são ignorados)
+        batch_size: Eventos por requisição
+        batch_window: Espera máxima (s) para completar um lote
+        max_attempts: Tentativas antes de marcar a entrega como `dead`
+        backoff_base / backoff_max: Backoff exponencial (s), com jitter
+        concurrency: Lotes simultâneos por endpoint
+        timeout: Timeout (s) de cada requisição
+        secret: Chave HMAC-SHA256 da assinatura (vazio = sem assinatura)
+        client: Cliente httpx (padrão: um cliente com pool próprio)
+    """
+
+    def __init__(
+        self,
+        endpoints: List[str],
+        outbox: WebhookOutbox,
+        events: Tuple[str, ...] = (EVENT_REVIEW_COMPLETED, EVENT_ESCALATION_CREATED),
+        batch_size: int = 50,
+        batch_window: float = 0.5,
+        max_attempts: int = 8,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+        concurrency: int = 4,
+        timeout: float = 10.0,
+        secret: str = "",
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        self.endpoints = list(dict.fromkeys(endpoints))
+        self.outbox = outbox
+        self.events = set(events)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.secret = secret.encode()
+        self._client = client
+        self._owns_client = client is None
+        self._states: Dict[str, _EndpointState] = {}
+        self._workers: List[asyncio.Task] = []
+        self._closing = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.endpoints)
+
+    async def start(self) -> None:
+        """Inicia um worker por endpoint (entregas pendentes de execuções anteriores incluídas)."""
+        if not self.enabled:
+            return
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.concurrency * len(self.endpoints),
+                    max_keepalive_connections=self.concurrency * len(self.endpoints)
+                )
+            )
+        for url in self.endpoints:
+            state = _EndpointState(url=url, slots=asyncio.Semaphore(self.concurrency))
+            self._states[url] = state
+            self._workers.append(asyncio.create_task(self._run(state)))
+
+    async def close(self, grace: float = 5.0) -> None:
+        """Para os workers e espera os lotes em andamento por até `grace` segundos."""
+        # Os workers saem pelo flag: cancelar um wait_for que acabou de ser
+        # acordado pode ser ignorado (Python 3.11) e travar o encerramento
+        self._closing = True
+        for state in self._states.values():
+            state.wakeup.set()
+        tasks = self._workers + [task for state in self._states.values() for task in state.inflight]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=grace)
+            # Entregas canceladas continuam reservadas e voltam após o lease
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending, timeout=1.0)
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+        self.outbox.close()
+
+    async def enqueue(self, event: str, payload: Dict[str, Any]) -> None:
+        """Grava o evento no outbox de todos os endpoints e acorda os workers."""
+        if not self.enabled or event not in self.events:
+            return
+        await asyncio.to_thread(self.outbox.enqueue, self.endpoints, event, payload)
+        for state in self._states.values():
+            state.hint += 1
+            # Acorda no primeiro evento (worker ocioso) ou quando o lote enche
+            if state.hint == 1 or state.hint >= self.batch_size:
+                state.wakeup.set()
+
+    async def enqueue_result(self, result: ProcessingResult, batch_id: Optional[str] = None) -> None:
+        """Eventos de um ProcessingResult concluído."""
+        summary = result_summary(result, batch_id)
+        await self.enqueue(EVENT_REVIEW_COMPLETED, summary)
+        if result.escalation and result.escalation.escalation_needed:
+            await self.enqueue(
+                EVENT_ESCALATION_CREATED,
+                {**summary, "escalation": result.escalation.model_dump(mode="json")}
+            )
+
+    async def _run(self, state: _EndpointState) -> None:
+        while not self._closing:
+            try:
+                await self._step(state)
+            except Exception as e:
+                logger.error(f"Erro no worker de webhook {state.url}: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _step(self, state: _EndpointState) -> None:
+        state.wakeup.clear()
+        now = time.time()
+        count, oldest, upcoming = await asyncio.to_thread(self.outbox.pending, state.url, now)
+        state.hint = count
+
+        if count >= self.batch_size or (count and now - oldest >= self.batch_window):
+            await state.slots.acquire()
+            if self._closing:
+                state.slots.release()
+                return
+            lease_until = time.time() + self.timeout * 2
+            try:
+                rows = await asyncio.to_thread(self.outbox.claim, state.url, self.batch_size, time.time(), lease_until)
+            except BaseException:
+                state.slots.release()
+                raise
+            if not rows:
+                state.slots.release()
+                return
+            task = asyncio.create_task(self._send(state, rows))
+            state.inflight.add(task)
+            task.add_done_callback(state.inflight.discard)
+            return
+
+        timeout = None
+        if count:
+            timeout = self.batch_window - (now - oldest)
+        if upcoming is not None:
+            timeout = min(timeout if timeout is not None else float("inf"), upcoming - now)
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(state.wakeup.wait(), timeout)
+
+    def _headers(self, body: bytes, batch_id: str) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json", "X-ReviewFlow-Batch": batch_id}
+        if self.secret:
+            signature = hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+            headers["X-ReviewFlow-Signature"] = f"sha256={signature}"
+        return headers
+
+    def _backoff(self, attempts: int) -> float:
+        # Full jitter: evita que entregas que falharam juntas voltem juntas
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1)))
+
+    async def _send(self, state: _EndpointState, rows: List[sqlite3.Row]) -> None:
+        try:
+            batch_id = str(uuid.uuid4())
+            body = json.dumps({
+                "batch_id": batch_id,
+                "deliveries": [
+                    {
+                        "id": row["delivery_id"],
+                        "event": row["event"],
+                        "created_at": row["created_at"],
+                        "attempt": row["attempts"] + 1,
+                        "data": json.loads(row["payload"])
+                    }
+                    for row in rows
+                ]
+            }, ensure_ascii=False, separators=(",", ":")).encode()
+
+            retry_after = 0.0
+            try:
+                response = await self._client.post(state.url, content=body, headers=self._headers(body, batch_id))
+                status = response.status_code
+                error = None if 200 <= status < 300 else f"HTTP {status}"
+                retryable = status in RETRYABLE_STATUS or status >= 500
+                with suppress(KeyError, ValueError):
+                    retry_after = float(response.headers["Retry-After"])
+            except httpx.HTTPError as e:
+                error, retryable = f"{type(e).__name__}: {e}", True
+
+            if error is None:
+                await asyncio.to_thread(self.outbox.delivered, [row["id"] for row in rows])
+                state.delivered += len(rows)
+                state.batches += 1
+                return
+
+            state.failed_attempts += 1
+            state.last_error = error
+            now = time.time()
+            updates = []
+            for row in rows:
+                attempts = row["attempts"] + 1
+                if retryable and attempts < self.max_attempts:
+                    next_at = now + max(retry_after, self._backoff(attempts))
+                else:
+                    next_at = None
+                    state.dead += 1
+                updates.append((row["id"], attempts, next_at, error))
+            await asyncio.to_thread(self.outbox.failed, updates)
+            logger.warning(f"Webhook {state.url} falhou ({error}); {len(rows)} entregas reagendadas ou descartadas")
+            # Reavalia o próximo retry no worker
+            state.wakeup.set()
+        finally:
+            state.slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        counts = self.outbox.counts() if self.enabled else {}
+        return {
+            "enabled": self.enabled,
+            "endpoints": {
+                url: {
+                    "delivered": state.delivered,
+                    "batches": state.batches,
+                    "avg_batch_size": round(state.delivered / state.batches, 2) if state.batches else 0.0,
+                    "failed_attempts": state.failed_attempts,
+                    "in_flight_batches": len(state.inflight),
+                    "pending": counts.get(url, {}).get("pending", 0),
+                    "dead": counts.get(url, {}).get("dead", 0),
+                    "last_error": state.last_error
+                }
+                for url, state in self._states.items()
+            }
+        }
+
+
+def create_webhook_dispatcher() -> WebhookDispatcher:
+    """Cria o dispatcher conforme as configurações WEBHOOK_*."""
+    from ..config import settings
+
+    endpoints = parse_list(settings.WEBHOOK_URLS)
+    return WebhookDispatcher(
+        endpoints=endpoints,
+        # Sem endpoints o dispatcher fica inativo; não cria o arquivo do outbox
+        outbox=WebhookOutbox(settings.WEBHOOK_OUTBOX_PATH if endpoints else ":memory:"),
+        events=tuple(parse_list(settings.WEBHOOK_EVENTS)),
+        batch_size=settings.WEBHOOK_BATCH_SIZE,
+        batch_window=settings.WEBHOOK_BATCH_WINDOW_MS / 1000,
+        max_attempts=settings.WEBHOOK_MAX_ATTEMPTS,
+        backoff_base=settings.WEBHOOK_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.WEBHOOK_BACKOFF_MAX_SECONDS,
+        concurrency=settings.WEBHOOK_CONCURRENCY,
+        timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+        secret=settings.WEBHOOK_SECRET
+    )
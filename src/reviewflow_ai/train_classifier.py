@@ -0,0 +1,117 @@
+"""
+Treino do classificador destilado a partir dos resultados gravados.
+
+Lê os ProcessingResult do ResultStore, mantém apenas análises feitas pelo LLM
+(descarta fallbacks heurísticos, reutilizações de duplicatas e previsões do
+próprio classificador), separa uma fração para validação e grava o modelo em
+um diretório de arquivos .npy carregados com mmap pelos workers.
+
+Uso:
+    python -m src.reviewflow_ai.train_classifier --output models/distilled
+    python -m src.reviewflow_ai.train_classifier --database-url sqlite:///data/reviewflow.db --output models/distilled --epochs 10
+"""
+
+import argparse
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .config import settings
+from .tools.distilled_classifier import encode_labels, evaluate, train_classifier
+from .tools.heuristic_analyzer import HEURISTIC_MAX_CONFIDENCE
+from .tools.result_store import create_result_store
+
+logger = logging.getLogger(__name__)
+
+
+def is_llm_label(payload: Dict[str, Any]) -> bool:
+    """O resultado traz uma análise feita pelo LLM para o próprio review."""
+    analysis = payload.get("analysis") or {}
+    source = analysis.get("analysis_source")
+    if source is not None:
+        return source == "llm"
+    # Resultados anteriores ao campo analysis_source
+    return (
+        not payload.get("duplicate_of")
+        and (analysis.get("confidence_score") or 0.0) > HEURISTIC_MAX_CONFIDENCE
+        and not any("heuristic fallback" in e for e in payload.get("errors") or [])
+    )
+
+
+def load_examples(database_url: str) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Reviews e alvos, mantendo o resultado mais recente de cada review."""
+    store = create_result_store(database_url)
+    latest: Dict[str, Tuple[Dict[str, Any], np.ndarray]] = {}
+    try:
+        for payload in store.iter_payloads():
+            if not is_llm_label(payload):
+                continue
+            target = encode_labels(payload["analysis"])
+            if target is not None:
+                review = payload["review_input"]
+                latest[review.get("id") or payload["workflow"]["review_id"]] = (review, target)
+    finally:
+        store.close()
+    reviews = [review for review, _ in latest.values()]
+    targets = np.array([target for _, target in latest.values()], dtype=np.float32).reshape(-1, 10)
+    return reviews, targets
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="reviewflow-train-classifier",
+        description="Treina o classificador local destilado das análises do LLM"
+    )
+    parser.add_argument("--database-url", default=settings.DATABASE_URL,
+                        help="ResultStore de origem (padrão: DATABASE_URL)")
+    parser.add_argument("--output", default=settings.DISTILLED_MODEL_PATH or "models/distilled",
+                        help="Diretório do modelo")
+    parser.add_argument("--n-features", type=int, default=2 ** 18, help="Colunas do hashing (potência de 2)")
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-3, help="Regularização L2 dos pesos")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Fração reservada para validação")
+    parser.add_argument("--min-examples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+
+    reviews, targets = load_examples(args.database_url)
+    if len(reviews) < args.min_examples:
+        raise SystemExit(f"Exemplos insuficientes: {len(reviews)} (mínimo {args.min_examples})")
+
+    order = np.random.default_rng(args.seed).permutation(len(reviews))
+    split = int(len(order) * (1 - args.holdout))
+    train, holdout = order[:split], order[split:]
+    logger.info(f"Treinando com {len(train)} exemplos ({len(holdout)} para validação)")
+
+    model = train_classifier(
+        [reviews[i] for i in train], targets[train],
+        n_features=args.n_features,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        l2=args.l2,
+        seed=args.seed
+    )
+    model.meta = {
+        "trained_at": datetime.now().isoformat(),
+        "training_examples": len(train),
+        "n_features": args.n_features,
+        "epochs": args.epochs,
+        "l2": args.l2,
+        "validation": evaluate(model, [reviews[i] for i in holdout], targets[holdout])
+    }
+    model.save(args.output)
+    print(json.dumps(model.meta, indent=2, ensure_ascii=False))
+    print(f"Modelo salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()